@@ -0,0 +1,110 @@
+"""
+This module contains the Accumulators class, which keeps running totals for each cell of the grid as the simulation runs, so maps of the fire
+regime (how often each cell burns, the time between its fires, how old its trees are when they burn) can be made without storing every frame.
+Set config.accumulators to an Accumulators of the first grid (or pass accumulate = True to runner.start) and the update grid functions add each
+frame to it. Everything is kept in integer arrays the size of the grid, however many frames are run.
+"""
+
+#Importing modules
+import numpy as np
+import config
+
+#The arrays kept for each cell
+ARRAYS = ("burn_count", "last_ignition", "tree_since", "tree_frames", "age_sum", "interval_sum")
+
+
+class Accumulators:
+    def __init__(self, grid, start_frame = 0):
+        """
+        This makes empty totals for a grid.
+
+        Args:
+            grid (numpy array): the grid the simulation starts from, its trees are counted as growing at start_frame
+            start_frame (int): the number of the first frame that will be added
+        """
+        shape = np.shape(grid)
+        # the number of frames added
+        self.frames = 0
+        # the number of times each cell caught fire, and the frame it last did (-1 if it never has)
+        self.burn_count = np.zeros(shape, dtype = np.int32)
+        self.last_ignition = np.full(shape, -1, dtype = np.int32)
+        # the frame the tree in each cell grew (-1 if there is no tree), and the number of frames each cell has had a tree
+        self.tree_since = np.where(np.asarray(grid) == config.TREE, start_frame, -1).astype(np.int32)
+        self.tree_frames = np.zeros(shape, dtype = np.int32)
+        # the total age of the trees in each cell when they caught fire, and the total frames between the fires of each cell
+        self.age_sum = np.zeros(shape, dtype = np.int64)
+        self.interval_sum = np.zeros(shape, dtype = np.int64)
+
+    def update(self, old_grid, grid, frame_num):
+        """
+        This function adds a frame to the totals.
+
+        Args:
+            old_grid (numpy array): the grid of the last frame
+            grid (numpy array): the grid of this frame
+            frame_num (int): the number of this frame
+        """
+        self.frames += 1
+
+        # the cells that caught fire this frame, with the time since their last fire and the age of their tree. Only those cells are
+        # indexed, as they are usually few
+        cells = np.flatnonzero((grid == config.FIRE) & (old_grid != config.FIRE))
+        if cells.size:
+            for total, since in ((self.interval_sum, self.last_ignition), (self.age_sum, self.tree_since)):
+                frames = since.ravel()[cells]
+                total.ravel()[cells] += np.where(frames >= 0, frame_num - frames, 0)
+            self.burn_count.ravel()[cells] += 1
+            self.last_ignition.ravel()[cells] = frame_num
+
+        # the trees that grew this frame, and the cells whose tree is gone
+        trees = grid == config.TREE
+        np.copyto(self.tree_since, frame_num, where = trees > (old_grid == config.TREE))
+        np.copyto(self.tree_since, -1, where = ~trees)
+        self.tree_frames += trees
+
+    def maps(self):
+        """
+        This function works out the maps of the fire regime from the totals. Cells with nothing to average are nan.
+
+        Returns:
+            (dict): maps the size of the grid:
+                "burn_frequency": the number of fires per frame
+                "return_interval": the mean number of frames between fires
+                "age_at_burn": the mean age of the trees when they caught fire
+                "tree_cover": the proportion of frames with a tree
+        """
+        frames = max(self.frames, 1)
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            intervals = np.maximum(self.burn_count - 1, 0)
+            return {"burn_frequency": self.burn_count / frames,
+                    "return_interval": np.where(intervals > 0, self.interval_sum / intervals, np.nan),
+                    "age_at_burn": np.where(self.burn_count > 0, self.age_sum / self.burn_count, np.nan),
+                    "tree_cover": self.tree_frames / frames}
+
+    def get_state(self):
+        """
+        This function returns everything needed to rebuild the totals, it is used to checkpoint a simulation.
+
+        Returns:
+            (dict): the number of frames and each of the arrays
+        """
+        state = {name: getattr(self, name).copy() for name in ARRAYS}
+        state["frames"] = self.frames
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        This function rebuilds the totals from the state returned by get_state.
+
+        Args:
+            state (dict): the state returned by get_state
+
+        Returns:
+            (Accumulators): the same totals
+        """
+        accumulators = cls(np.asarray(state["burn_count"]))
+        accumulators.frames = int(state["frames"])
+        for name in ARRAYS:
+            setattr(accumulators, name, np.asarray(state[name], dtype = getattr(accumulators, name).dtype).copy())
+        return accumulators
@@ -1,21 +1,113 @@
 """
 This module contains the animate function that updates the animation frame by frame and animate_with_rain which does the same but updates the animation with rain included. 
-
+Each frame of the animation runs config.frame_skip steps of the model without drawing them, so long runs can be fast forwarded. With config.target_fps
+set, the frame skip is tuned every frame to keep the animation at that frame rate. The graphs still get the statistics of every step.
 """
 
 #Importing modules
+import time
 import config
 import numpy as np
 from grid_updater import update_grid, update_grid_with_rain
 from resize import enlarge, shrink
 
+#The most steps run in one frame of the animation when the frame skip is tuned
+MAX_FRAME_SKIP = 1000
+
+#When the last frame of the animation started and how long its model steps took, used to tune the frame skip
+last_tick = None
+last_step_time = 0.0
+
+def tune_frame_skip():
+    """
+    This function changes config.frame_skip so a frame of the animation takes about 1 / config.target_fps seconds. It measures how long the last
+    frame took as a whole and how much of that was model steps, and sets the number of steps that leaves the same time for the drawing.
+    Nothing changes if config.target_fps is None.
+    """
+    global last_tick
+    now = time.perf_counter()
+    if config.target_fps is not None and last_tick is not None and config.frame_skip > 0:
+        #The time the last frame spent drawing (and waiting for the next frame) and the time one model step takes
+        draw_time = max(now - last_tick - last_step_time, 0)
+        step_time = max(last_step_time / config.frame_skip, 1e-9)
+        #The number of steps that fit in what is left of the frame, averaged with the last frame skip so it does not jump about
+        target = (1 / config.target_fps - draw_time) / step_time
+        config.frame_skip = int(np.clip(round((config.frame_skip + target) / 2), 1, MAX_FRAME_SKIP))
+    last_tick = now
+
+def step_model(grid, update):
+    """
+    This function runs config.frame_skip steps of the model on the grid, numbering them with config.model_step. With rain it runs no steps past
+    the frames of config.weather.
+    
+    Args:
+        grid (numpy array): the grid of the last step
+        update (function): update_grid or update_grid_with_rain
+        
+    Output:
+        grid (numpy array): the grid after the last step
+        
+        rain_intensity (numpy array): the rain intensity of the last step with update_grid_with_rain, otherwise None (or if no steps were run)
+    """
+    global last_step_time
+    start = time.perf_counter()
+    rain_intensity = None
+    steps = config.frame_skip
+    #The rain clouds only cover the frames the weather was made for, so the steps stop at the last of them
+    if update is update_grid_with_rain:
+        steps = max(min(steps, config.weather.max_iterations - config.model_step), 0)
+    for step in range(steps):
+        if update is update_grid_with_rain:
+            grid, rain_intensity = update(grid, config.model_step)
+        else:
+            grid = update(grid, config.model_step)
+        config.model_step += 1
+    last_step_time = time.perf_counter() - start
+    return grid, rain_intensity
+
+def update_xlim():
+    """
+    This function widens the x axis of the graph when the model steps run past its end, which happens when frames are skipped.
+    With a "ring" metrics mode the axis starts at the oldest step that is kept.
+    """
+    ax = config.line1.axes
+    left, right = ax.get_xlim()
+    if config.metrics_mode == "ring" and len(config.prop_of_trees):
+        left = config.prop_of_trees.frames()[0]
+    if config.model_step > right:
+        right = 2 * config.model_step
+    if (left, right) != ax.get_xlim():
+        ax.set_xlim(left, right)
+
+def draw_bar_chart(trees, fires):
+    """
+    This function redraws the bar chart of the proportions of trees, fires and empty cells in a frame.
+    
+    Args:
+        trees (float): the proportion of trees in the frame
+        fires (float): the proportion of trees on fire in the frame
+    """
+    #Clear axis of barchart and replot to give dynamic effect
+    config.ax3.clear()
+    #count_dict - a dictionary to keep track of the relative proportion of tree, fires and empty cell in each frame
+    count_dict = {
+        'Tree': [trees, "tab:green"],
+        'Fire': [fires, "tab:red"],
+        'Empty': [1 - (trees + fires), "tab:grey"],
+    }
+    #Sort dict in descending order for ranking 
+    order_dict = sorted(count_dict.items(),key=lambda x:x[1][0],reverse=False)
+    #Replot barchart 
+    config.ax3.barh([i[0] for i in order_dict], [1, 1, 1], alpha=0)
+    config.ax3.barh([i[0] for i in order_dict], [i[1][0] for i in order_dict], color=[i[1][1] for i in order_dict])
+
 def animate(i):
     """
     This function is called for each frame of the animation
     It is where the data of the grid gets updated
     
     Args:
-        i: the current frame number
+        i: the current frame number of the animation, the model may be on a later step when frames are skipped (see config.model_step)
         
     Output:
         grid_plot (numpy_array) : the new grid
@@ -24,39 +116,35 @@ def animate(i):
         
         line2 (matplotlib.lines.Line2D): Plot point for the graph showing propotion of trees on fire compared to the grid
     """
+    global last_tick
+    
+    #The model steps and frame rate start again with the animation, and the frame skip is tuned to the target frame rate
+    if i == 0:
+        config.model_step = 0
+        last_tick = None
+    tune_frame_skip()
+    
     #Collect the grid and make this the old one, we need a new one now...
     old_grid = config.grid_plot.get_array().copy()
-    #... call the update grid function on this old grid to get our new one!
-    new_grid = update_grid(old_grid, i)
+    #... call the update grid function on this old grid frame_skip times to get our new one!
+    new_grid, rain_intensity = step_model(old_grid, update_grid)
     
     
     #This is for the graphing
-    #Set the x axis to be the new frame number
-    x = np.arange(i + 1)
-    #Make the first line (green) on the graph to be the proportion of trees we found in the update grid function against the current frame number
-    y = np.array(config.prop_of_trees)
-    config.line1.set_data(x, y)
-    #Make the second line (red) on the graph to be the proportion of trees on fire we found in the update grid function against the current frame
-    z = np.array(config.prop_of_fires)
-    config.line2.set_data(x, z)
+    #Make the first line (green) on the graph to be the proportion of trees we found in the update grid function against the frame numbers
+    #that are stored (every frame, the last few or buckets of frames, see the metrics module)
+    config.line1.set_data(config.prop_of_trees.frames(), config.prop_of_trees.values())
+    #Make the second line (red) on the graph to be the proportion of trees on fire we found in the update grid function against the frame numbers
+    config.line2.set_data(config.prop_of_fires.frames(), config.prop_of_fires.values())
+    #Make room on the x axis for the steps that have been run
+    update_xlim()
     
     
     #Set the plot to be this new grid
     config.grid_plot.set_array(new_grid)
     
-    #Clear axis of barchart and replot to give dynamic effect
-    config.ax3.clear()
-    #count_dict - a dictionary to keep track of the relative proportion of tree, fires and empty cell in each frame
-    count_dict = {
-        'Tree': [config.prop_of_trees[-1], "tab:green"],
-        'Fire': [config.prop_of_fires[-1], "tab:red"],
-        'Empty': [1 - (config.prop_of_trees[-1] + config.prop_of_fires[-1]), "tab:grey"],
-    }
-    #Sort dict in descending order for ranking 
-    order_dict = sorted(count_dict.items(),key=lambda x:x[1][0],reverse=False)
-    #Replot barchart 
-    config.ax3.barh([i[0] for i in order_dict], [1, 1, 1], alpha=0)
-    config.ax3.barh([i[0] for i in order_dict], [i[1][0] for i in order_dict], color=[i[1][1] for i in order_dict])
+    #Redraw the bar chart of the proportions in this frame
+    draw_bar_chart(config.prop_of_trees.last, config.prop_of_fires.last)
     
     #Return the plot for the grid and the lines we need for the graph
     return config.grid_plot, config.line1, config.line2,  
@@ -67,7 +155,7 @@ def animate_with_rain(i):
     It is where the data of the grid gets updated
     
     Args:
-        i: the current frame number
+        i: the current frame number of the animation, the model may be on a later step when frames are skipped (see config.model_step)
         
     Output:
         grid_plot (numpy_array) : the new grid
@@ -79,19 +167,26 @@ def animate_with_rain(i):
         line3 (matplotlib.lines.Line2D): Plot point for the graph showing the proportion of cells with rain compared to the grid
     """
     
-    global big_arr 
+    global big_arr, last_tick
     
-    # if it's the first frame, we initialise big_arr with the grid plot array
+    # if it's the first frame, we initialise big_arr with the grid plot array and start the model steps and frame rate again
     if i == 0:
         big_arr = config.grid_plot.get_array()
+        config.model_step = 0
+        last_tick = None
+    tune_frame_skip()
+    
+    # once the steps reach the last frame the rain clouds cover, the animation stays on its last frame
+    if config.model_step >= config.weather.max_iterations:
+        return config.grid_plot, config.line1, config.line2, config.line3
    
     
     
     # shrink our big array to size update grid is expecting (not necessary for the first frame)
     smll_arr = shrink(big_arr)
     
-     #... call the update grid function on this old grid to get our new one and to also get a rain_intensity array
-    new_smll_arr, rain_intensity = update_grid_with_rain(smll_arr, i) 
+     #... call the update grid function on this old grid frame_skip times to get our new one and to also get the last rain_intensity array
+    new_smll_arr, rain_intensity = step_model(smll_arr, update_grid_with_rain) 
     
     # enlarge our array so there are more pixels per cell  
     big_arr = enlarge(new_smll_arr)
@@ -103,36 +198,26 @@ def animate_with_rain(i):
     config.grid_plot.set_array(big_arr_with_rain)
     
     #This is for the graphing
-    #Set the x axis to be the new frame number
-    x = np.arange(i + 1)
-    #Make the first line (green) on the graph to be the proportion of trees we found in the update grid function against the current frame number
-    y = np.array(config.prop_of_trees)
-    config.line1.set_data(x, y)
-    #Make the second line (red) on the graph to be the proportion of trees on fire we found in the update grid function against the current frame
-    z = np.array(config.prop_of_fires)
-    config.line2.set_data(x, z)
+    #Make the first line (green) on the graph to be the proportion of trees we found in the update grid function against the frame numbers
+    #that are stored (every frame, the last few or buckets of frames, see the metrics module)
+    config.line1.set_data(config.prop_of_trees.frames(), config.prop_of_trees.values())
+    #Make the second line (red) on the graph to be the proportion of trees on fire we found in the update grid function against the frame numbers
+    config.line2.set_data(config.prop_of_fires.frames(), config.prop_of_fires.values())
     #Find the proportion of cells that have rain compared to the size of the enlarged grid
-    config.prop_of_rain.append(np.sum(big_arr_with_rain == 3)/((config.GRID_HEIGHT * config.BLOCK_SIZE) * (config.GRID_WIDTH * config.BLOCK_SIZE)))
+    #The rain is only drawn once per frame, so its proportion is used for each step of the frame to keep it in line with the other graphs
+    prop_of_rain = np.sum(big_arr_with_rain == 3)/((config.GRID_HEIGHT * config.BLOCK_SIZE) * (config.GRID_WIDTH * config.BLOCK_SIZE))
+    while config.prop_of_rain.count < config.prop_of_trees.count:
+        config.prop_of_rain.append(prop_of_rain)
     #Make the third line (blue) on the graph to be the proportion of cells with rain in the update grid function against the current frame
-    r = np.array(config.prop_of_rain)
-    config.line3.set_data(x, r)
+    config.line3.set_data(config.prop_of_rain.frames(), config.prop_of_rain.values())
+    #Make room on the x axis for the steps that have been run
+    update_xlim()
     
     
    
     
-    #Clear axis of barchart and replot to give dynamic effect
-    config.ax3.clear()
-    #count_dict - a dictionary to keep track of the relative proportion of tree, fires and empty cell in each frame
-    count_dict = {
-        'Tree': [config.prop_of_trees[-1], "tab:green"],
-        'Fire': [config.prop_of_fires[-1], "tab:red"],
-        'Empty': [1 - (config.prop_of_trees[-1] + config.prop_of_fires[-1]), "tab:grey"],
-    }
-    #Sort dict in descending order for ranking 
-    order_dict = sorted(count_dict.items(),key=lambda x:x[1][0],reverse=False)
-    #Replot barchart 
-    config.ax3.barh([i[0] for i in order_dict], [1, 1, 1], alpha=0)
-    config.ax3.barh([i[0] for i in order_dict], [i[1][0] for i in order_dict], color=[i[1][1] for i in order_dict])
+    #Redraw the bar chart of the proportions in this frame
+    draw_bar_chart(config.prop_of_trees.last, config.prop_of_fires.last)
     
     #Return the plot for the grid and the lines we need for the graph
     return config.grid_plot, config.line1, config.line2, config.line3
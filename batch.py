@@ -0,0 +1,207 @@
+"""
+This module runs a sweep from the terminal, without Jupyter or any figures, so large sweeps can be scheduled on batch nodes.
+The sweep is described in a JSON or TOML spec file with the keys of a sweep spec (see the sweep module), plus optionally:
+    "workers": the number of worker processes, defaults to 1
+    "cache": a result cache file (see the result_cache module), seeded runs already in it are not run again
+    "summary_path": the CSV file for the mean results of each point, defaults to the spec file name ending in _summary.csv
+    "runs_path": the CSV file for the result of every run, defaults to the spec file name ending in _runs.csv
+
+Example spec.toml:
+    parameter = 1
+    values = [0.01, 0.02, 0.05]
+    times = 20
+    seed = 1
+    GRID_HEIGHT = 50
+    GRID_WIDTH = 50
+    frame_num = 500
+    workers = 8
+
+Run it with:
+    python batch.py spec.toml
+or, to run the longest runs first and see how well their times were predicted (see the scheduler module):
+    python batch.py spec.toml --schedule
+"""
+
+#Importing modules
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from result_cache import ResultCache
+from running_stats import RunningStats
+from sweep import DEFAULTS, run_sweep_task, sweep_points, sweep_tasks, task_key
+
+#The settings written as columns of both tables, in order
+SETTINGS_COLUMNS = ["GRID_HEIGHT", "GRID_WIDTH", "lightning", "tree_growth", "frame_num", "cloud_th", "rain", "instant_burn"]
+
+
+def load_spec(path):
+    """
+    This function reads a sweep spec file.
+
+    Args:
+        path (str): a .json or .toml file
+
+    Returns:
+        (dict): the spec
+
+    Raises:
+        ValueError: if the file is not a .json or .toml file
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path) as f:
+            return json.load(f)
+    if extension == ".toml":
+        #tomllib is part of the standard library from python 3.11
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    raise ValueError("Invalid spec file, only accepts .json or .toml!")
+
+
+def run_sweep(spec, workers = 1, cache = None, progress = None):
+    """
+    This function runs every run of a sweep, in worker processes if there is more than one worker.
+
+    Args:
+        spec (dict): the sweep spec, see the sweep module
+        workers (int): the number of worker processes
+        cache (ResultCache): if given, seeded runs are taken from and added to the cache
+        progress (file): if given, the number of runs done is written to it as the sweep goes on
+
+    Returns:
+        tasks (list): every run of the sweep, see sweep.sweep_tasks
+
+        results (list): the (remaining trees, last frame) of each run
+    """
+    tasks = sweep_tasks(spec)
+    results = [None] * len(tasks)
+
+    #Runs already in the cache do not need to be run again
+    keys = [None] * len(tasks)
+    if cache is not None:
+        for i, task in enumerate(tasks):
+            keys[i] = task_key(task)
+            if keys[i] is not None:
+                results[i] = cache.get(keys[i])
+    todo = [i for i in range(len(tasks)) if results[i] is None]
+
+    #Run the rest, in this process or in a pool of worker processes
+    todo_tasks = [tasks[i] for i in todo]
+    if workers > 1:
+        executor = ProcessPoolExecutor(workers)
+        finished = executor.map(run_sweep_task, todo_tasks, chunksize = max(1, len(todo) // (4 * workers)))
+    else:
+        executor = None
+        finished = map(run_sweep_task, todo_tasks)
+
+    for done, (i, result) in enumerate(zip(todo, finished), start = 1):
+        results[i] = tuple(result)
+        if keys[i] is not None:
+            cache.put(keys[i], *result)
+        if progress is not None:
+            progress.write(f"\r{done}/{len(todo)} runs")
+            progress.flush()
+
+    if executor is not None:
+        executor.shutdown()
+    if progress is not None and todo:
+        progress.write("\n")
+    return tasks, results
+
+
+def write_tables(spec, tasks, results, summary_path, runs_path, z = 1.96):
+    """
+    This function writes the results of a sweep as two CSV tables, one row per point and one row per run.
+
+    Args:
+        spec (dict): the sweep spec
+        tasks (list): every run of the sweep, from run_sweep
+        results (list): the result of each run, from run_sweep
+        summary_path (str): the file for the table of points, with the mean and confidence interval half width of the remaining trees and last frame
+        runs_path (str): the file for the table of runs
+        z (float): the critical value of the confidence intervals
+    """
+    labels, settings = sweep_points(spec)
+    tree_stats = [RunningStats() for label in labels]
+    frame_stats = [RunningStats() for label in labels]
+
+    with open(runs_path, "w", newline = "") as f:
+        writer = csv.writer(f)
+        writer.writerow(["point"] + SETTINGS_COLUMNS + ["seed", "replicate", "remaining_trees", "last_frame"])
+        for task, (remaining_trees, last_frame) in zip(tasks, results):
+            point = task["point"]
+            tree_stats[point].update(remaining_trees)
+            frame_stats[point].update(last_frame)
+            writer.writerow([point] + [task["settings"][name] for name in SETTINGS_COLUMNS] + [task["seed"], task["replicate"], remaining_trees, last_frame])
+
+    with open(summary_path, "w", newline = "") as f:
+        writer = csv.writer(f)
+        writer.writerow(["point"] + SETTINGS_COLUMNS + ["runs", "mean_remaining_trees", "remaining_trees_ci", "mean_last_frame", "last_frame_ci"])
+        for point in range(len(labels)):
+            writer.writerow([point] + [settings[point][name] for name in SETTINGS_COLUMNS] +
+                            [tree_stats[point].count, tree_stats[point].mean, tree_stats[point].ci_halfwidth(z),
+                             frame_stats[point].mean, frame_stats[point].ci_halfwidth(z)])
+
+
+def main(argv = None):
+    """
+    This function runs the sweep in a spec file from the terminal.
+
+    Args:
+        argv (list): the command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(description = "Run a forest fire sweep from a JSON or TOML spec file and write the results as CSV tables.")
+    parser.add_argument("spec", help = "the sweep spec file")
+    parser.add_argument("--workers", type = int, help = "the number of worker processes, overrides the spec")
+    parser.add_argument("--cache", help = "a result cache file, overrides the spec")
+    parser.add_argument("--quiet", action = "store_true", help = "do not show the progress")
+    parser.add_argument("--schedule", action = "store_true", help = "run the longest runs first, as predicted by a cost model calibrated on a pilot (see the scheduler module)")
+    parser.add_argument("--memory-limit", type = float, help = "with --schedule, the most bytes the runs in progress may be predicted to need")
+    args = parser.parse_args(argv)
+
+    try:
+        spec = load_spec(args.spec)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    #The keys that are not part of the sweep itself, the command line arguments take precedence
+    workers = spec.pop("workers", 1)
+    cache_path = spec.pop("cache", None)
+    stem = os.path.splitext(args.spec)[0]
+    summary_path = spec.pop("summary_path", stem + "_summary.csv")
+    runs_path = spec.pop("runs_path", stem + "_runs.csv")
+    if args.workers:
+        workers = args.workers
+    if args.cache:
+        cache_path = args.cache
+
+    #Catch mistakes in the spec before running anything
+    unknown = set(spec) - set(DEFAULTS) - {"parameter", "values", "light_values", "tree_values"}
+    if unknown:
+        parser.error(f"Unknown keys in sweep spec: {', '.join(sorted(unknown))}")
+    #and the values of every point, so a bad value is not only found by a worker
+    try:
+        sweep_points(spec)
+    except (TypeError, ValueError) as error:
+        parser.error(str(error))
+
+    cache = ResultCache(cache_path) if cache_path else None
+    if args.schedule:
+        #Imported here as only scheduled sweeps need it
+        from scheduler import report, run_scheduled
+        tasks, results, records = run_scheduled(spec, workers, memory_limit = args.memory_limit, cache = cache)
+        print(report(records))
+    else:
+        tasks, results = run_sweep(spec, workers, cache, None if args.quiet else sys.stderr)
+    write_tables(spec, tasks, results, summary_path, runs_path)
+    if cache is not None:
+        cache.close()
+    print(f"Wrote {summary_path} and {runs_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+This module measures how long it takes to import the simulation modules in a fresh python process, and which of the heavy optional
+libraries (matplotlib, cv2, perlin_noise and IPython) each one loads.
+The modules that run simulations without figures should not load any of them, they are only loaded by the functions that draw.
+
+Run it with:
+    python bench_imports.py
+"""
+
+#Importing modules
+import os
+import subprocess
+import sys
+
+#The modules to time, the last few are the libraries the figures need so their cost can be compared
+MODULES = ["grid_updater", "runner", "sweep", "sims", "setup", "checkpoint", "jobs", "batch", "animation",
+           "matplotlib.pyplot", "cv2", "perlin_noise", "IPython.display"]
+HEAVY = ["matplotlib", "cv2", "perlin_noise", "IPython"]
+
+#The code run in each fresh process, it prints the import time and the heavy libraries loaded
+_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(",".join(name for name in {heavy} if name in sys.modules))
+"""
+
+
+def time_import(module, repeats = 3):
+    """
+    This function imports a module in fresh python processes and times it.
+
+    Args:
+        module (str): the module to import
+        repeats (int): the number of processes to time, the fastest is kept
+
+    Returns:
+        seconds (float): the fastest import time
+
+        loaded (list): the heavy libraries loaded by the import
+    """
+    times = []
+    for repeat in range(repeats):
+        output = subprocess.run([sys.executable, "-c", _SCRIPT.format(module = module, heavy = HEAVY)],
+                                capture_output = True, text = True, check = True,
+                                cwd = os.path.dirname(os.path.abspath(__file__))).stdout.split("\n")
+        times.append(float(output[0]))
+    return min(times), [name for name in output[1].split(",") if name]
+
+
+def main():
+    for module in MODULES:
+        seconds, loaded = time_import(module)
+        print(f"{module:20s} {seconds * 1000:7.1f} ms  loads: {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
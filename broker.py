@@ -0,0 +1,352 @@
+"""
+This module spreads the runs of a sweep (see the sweep module) over several machines. A broker holds the runs of the sweep and hands them out
+over TCP to workers, which run them with sweep.run_task and send back the results. Workers can join and leave at any time.
+
+Each run handed out is leased to its worker for a number of seconds. A worker that takes longer sends a heartbeat to extend the lease, and the
+runs of a worker whose lease runs out (because it died or lost its connection) are put back in the queue for another worker. If both results
+of a run come back, the first one is kept. A seeded run gives the same result whichever worker runs it, so the results do not depend on which
+workers took part.
+
+The broker and workers talk in lines of JSON, one message and one reply per line:
+    {"type": "get", "worker": name}                          -> {"type": "task", "task": number, "settings", "seed", "replicate", "options", "lease"},
+                                                                {"type": "wait", "retry": seconds} if every run is leased, or {"type": "done"}
+    {"type": "heartbeat", "worker": name, "task": number}    -> {"type": "ok"}, or {"type": "lost"} if the run is no longer leased to the worker
+    {"type": "result", "worker": name, "task": number,
+     "remaining_trees", "last_frame"}                        -> {"type": "ok"}
+
+Run a sweep spec file (see the batch module) on a broker, writing the same CSV tables as batch.py:
+    python broker.py serve spec.toml --port 5000
+and start workers on any machine that can reach it:
+    python broker.py work broker-host:5000 --cache worker_cache.sqlite
+"""
+
+#Importing modules
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+import numpy as np
+from result_cache import ResultCache
+from sweep import DEFAULTS, run_sweep_task, sweep_tasks, task_key
+
+
+def _encode(message):
+    # numpy numbers in the settings are sent as python numbers
+    return (json.dumps(message, default = lambda value: value.item() if isinstance(value, np.generic) else value.tolist()) + "\n").encode()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # answers the messages of one worker connection, one line at a time
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = self.server.broker.handle(json.loads(line))
+            except (ValueError, KeyError, TypeError) as error:
+                reply = {"type": "error", "error": repr(error)}
+            self.wfile.write(_encode(reply))
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Broker:
+    def __init__(self, spec, host = "127.0.0.1", port = 0, lease = 60.0, retry = 0.5):
+        """
+        This makes a broker for the runs of a sweep. It does not accept workers until start is called.
+
+        Args:
+            spec (dict): the sweep spec, see the sweep module
+            host (str): the address to listen on, "0.0.0.0" for every network interface
+            port (int): the port to listen on, 0 for any free port (see address)
+            lease (float): the number of seconds a worker has to finish a run, or send a heartbeat, before the run is handed to another worker
+            retry (float): the number of seconds a worker is told to wait when every run left is leased
+
+        Raises:
+            ValueError: if the spec is not valid (see sweep.sweep_points) or the lease is not positive
+        """
+        if lease <= 0:
+            raise ValueError("Lease must be positive!")
+        self.spec = spec
+        self.tasks = sweep_tasks(spec)
+        self.results = [None] * len(self.tasks)
+        self.lease = lease
+        self.retry = retry
+        # the runs waiting to be handed out, and the (worker, deadline) of each run that is leased
+        self._queue = list(range(len(self.tasks)))
+        self._leases = {}
+        self._done = 0
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        if not self.tasks:
+            self._finished.set()
+        # the number of runs each worker has finished, and the runs that were handed out again after their lease ran out
+        self.workers = {}
+        self.requeued = 0
+        self._server = _Server((host, port), _Handler, bind_and_activate = False)
+        self._server.broker = self
+        self._thread = None
+
+    @property
+    def address(self):
+        """
+        The (host, port) the broker listens on, with the port that was picked if port 0 was asked for.
+        """
+        return self._server.server_address[:2]
+
+    def start(self):
+        """
+        This function starts listening for workers in a background thread.
+
+        Returns:
+            (tuple): the (host, port) the broker listens on
+        """
+        self._server.server_bind()
+        self._server.server_activate()
+        self._thread = threading.Thread(target = self._server.serve_forever, daemon = True)
+        self._thread.start()
+        return self.address
+
+    def close(self):
+        """
+        This function stops listening for workers. Workers still connected are told the sweep is done the next time they ask for a run.
+        """
+        self._finished.set()
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+
+    def wait(self, timeout = None):
+        """
+        This function waits until every run of the sweep has a result.
+
+        Args:
+            timeout (float): the most seconds to wait, None to wait for as long as it takes
+
+        Returns:
+            (boolean): true if every run has a result
+        """
+        self._finished.wait(timeout)
+        return self._done == len(self.tasks)
+
+    def progress(self):
+        """
+        This function returns the progress of the sweep.
+
+        Returns:
+            (tuple): the number of runs with a result, the number leased to workers and the total number of runs
+        """
+        with self._lock:
+            return self._done, len(self._leases), len(self.tasks)
+
+    def handle(self, message):
+        """
+        This function answers a message from a worker, see the top of this module.
+
+        Args:
+            message (dict): the message
+
+        Returns:
+            (dict): the reply
+
+        Raises:
+            ValueError: if the type of the message is not known, or its task is not a run of the sweep
+        """
+        with self._lock:
+            self._expire()
+            worker = message["worker"]
+            if message["type"] == "get":
+                return self._hand_out(worker)
+            if message["type"] in ("heartbeat", "result"):
+                task = message["task"]
+                #The task comes from the network, so it is checked before it is used as an index
+                if type(task) is not int or not 0 <= task < len(self.tasks):
+                    raise ValueError(f"Unknown task {task!r}!")
+            if message["type"] == "heartbeat":
+                if self._leases.get(task, (None,))[0] != worker:
+                    return {"type": "lost"}
+                self._leases[task] = (worker, time.monotonic() + self.lease)
+                return {"type": "ok"}
+            if message["type"] == "result":
+                self._record(worker, task, float(message["remaining_trees"]), int(message["last_frame"]))
+                return {"type": "ok"}
+        raise ValueError(f"Unknown message type {message['type']}!")
+
+    def _expire(self):
+        # put the runs whose lease has run out back at the front of the queue
+        now = time.monotonic()
+        for task, (worker, deadline) in list(self._leases.items()):
+            if deadline < now:
+                del self._leases[task]
+                self._queue.insert(0, task)
+                self.requeued += 1
+
+    def _hand_out(self, worker):
+        self.workers.setdefault(worker, 0)
+        if self._done == len(self.tasks) or self._finished.is_set():
+            return {"type": "done"}
+        if not self._queue:
+            return {"type": "wait", "retry": self.retry}
+        task = self._queue.pop(0)
+        self._leases[task] = (worker, time.monotonic() + self.lease)
+        return dict(self.tasks[task], type = "task", task = task, lease = self.lease)
+
+    def _record(self, worker, task, remaining_trees, last_frame):
+        # a run can come back twice if its lease ran out while it was still running, only the first result is kept
+        self._leases.pop(task, None)
+        if task in self._queue:
+            self._queue.remove(task)
+        if self.results[task] is not None:
+            return
+        self.results[task] = (remaining_trees, last_frame)
+        self.workers[worker] = self.workers.get(worker, 0) + 1
+        self._done += 1
+        if self._done == len(self.tasks):
+            self._finished.set()
+
+
+def run_worker(address, name = None, cache = None, max_tasks = None):
+    """
+    This function runs the runs handed out by a broker until the sweep is done, the broker goes away or max_tasks runs are done.
+    A heartbeat is sent halfway through each lease while a run is running, so long runs keep their lease.
+
+    Args:
+        address (tuple): the (host, port) of the broker
+        name (str): the name of the worker, defaults to the host name and process id
+        cache (ResultCache): if given, seeded runs are taken from and added to the cache
+        max_tasks (int): the most runs to do before leaving, None for no limit
+
+    Returns:
+        (int): the number of runs done
+    """
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    done = 0
+    with socket.create_connection(address) as connection, connection.makefile("rwb") as stream:
+        lock = threading.Lock()
+
+        def send(message):
+            # the heartbeat thread and the main loop share the connection, so each message and its reply are sent together
+            with lock:
+                stream.write(_encode(dict(message, worker = name)))
+                stream.flush()
+                line = stream.readline()
+            if not line:
+                raise ConnectionError("The broker closed the connection!")
+            return json.loads(line)
+
+        while max_tasks is None or done < max_tasks:
+            try:
+                reply = send({"type": "get"})
+            except (ConnectionError, OSError):
+                break
+            if reply["type"] == "done":
+                break
+            if reply["type"] == "wait":
+                time.sleep(reply["retry"])
+                continue
+
+            # send heartbeats while the run is running
+            running = threading.Event()
+            def heartbeat(task = reply["task"], interval = reply["lease"] / 2):
+                while not running.wait(interval):
+                    try:
+                        send({"type": "heartbeat", "task": task})
+                    except (ConnectionError, OSError):
+                        return
+            beat = threading.Thread(target = heartbeat, daemon = True)
+            beat.start()
+            try:
+                remaining_trees, last_frame = _run(reply, cache)
+            finally:
+                running.set()
+                beat.join()
+
+            try:
+                send({"type": "result", "task": reply["task"], "remaining_trees": float(remaining_trees), "last_frame": int(last_frame)})
+            except (ConnectionError, OSError):
+                break
+            done += 1
+    return done
+
+
+def _run(task, cache):
+    # run a task handed out by the broker, looking it up in the cache first if it is seeded
+    key = task_key(task) if cache is not None else None
+    if key is not None:
+        result = cache.get(key)
+        if result is not None:
+            return result
+    result = run_sweep_task(task)
+    if key is not None:
+        cache.put(key, *result)
+    return result
+
+
+def main(argv = None):
+    """
+    This function runs a broker or a worker from the terminal.
+
+    Args:
+        argv (list): the command line arguments, defaults to sys.argv
+    """
+    #Imported here as only the broker writes the tables
+    from batch import load_spec, write_tables
+
+    parser = argparse.ArgumentParser(description = "Spread a forest fire sweep over several machines.")
+    commands = parser.add_subparsers(dest = "command", required = True)
+    serve = commands.add_parser("serve", help = "hand out the runs of a sweep spec file and write the results as CSV tables")
+    serve.add_argument("spec", help = "the sweep spec file")
+    serve.add_argument("--host", default = "0.0.0.0", help = "the address to listen on")
+    serve.add_argument("--port", type = int, default = 5000, help = "the port to listen on")
+    serve.add_argument("--lease", type = float, default = 60.0, help = "the seconds a worker has to finish a run or send a heartbeat")
+    work = commands.add_parser("work", help = "run the runs handed out by a broker")
+    work.add_argument("address", help = "the HOST:PORT of the broker")
+    work.add_argument("--cache", help = "a result cache file")
+    args = parser.parse_args(argv)
+
+    if args.command == "work":
+        host, port = args.address.rsplit(":", 1)
+        cache = ResultCache(args.cache) if args.cache else None
+        done = run_worker((host, int(port)), cache = cache)
+        if cache is not None:
+            cache.close()
+        print(f"Did {done} runs")
+        return
+
+    try:
+        spec = load_spec(args.spec)
+    except ValueError as error:
+        serve.error(str(error))
+    #The keys only batch.py uses are not part of the sweep
+    stem = os.path.splitext(args.spec)[0]
+    summary_path = spec.pop("summary_path", stem + "_summary.csv")
+    runs_path = spec.pop("runs_path", stem + "_runs.csv")
+    spec.pop("workers", None)
+    spec.pop("cache", None)
+    unknown = set(spec) - set(DEFAULTS) - {"parameter", "values", "light_values", "tree_values"}
+    if unknown:
+        serve.error(f"Unknown keys in sweep spec: {', '.join(sorted(unknown))}")
+
+    broker = Broker(spec, args.host, args.port, args.lease)
+    print(f"Listening on {broker.start()}")
+    try:
+        while not broker.wait(1):
+            done, leased, total = broker.progress()
+            sys.stderr.write(f"\r{done}/{total} runs, {leased} running on {len(broker.workers)} workers")
+            sys.stderr.flush()
+    finally:
+        broker.close()
+    sys.stderr.write("\n")
+    write_tables(spec, broker.tasks, broker.results, summary_path, runs_path)
+    print(f"Wrote {summary_path} and {runs_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+This module saves and loads checkpoints of a simulation run by the runner module, so that a long run can be stopped and carried on later, or
+recovered after a crash. A checkpoint holds the grid, the state of the random number generators, the weather, the proportions recorded so far,
+the totals of each cell and the first_time and last_frame variables, so a resumed run carries on exactly as if it had never been stopped.
+Checkpoints are written to a temporary file which then replaces the old checkpoint, so a crash while writing never leaves a broken checkpoint.
+"""
+
+#Importing modules
+import json
+import os
+import tempfile
+
+import numpy as np
+import config
+from accumulators import ARRAYS as ACCUMULATOR_ARRAYS, Accumulators
+from metrics import MetricSeries
+from rng_streams import Streams
+from weather import Weather
+
+#The series of proportions in config.py that are saved
+SERIES = ("prop_of_trees", "prop_of_fires", "prop_of_rain")
+
+
+def save_checkpoint(path, grid, next_frame, rain = False):
+    """
+    This function writes a checkpoint of the current simulation.
+    
+    Args:
+        path (str): the file to write the checkpoint to
+        grid (numpy array): the grid the last frame ended on
+        next_frame (int): the number of the next frame to run
+        rain (boolean): If true, the simulation is being run with rain and the weather is saved too
+    """
+    #The variables from config.py that are needed to carry on the simulation
+    state = {
+        "next_frame": next_frame,
+        "rain": rain,
+        "frame": config.frame,
+        "last_frame": config.last_frame,
+        "first_time": config.first_time,
+        "GRID_HEIGHT": config.GRID_HEIGHT,
+        "GRID_WIDTH": config.GRID_WIDTH,
+        "lightning": config.lightning,
+        "tree_growth": config.tree_growth,
+        "istate": config.istate,
+        "index": None if config.index is None else [int(i) for i in config.index],
+        "cloud_th": config.cloud_th,
+        "instant_burn": config.instant_burn,
+        "spread_prob": None if config.spread_prob is None else np.asarray(config.spread_prob, dtype = float).tolist(),
+        "wind_bias": config.wind_bias,
+        "wind": None if config.wind is None else np.asarray(config.wind).tolist(),
+        "model_version": config.MODEL_VERSION,
+        "rng_state": config.rng.bit_generator.state,
+        #The keyed streams have no state, only their seed and replica
+        "streams": None if config.streams is None else [config.streams.seed, config.streams.replica],
+        "cluster_every": config.cluster_every,
+        #The cluster histograms are arrays, so they are stored as lists
+        "cluster_history": [{name: ([h.tolist() for h in value] if name.endswith("histogram") else value) for name, value in summary.items()}
+                            for summary in config.cluster_history],
+    }
+    
+    #The arrays are stored as they are, without compression, so writing a checkpoint is quick
+    arrays = {
+        "grid": grid,
+    }
+    
+    #The arrays of each series of proportions are stored as arrays, the rest of the series with the other variables
+    for name in SERIES:
+        series_state = getattr(config, name).get_state()
+        for part in ("values", "mins", "maxs", "counts"):
+            if part in series_state:
+                arrays[name + "_" + part] = series_state.pop(part)
+        state[name] = series_state
+    if config.susceptibility is not None:
+        arrays["susceptibility"] = config.susceptibility
+    
+    #The totals of each cell are arrays too, their number of frames is stored with the other variables
+    state["accumulators"] = None
+    if config.accumulators is not None:
+        accumulators_state = config.accumulators.get_state()
+        state["accumulators"] = accumulators_state.pop("frames")
+        arrays.update({"accumulators_" + name: value for name, value in accumulators_state.items()})
+    
+    #With rain, the rain cloud grid is stored as an array and the rest of the weather with the other variables
+    if rain:
+        weather_state = config.weather.get_state()
+        arrays["rain_noise"] = weather_state.pop("rain_noise")
+        arrays["wind"] = weather_state.pop("wind")
+        #The weather is usually given config.rng, in which case it has to share it again when it is loaded
+        weather_state["shares_rng"] = config.weather.rng is config.rng
+        state["weather"] = weather_state
+    
+    #Write to a temporary file in the same folder, then replace the old checkpoint with it in one step
+    folder = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir = folder, suffix = ".tmp")
+    try:
+        with os.fdopen(handle, "wb") as f:
+            #Some generator states (e.g. Philox's, used by the keyed streams) hold numpy arrays, they are written as lists
+            np.savez(f, state = json.dumps(state, default = lambda value: value.tolist()), **arrays)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def load_checkpoint(path):
+    """
+    This function loads a checkpoint and puts the simulation back into config.py.
+    
+    Args:
+        path (str): the checkpoint file
+        
+    Returns:
+        grid (numpy array): the grid the checkpointed frame ended on
+        
+        next_frame (int): the number of the next frame to run
+        
+        rain (boolean): if the simulation is being run with rain
+        
+    Raises:
+        ValueError: if the checkpoint was written by a different version of the model
+    """
+    with np.load(path) as data:
+        state = json.loads(str(data["state"]))
+        arrays = {name: data[name] for name in data.files if name != "state"}
+    
+    #A checkpoint from a different version of the model would not carry on the same way
+    if state["model_version"] != config.MODEL_VERSION:
+        raise ValueError("Checkpoint was written by a different model version!")
+    
+    #Put the variables back into config.py
+    config.frame = state["frame"]
+    config.last_frame = state["last_frame"]
+    config.first_time = state["first_time"]
+    config.GRID_HEIGHT = state["GRID_HEIGHT"]
+    config.GRID_WIDTH = state["GRID_WIDTH"]
+    config.lightning = state["lightning"]
+    config.tree_growth = state["tree_growth"]
+    config.istate = state["istate"]
+    config.index = state["index"]
+    config.cloud_th = state["cloud_th"]
+    config.instant_burn = state["instant_burn"]
+    config.spread_prob = state["spread_prob"]
+    config.wind_bias = state["wind_bias"]
+    config.wind = state["wind"]
+    config.susceptibility = arrays.get("susceptibility")
+    #Older checkpoints did not keep the totals of each cell
+    config.accumulators = None
+    if state.get("accumulators") is not None:
+        config.accumulators = Accumulators.from_state(dict({name: arrays["accumulators_" + name] for name in ACCUMULATOR_ARRAYS}, frames = state["accumulators"]))
+    for name in SERIES:
+        #Older checkpoints stored every frame of the series as one array
+        if name not in state:
+            setattr(config, name, MetricSeries.from_state({"mode": "grow", "capacity": None, "count": len(arrays[name]), "width": 1,
+                                                           "last": arrays[name][-1] if len(arrays[name]) else np.nan, "values": arrays[name]}))
+            continue
+        series_state = state[name]
+        for part in ("values", "mins", "maxs", "counts"):
+            if name + "_" + part in arrays:
+                series_state[part] = arrays[name + "_" + part]
+        setattr(config, name, MetricSeries.from_state(series_state))
+    config.cluster_every = state["cluster_every"]
+    config.cluster_history = [{name: (tuple(np.array(h) for h in value) if name.endswith("histogram") else value) for name, value in summary.items()}
+                              for summary in state["cluster_history"]]
+    
+    #The random number generator carries on from exactly where it was
+    rng_state = state["rng_state"]
+    config.rng = np.random.Generator(getattr(np.random, rng_state["bit_generator"])())
+    config.rng.bit_generator.state = rng_state
+    
+    config.streams = None if state["streams"] is None else Streams(*state["streams"])
+    
+    #Rebuild the weather without generating the rain clouds again
+    if state["rain"]:
+        weather_state = state["weather"]
+        weather_state["rain_noise"] = arrays["rain_noise"]
+        weather_state["wind"] = arrays["wind"]
+        config.weather = Weather.from_state(weather_state)
+        if weather_state["shares_rng"]:
+            config.weather.rng = config.rng
+    else:
+        config.weather = None
+    
+    return arrays["grid"], state["next_frame"], state["rain"]
+
+
+def resume(path, end_frame = None, checkpoint_every = None):
+    """
+    This function loads a checkpoint and carries on the simulation, writing new checkpoints to the same file.
+    
+    Args:
+        path (str): the checkpoint file
+        end_frame (int): the number of the frame to stop at, defaults to the frame number of the checkpointed simulation
+        checkpoint_every (int): the number of frames between checkpoints, no more checkpoints are written if it is not given
+        
+    Returns:
+        (numpy array): the grid at the end of the last frame
+    """
+    #Imported here as the runner module uses this module to write its checkpoints
+    from runner import advance
+    
+    grid, next_frame, rain = load_checkpoint(path)
+    if end_frame is None:
+        end_frame = config.frame
+    
+    return advance(grid, next_frame, end_frame, rain, path if checkpoint_every else None, checkpoint_every)
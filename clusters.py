@@ -0,0 +1,287 @@
+"""
+This module finds the clusters (connected patches) of cells in the same state, e.g. patches of trees or fire fronts, using the Hoshen-Kopelman
+algorithm. Cells are connected to all 8 of their neighbours, the same neighbourhood spread_fire uses.
+The grid is scanned one row at a time. Each row is split into runs of neighbouring cells in the state, and each run is joined (with union-find)
+to the runs it touches in the row above, and the work is done with numpy on whole rows instead of cell by cell. When only the sizes are needed
+(cluster_sizes and cluster_summary), after each row the clusters that do not reach it are finished and their labels are dropped, so the memory
+used grows with the width of the grid instead of its number of cells like a flood fill's does. label_clusters keeps the labels of every run
+to label the grid, so its memory grows with the number of runs in the grid, as well as the grid of labels it returns.
+The cluster sizes can be recorded during a simulation every config.cluster_every frames (see update_grid).
+"""
+
+#Importing modules
+import config
+import numpy as np
+
+
+class _UnionFind:
+    def __init__(self):
+        # the parent of each label, a label is a root when it is its own parent
+        self.parent = np.zeros(0, dtype = np.int64)
+        # the number of cells added to each label while it was a root
+        self.size = np.zeros(0, dtype = np.int64)
+        # the number of labels used so far
+        self.count = 0
+
+    def new_labels(self, n):
+        """
+        This function makes n new labels, each in a cluster of its own.
+
+        Args:
+            n (int): the number of labels to make
+
+        Returns:
+            (numpy array): the new labels
+        """
+        # grow the arrays by doubling so adding labels row by row is cheap
+        if self.count + n > self.parent.size:
+            capacity = max(2 * self.parent.size, self.count + n, 64)
+            self.parent = np.concatenate((self.parent, np.zeros(capacity - self.parent.size, dtype = np.int64)))
+            self.size = np.concatenate((self.size, np.zeros(capacity - self.size.size, dtype = np.int64)))
+        labels = np.arange(self.count, self.count + n)
+        self.parent[labels] = labels
+        self.count += n
+        return labels
+
+    def find(self, labels):
+        """
+        This function finds the root label of each label, and points the labels straight at their roots to speed up later searches.
+
+        Args:
+            labels (numpy array): the labels to look up
+
+        Returns:
+            (numpy array): the root of each label
+        """
+        roots = self.parent[labels]
+        # keep following parents until every label has reached its root
+        while True:
+            next_roots = self.parent[roots]
+            if np.array_equal(next_roots, roots):
+                break
+            roots = next_roots
+        self.parent[labels] = roots
+        return roots
+
+    def union(self, a, b):
+        """
+        This function joins the cluster of each label in a with the cluster of the label at the same place in b.
+        Each root is pointed at a smaller root, repeating until every pair has the same root, so whole rows of pairs are joined at once.
+
+        Args:
+            a (numpy array): labels
+            b (numpy array): labels to join them with
+        """
+        while True:
+            root_a = self.find(a)
+            root_b = self.find(b)
+            apart = root_a != root_b
+            if not apart.any():
+                break
+            # point the larger root of each pair at the smaller, when a root is in several pairs it is pointed at the smallest
+            np.minimum.at(self.parent, np.maximum(root_a[apart], root_b[apart]), np.minimum(root_a[apart], root_b[apart]))
+
+    def sizes(self):
+        """
+        This function adds up the number of cells in each cluster.
+
+        Returns:
+            (numpy array): the number of cells in each cluster
+        """
+        labels = np.arange(self.count)
+        # cells were added to whichever label was the root at the time, so add each label's cells to its final root
+        totals = np.bincount(self.find(labels), weights = self.size[:self.count], minlength = self.count)
+        return totals[self.parent[:self.count] == labels].astype(np.int64)
+
+    def keep(self, roots):
+        """
+        This function finishes every cluster that is not in roots and starts the labels again from 0 with only the clusters in roots, so the
+        number of labels stays at most the number of runs in a row.
+
+        Args:
+            roots (numpy array): the root label of each run of the current row
+
+        Returns:
+            labels (numpy array): the new label of each run of the current row
+
+            finished (numpy array): the number of cells in each cluster that was finished
+        """
+        labels = np.arange(self.count)
+        totals = np.bincount(self.find(labels), weights = self.size[:self.count], minlength = self.count).astype(np.int64)
+        live = np.zeros(self.count, dtype = bool)
+        live[roots] = True
+        finished = totals[(self.parent[:self.count] == labels) & ~live]
+
+        # the kept clusters become the labels 0 to their number - 1, each a root holding all of its cells
+        kept, new_labels = np.unique(roots, return_inverse = True)
+        self.parent = np.arange(kept.size, dtype = np.int64)
+        self.size = totals[kept]
+        self.count = kept.size
+        return new_labels.reshape(-1), finished
+
+
+def _runs(row):
+    """
+    This function finds the runs of True values in a row.
+
+    Args:
+        row (numpy array): a 1D array of booleans
+
+    Returns:
+        starts (numpy array): the index of the first cell of each run
+
+        ends (numpy array): the index of the last cell of each run
+    """
+    # the edges of the runs are where the row changes from False to True and back
+    edges = np.diff(np.concatenate(([0], row.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+
+def _scan(grid, state, keep_rows = False):
+    """
+    This function scans the grid row by row and joins the runs of cells in the state into clusters.
+
+    Args:
+        grid (numpy array): the grid to scan
+        state (int): the state of the cells in the clusters (e.g. config.TREE or config.FIRE)
+        keep_rows (boolean): if true, also return the runs and labels of every row so the grid can be labelled, otherwise the clusters that
+                             do not reach a row are finished after it and their labels dropped
+
+    Returns:
+        clusters (_UnionFind): the clusters of the runs, if not keep_rows only those that reach the last row
+
+        rows (list): if keep_rows, a (starts, ends, labels) tuple for each row, otherwise empty
+
+        finished (list): if not keep_rows, an array of the sizes of the clusters finished after each row, otherwise empty
+    """
+    clusters = _UnionFind()
+    rows = []
+    finished = []
+
+    # the runs of the previous row and the root label of each
+    prev_starts = prev_ends = prev_roots = np.zeros(0, dtype = np.int64)
+
+    for y in range(grid.shape[0]):
+        starts, ends = _runs(grid[y] == state)
+
+        # with 8 neighbours a run touches the runs of the row above that overlap it or its diagonals, so those that end at or after
+        # start - 1 and start at or before end + 1. As the runs are in order, these are a block of neighbouring runs
+        first = np.searchsorted(prev_ends, starts - 1, side = "left")
+        last = np.searchsorted(prev_starts, ends + 1, side = "right")
+        touching = np.maximum(last - first, 0)
+
+        # runs that touch no run above start a new cluster, the others join the cluster of the first run they touch
+        labels = np.empty(starts.size, dtype = np.int64)
+        alone = touching == 0
+        labels[alone] = clusters.new_labels(int(alone.sum()))
+        labels[~alone] = prev_roots[first[~alone]]
+
+        # runs touching more than one run above join those clusters together. Each of these runs is paired with every run it touches
+        # after the first
+        extra = np.maximum(touching - 1, 0)
+        if extra.any():
+            runs = np.repeat(np.arange(starts.size), extra)
+            offsets = np.arange(runs.size) - np.repeat(np.cumsum(extra) - extra, extra)
+            clusters.union(labels[runs], prev_roots[first[runs] + 1 + offsets])
+
+        # add the cells of each run to its cluster
+        labels = clusters.find(labels)
+        np.add.at(clusters.size, labels, ends - starts + 1)
+
+        if keep_rows:
+            rows.append((starts, ends, labels))
+        else:
+            labels, done = clusters.keep(labels)
+            finished.append(done)
+        prev_starts, prev_ends, prev_roots = starts, ends, labels
+
+    return clusters, rows, finished
+
+
+def cluster_sizes(grid, state = config.TREE):
+    """
+    This function finds the size of every cluster of cells in the state.
+
+    Args:
+        grid (numpy array): the grid to look for clusters in
+        state (int): the state of the cells in the clusters, defaults to trees
+
+    Returns:
+        (numpy array): the number of cells in each cluster
+    """
+    clusters, rows, finished = _scan(grid, state)
+    # the clusters that reach the last row were never finished
+    return np.concatenate(finished + [clusters.sizes()])
+
+
+def label_clusters(grid, state = config.TREE):
+    """
+    This function labels every cell by the cluster it is in. Unlike cluster_sizes this keeps a label for every cell.
+
+    Args:
+        grid (numpy array): the grid to look for clusters in
+        state (int): the state of the cells in the clusters, defaults to trees
+
+    Returns:
+        (numpy array): a grid of cluster labels, cells that are not in the state are labelled -1
+    """
+    clusters, rows, finished = _scan(grid, state, keep_rows = True)
+    labelled = np.full(grid.shape, -1, dtype = np.int64)
+
+    for y, (starts, ends, labels) in enumerate(rows):
+        # clusters may have been joined after the row was scanned, so look up the final root of each run
+        labels = clusters.find(labels)
+        # the cells in the state in this row are the cells of the runs in order, so each run's label is repeated once per cell
+        labelled[y, grid[y] == state] = np.repeat(labels, ends - starts + 1)
+
+    return labelled
+
+
+def size_histogram(sizes):
+    """
+    This function counts the number of clusters of each size.
+
+    Args:
+        sizes (numpy array): the cluster sizes from cluster_sizes
+
+    Returns:
+        sizes (numpy array): each cluster size that appears, smallest first
+
+        counts (numpy array): the number of clusters of each size
+    """
+    return np.unique(sizes, return_counts = True)
+
+
+def largest_cluster_fraction(sizes, grid_size):
+    """
+    This function finds the proportion of the grid covered by the largest cluster.
+
+    Args:
+        sizes (numpy array): the cluster sizes from cluster_sizes
+        grid_size (int): the number of cells in the grid
+
+    Returns:
+        (float): the size of the largest cluster divided by the number of cells, 0 if there are no clusters
+    """
+    if sizes.size == 0:
+        return 0.0
+    return sizes.max() / grid_size
+
+
+def cluster_summary(grid, frame_num):
+    """
+    This function measures the tree and fire clusters of a frame, it is what update_grid records every config.cluster_every frames.
+
+    Args:
+        grid (numpy array): the grid of the frame
+        frame_num (int): the frame number
+
+    Returns:
+        (dict): the frame number, and the cluster size histogram and largest cluster fraction of the trees and of the fires
+    """
+    summary = {"frame": frame_num}
+    for name, state in (("tree", config.TREE), ("fire", config.FIRE)):
+        sizes = cluster_sizes(grid, state)
+        summary[name + "_histogram"] = size_histogram(sizes)
+        summary[name + "_largest_fraction"] = largest_cluster_fraction(sizes, grid.size)
+    return summary
@@ -1,4 +1,5 @@
 from numpy.random import default_rng
+from metrics import MetricSeries
 
 ########## Variables ##############
 
@@ -29,20 +30,60 @@ TREE = 0
 FIRE = 1
 BURNT = 2
 
+# Boolean variable for the instant burn mode, where lightning burns the whole cluster of trees it strikes in one frame instead of the fire
+# spreading one ring of neighbours per frame
+instant_burn = False
+
+# Probability of the fire spreading to a tree in each direction, in the order of grid_updater.NEIGHBOURHOOD, or one probability for every
+# direction. None for the fire to spread to every neighbouring tree for certain
+spread_prob = None
+# Grid of how likely each cell is to catch fire from a burning neighbour (between 0 and 1, e.g. from its fuel), None for every cell the same
+susceptibility = None
+# How strongly the wind makes the fire spread with it rather than against it, 0 for no effect (see grid_updater.spread_probabilities)
+wind_bias = 0.0
+# The (rows, columns) direction of the wind, None to use the direction the rain clouds move in, or no wind without rain
+wind = None
+
 # Boolean variable to record the first burn out event
 first_time = True
 
 # Random number generator
 rng = default_rng()
+# Counter-based random numbers keyed by (seed, replica) (an rng_streams.Streams), used instead of rng by the update grid functions when set,
+# so each cell's random numbers do not depend on the order they are drawn in
+streams = None
+
+# Version of the model rules, stored with cached simulation results. Increase this whenever a change to the model changes its results
+# so that old cached results are not reused
+MODEL_VERSION = 2
+
+# How the proportions below are stored: "grow" keeps every frame, "ring" only the last metrics_capacity frames and "downsample" the whole
+# run in metrics_capacity buckets (see the metrics module). Like rng, these are not reset between runs
+metrics_mode = "grow"
+metrics_capacity = None
 
-# Lists to store the proportions of trees and fires relative to grid size in each frame for plotting purposes
-prop_of_trees = []
-prop_of_fires = []
-prop_of_rain = []
+# Series to store the proportions of trees and fires relative to grid size in each frame for plotting purposes
+prop_of_trees = MetricSeries()
+prop_of_fires = MetricSeries()
+prop_of_rain = MetricSeries()
+
+# Record the tree and fire cluster sizes every cluster_every frames (see the clusters module), None to not record them
+cluster_every = None
+# List to store the cluster summaries that have been recorded
+cluster_history = []
+
+# The totals of each cell, e.g. how many times it burnt (see the accumulators module), None to not keep them
+accumulators = None
 
 #Frame Number
 frame = 100
 
+# The number of model steps run for each frame of the animation, and the frame rate to tune it to (None to keep frame_skip as it is)
+frame_skip = 1
+target_fps = None
+# The number of model steps the animation has run
+model_step = 0
+
 # Frame number of the last frame
 last_frame = frame
 
@@ -5,15 +5,105 @@ This module contains functions that change the grid animation according to rules
 #Importing modules
 import config
 import numpy as np
+from clusters import cluster_summary, label_clusters
+from rng_streams import GROWTH, LIGHTNING, SPREAD
 
-def spread_fire(grid, width, height):
+#Directions to map neighbouring cells, from a burning cell to the cell it spreads to. config.spread_prob is given in this order
+NEIGHBOURHOOD = ((-1,-1), (-1,0), (-1,1), (0,-1), (0, 1), (1,-1), (1,0), (1,1))
+
+def shift(mask, dy, dx):
+    """
+    This function moves a grid of booleans dy rows down and dx columns right. Cells moved in from outside the grid are false.
+    A stack of grids (with the grids in the last two axes, as in the mosaic module) has each grid moved.
+    
+    Args:
+        mask (numpy array): the grid to move
+        dy (int): the number of rows to move it down
+        dx (int): the number of columns to move it right
+        
+    Output:
+        shifted (numpy array): the moved grid
+        
+    Example:
+        >>> shift(np.array([[True, False], [False, False]]), 1, 1)
+        np.array([[False, False], [False, True]])
+    """
+    height, width = mask.shape[-2:]
+    shifted = np.zeros_like(mask)
+    shifted[..., max(dy, 0):height + min(dy, 0), max(dx, 0):width + min(dx, 0)] = mask[..., max(-dy, 0):height + min(-dy, 0), max(-dx, 0):width + min(-dx, 0)]
+    return shifted
+
+def wind_drift():
+    """
+    This function finds the direction the wind pushes the fire in, config.wind if it is set, otherwise the way the rain clouds move.
+    The rain clouds move the opposite way to Weather.wind, as the rain window moves over the rain noise in the direction of the wind.
+    
+    Output:
+        (numpy array): the (rows, columns) direction of the wind, or None if there is no wind
+    """
+    if config.wind is not None:
+        return np.asarray(config.wind, dtype = float)
+    if config.weather is not None:
+        return -np.asarray(config.weather.wind[0], dtype = float)
+    return None
+
+def random_cells(purpose, frame_num, mask = None):
+    """
+    This function draws a random number between 0 and 1 for every cell of the grid, or for the cells in mask. They come from the keyed streams
+    (config.streams) if they are set, so they only depend on the cell, frame and purpose, and otherwise from config.rng.
+    
+    Args:
+        purpose (int): what the numbers are for, one of the purposes of the rng_streams module (e.g. rng_streams.LIGHTNING)
+        frame_num (int): the current frame number
+        mask (numpy array): a grid of booleans, true for the cells that need a number. Defaults to every cell
+        
+    Output:
+        (numpy array): a grid of numbers, or one number for each true cell of mask in row order
+    """
+    shape = (config.GRID_HEIGHT, config.GRID_WIDTH) if mask is None else mask.shape
+    if config.streams is None:
+        if mask is None:
+            return config.rng.random(size = shape[0] * shape[1]).reshape(shape)
+        return config.rng.random(size = int(mask.sum()))
+    
+    if mask is None:
+        return config.streams.uniform(frame_num, purpose, shape)
+    return config.streams.uniform_at(frame_num, purpose, np.flatnonzero(mask))
+
+def spread_probabilities():
+    """
+    This function works out the probability of the fire spreading in each direction of NEIGHBOURHOOD, from config.spread_prob and the wind.
+    Directions with the wind are made more likely and directions against it less likely, by the factor 1 + config.wind_bias * cos(angle to the wind).
+    
+    Output:
+        (numpy array): the probability for each direction, or None if fire spreads to every neighbour for certain
     """
-    This function makes sure the burning cell spreads to all 8 of its neighbours, except when it borders with edges.
+    #Without any of the options the fire spreads for certain, which needs no random numbers
+    if config.spread_prob is None and config.susceptibility is None and (config.wind_bias == 0 or wind_drift() is None):
+        return None
+    
+    probs = np.ones(len(NEIGHBOURHOOD)) * (1.0 if config.spread_prob is None else np.asarray(config.spread_prob, dtype = float))
+    
+    drift = wind_drift()
+    if config.wind_bias != 0 and drift is not None and drift.any():
+        directions = np.array(NEIGHBOURHOOD, dtype = float)
+        cos = directions @ drift / (np.linalg.norm(directions, axis = 1) * np.linalg.norm(drift))
+        probs = np.clip(probs * (1 + config.wind_bias * cos), 0, 1)
+    
+    return probs
+
+def spread_fire(grid, width, height, frame_num = None):
+    """
+    This function spreads the fire from each burning cell to its 8 neighbours, except where it borders with edges, and burns out the burning cells.
+    By default every tree next to a fire catches fire. With config.spread_prob, config.wind_bias or config.susceptibility set, a tree catches fire
+    from each burning neighbour with the probability of that direction (see spread_probabilities) times its own susceptibility.
+    The whole grid is updated at once, one shifted copy of the fires per direction, instead of cell by cell.
     
     Args:
         grid (numpy array) : the grid that the last frame ended on
-        width (int) : the width of the grid
-        height (int): the height of the grid
+        width (int) : the width of the grid, kept for compatibility, the size is taken from the grid
+        height (int): the height of the grid, kept for compatibility, the size is taken from the grid
+        frame_num (int): the current frame number, only needed for the random numbers of the keyed streams (config.streams)
     
     Output:
         grid_copy (numpy array): the new grid ready for the rest of the update grid function. 
@@ -25,30 +115,69 @@ def spread_fire(grid, width, height):
     #make a copy of the previous grid
     grid_copy = grid.copy()
     
-    #Directions to map neighbouring cells
-    neighbourhood = ((-1,-1), (-1,0), (-1,1), (0,-1), (0, 1), (1,-1), (1,0), (1,1))
+    fire = grid == config.FIRE
+    trees = grid == config.TREE
+    probs = spread_probabilities()
     
-    #Iterate over every cell in the grid by rows and columns
-    for x in range(width):
-        for y in range(height):
-            
-            #check if a fire is present
-            if grid[y,x] == config.FIRE:
-                
-                #If fire is present, iterate over its neighbours
-                for (dy,dx) in (neighbourhood):
-                    
-                    #If neighbours are not edges and are trees, change them to be on fire
-                    if (y + dy < height and y + dy >= 0 and x + dx < width and x + dx >= 0 and grid[(y + dy),(x + dx)] == config.TREE):
-                        grid_copy[(y + dy),(x + dx)] = config.FIRE
-                        
-                        
-                # The original cell that is on fire will become burnt
-                grid_copy[y,x] = config.BURNT
+    if probs is None:
+        #Every tree with a burning neighbour in any direction catches fire
+        catches = np.zeros_like(fire)
+        for (dy, dx) in NEIGHBOURHOOD:
+            catches |= shift(fire, dy, dx)
+        catches &= trees
+    else:
+        #The chance each tree does not catch fire from any of its burning neighbours, multiplied up one direction at a time
+        susceptibility = 1.0 if config.susceptibility is None else config.susceptibility
+        escape = np.ones(grid.shape)
+        for p, (dy, dx) in zip(probs, NEIGHBOURHOOD):
+            escape *= np.where(shift(fire, dy, dx), 1 - p * susceptibility, 1)
+        
+        #Random numbers are only drawn for the trees that can catch fire, one each, which is the same as one draw per burning neighbour
+        candidates = trees & (escape < 1)
+        catches = np.zeros_like(fire)
+        catches[candidates] = random_cells(SPREAD, frame_num, candidates) >= escape[candidates]
+    
+    #The trees catch fire and the cells that were on fire burn out
+    grid_copy[catches] = config.FIRE
+    grid_copy[fire] = config.BURNT
                 
     #Return the updated grid
     return grid_copy
 
+def ignite(grid, strikes):
+    """
+    This function sets the trees struck by lightning on fire. In the instant burn mode (config.instant_burn) the whole cluster of trees connected to
+    a struck tree catches fire at once, as in the Drossel-Schwabl limit where fire spreads much faster than trees grow.
+    
+    Args:
+        grid (numpy array): the grid after the fire has spread
+        strikes (numpy array): a grid of booleans, true where a tree is struck by lightning
+        
+    Output:
+        grid (numpy array): the grid with the struck trees (or their clusters) on fire
+        
+    Example:
+        >>> config.instant_burn = True
+        >>> ignite(np.array([[0, 0, 2], [2, 2, 0], [0, 2, 2]]), np.array([[True, False, False], [False, False, False], [False, False, False]]))
+        np.array([[1, 1, 2], [2, 2, 1], [0, 2, 2]])
+    """
+    #Without the instant burn mode only the struck trees catch fire, the fire spreads to their neighbours in the next frames
+    if not config.instant_burn:
+        grid[strikes] = config.FIRE
+        return grid
+    
+    #Labelling the clusters is only needed when lightning has struck a tree
+    if not strikes.any():
+        return grid
+    
+    #Label the tree clusters with the same 8 neighbours fire spreads to, and mark the clusters with a struck tree in them
+    labels = label_clusters(grid, config.TREE)
+    struck = np.zeros(labels.max() + 2, dtype = bool)
+    struck[labels[strikes]] = True
+    #Cells that are not trees are labelled -1, which picks the last (always false) mark
+    grid[struck[labels]] = config.FIRE
+    return grid
+
 #Changes to the grid(e.g. fire, tree growth...)
 def update_grid(grid, frame_num):
     """
@@ -62,25 +191,30 @@ def update_grid(grid, frame_num):
     Output: grid (numpy array): The new grid for this frame
     """
     #Copy the grid from the previous frame to work on and become the new frame.    
+    old_grid = grid
     grid = grid.copy()
     
     #Set the size of the grid to be the height of the grid times the width.
     size = config.GRID_HEIGHT*config.GRID_WIDTH
     
     #Spread the fire to all the neighbours of a cell if it is on fire.
-    grid = spread_fire(grid, config.GRID_HEIGHT, config.GRID_WIDTH)
+    #In the instant burn mode whole clusters burn in the frame they are struck, so the fires of the last frame just burn out.
+    if config.instant_burn:
+        grid[grid == config.FIRE] = config.BURNT
+    else:
+        grid = spread_fire(grid, config.GRID_HEIGHT, config.GRID_WIDTH, frame_num)
     
     #Lightning strike!
     #Calculate random floats between 0 and 1 and compare these to the probability of lightning set in the beginning.
     #This returns a grid of boolean values the same size of the grid.
-    lightning_prob = config.rng.random(size = size).reshape(config.GRID_HEIGHT, config.GRID_WIDTH) > (1-config.lightning)
+    lightning_prob = random_cells(LIGHTNING, frame_num) > (1-config.lightning)
         #If at any point the boolean value is true and in the subsequent space in the grid, there is not an on-fire or burnt-out tree- set it on fire!
-    grid[(lightning_prob == True) & (grid == config.TREE)] = config.FIRE
+    grid = ignite(grid, (lightning_prob == True) & (grid == config.TREE))
     
     #New tree spawns!
     #Calculate random floats between 0 and 1 and compare these to the probability of a new tree growing set in the beginning.
     #This returns a grid of boolean values the same size of the grid.
-    new_tree_prob = config.rng.random(size = size).reshape(config.GRID_HEIGHT, config.GRID_WIDTH) > (1-config.tree_growth) 
+    new_tree_prob = random_cells(GROWTH, frame_num) > (1-config.tree_growth) 
     #If at any point the boolean value is true and in the subsequent space in the grid there is a burnt out tree- grow a new tree!
     grid[(new_tree_prob == True) & (grid == config.BURNT)] = config.TREE
     
@@ -91,6 +225,14 @@ def update_grid(grid, frame_num):
     #Find the proportion of trees that are on fire compared to the size of the grid
     config.prop_of_fires.append(np.sum(grid == 1)/size)
     
+    #Record the sizes of the tree and fire clusters every cluster_every frames if asked to
+    if (config.cluster_every is not None and frame_num % config.cluster_every == 0):
+        config.cluster_history.append(cluster_summary(grid, frame_num))
+    
+    #Add the frame to the totals of each cell if they are being kept
+    if config.accumulators is not None:
+        config.accumulators.update(old_grid, grid, frame_num)
+    
     
     #Stop animation if all cells are burnt
     #Take an average of the status of all the trees (if it is less than 2 some trees must still be alive or on fire)
@@ -121,6 +263,7 @@ def update_grid_with_rain(grid, frame_num):
     Output: grid (numpy array): The new grid for this frame
     """
     #Copy the grid from the previous frame to work on and become the new frame.    
+    old_grid = grid
     grid = grid.copy()
     
     #Set the size of the grid to be the height of the grid times the width.
@@ -137,19 +280,23 @@ def update_grid_with_rain(grid, frame_num):
     new_lightning_prob_arr = config.lightning * (1 - rain_intensity)
     
     #Spread the fire to all the neighbours of a cell if it is on fire.
-    grid = spread_fire(grid, config.GRID_HEIGHT, config.GRID_WIDTH)
+    #In the instant burn mode whole clusters burn in the frame they are struck, so the fires of the last frame just burn out.
+    if config.instant_burn:
+        grid[grid == config.FIRE] = config.BURNT
+    else:
+        grid = spread_fire(grid, config.GRID_HEIGHT, config.GRID_WIDTH, frame_num)
     
     #Lightning strike!
     #Calculate random floats between 0 and 1 and compare these to the probability of lightning set in the beginning.
     #This returns a grid of boolean values the same size of the grid.
-    lightning_prob = config.rng.random(size = size).reshape(config.GRID_HEIGHT, config.GRID_WIDTH) > (1-new_lightning_prob_arr)
+    lightning_prob = random_cells(LIGHTNING, frame_num) > (1-new_lightning_prob_arr)
         #If at any point the boolean value is true and in the subsequent space in the grid, there is not an on-fire or burnt out a tree- set it on fire!
-    grid[(lightning_prob == True) & (grid == config.TREE)] = config.FIRE
+    grid = ignite(grid, (lightning_prob == True) & (grid == config.TREE))
     
     #New tree spawns!
     #Calculate random floats between 0 and 1 and compare these to the probability of a new tree growing set in the beginning.
     #This returns a grid of boolean values the same size of the grid.
-    new_tree_prob = config.rng.random(size = size).reshape(config.GRID_HEIGHT, config.GRID_WIDTH) > (1-new_tree_growth_arr) 
+    new_tree_prob = random_cells(GROWTH, frame_num) > (1-new_tree_growth_arr) 
     #If at any point the boolean value is true and in the subsequent space in the grid, there is a burnt-out tree- grow a new tree!
     grid[(new_tree_prob == True) & (grid == config.BURNT)] = config.TREE
     
@@ -160,6 +307,14 @@ def update_grid_with_rain(grid, frame_num):
     #Find the proportion of trees that are on fire compared to the size of the grid
     config.prop_of_fires.append(np.sum(grid == 1)/size)
     
+    #Record the sizes of the tree and fire clusters every cluster_every frames if asked to
+    if (config.cluster_every is not None and frame_num % config.cluster_every == 0):
+        config.cluster_history.append(cluster_summary(grid, frame_num))
+    
+    #Add the frame to the totals of each cell if they are being kept
+    if config.accumulators is not None:
+        config.accumulators.update(old_grid, grid, frame_num)
+    
     
     
     #Stop animation if all cells are burnt
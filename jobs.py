@@ -0,0 +1,231 @@
+"""
+This module contains the JobManager and Job classes, an asyncio service for running sweeps (see the sweep module) in the background.
+Sweeps are submitted as sweep specs and their runs are done in a pool of worker processes, so a notebook kernel stays free while they run.
+Each job streams its results as they finish, can be cancelled, and jobs with a higher priority have their runs done first.
+
+Example (in a notebook cell, where the kernel's event loop is already running):
+    >>> manager = JobManager(max_workers = 4)
+    >>> job = manager.submit({"parameter": 1, "values": [0.01, 0.02], "times": 5, "seed": 1})
+    >>> async for event in job.events():
+    ...     print(event)
+"""
+
+#Importing modules
+import asyncio
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from running_stats import RunningStats
+from sweep import run_sweep_task, sweep_points, sweep_tasks, task_key
+
+
+class Job:
+    def __init__(self, job_id, spec, priority, tasks, labels):
+        # the number of the job and the spec it was submitted with
+        self.id = job_id
+        self.spec = spec
+        # jobs with a higher priority have their runs started first
+        self.priority = priority
+        # the total number of runs and the number finished so far
+        self.total = len(tasks)
+        self.done = 0
+        # the value of the parameter at each point of the sweep
+        self.labels = labels
+        # the running statistics of the remaining trees and last frame at each point
+        self.tree_stats = [RunningStats() for label in labels]
+        self.frame_stats = [RunningStats() for label in labels]
+        # "queued", "running", "done", "cancelled" or "failed"
+        self.status = "queued"
+        # the events that have not been read yet, and the runs of the job still in the worker pool
+        self._events = asyncio.Queue()
+        self._futures = set()
+        self._finished = asyncio.Event()
+
+    async def events(self):
+        """
+        This function streams the events of the job as they happen, ending after the job finishes, fails or is cancelled.
+        Every event is a dictionary with a "type" and the job "id":
+            "result": one run finished, with its "point", "label", "replicate", "remaining_trees" and "last_frame"
+            "progress": the number of runs "done" out of the "total"
+            "done", "cancelled" or "failed" (with the "error"): the job has ended
+
+        Yields:
+            (dict): the next event
+        """
+        while True:
+            event = await self._events.get()
+            yield event
+            if event["type"] in ("done", "cancelled", "failed"):
+                return
+
+    def cancel(self):
+        """
+        This function cancels the job. Its runs that have not started are dropped, and the results of runs already in progress are ignored.
+        """
+        if self.status in ("done", "cancelled", "failed"):
+            return
+        for future in self._futures:
+            future.cancel()
+        self._end("cancelled")
+
+    async def wait(self):
+        """
+        This function waits until the job has ended.
+
+        Returns:
+            (str): the status the job ended with
+        """
+        await self._finished.wait()
+        return self.status
+
+    def results(self):
+        """
+        This function returns the results of the job so far, in the same form as sims.simulation.
+
+        Returns:
+            mean_remaining_trees (list): the mean remaining trees at each point
+
+            mean_last_frame (list): the mean last frame at each point
+
+            runs (list): the number of runs finished at each point
+        """
+        return ([stats.mean for stats in self.tree_stats], [stats.mean for stats in self.frame_stats],
+                [stats.count for stats in self.tree_stats])
+
+    def _start(self):
+        if self.status == "queued":
+            self.status = "running"
+
+    def _emit(self, event_type, **values):
+        self._events.put_nowait(dict(type = event_type, id = self.id, **values))
+
+    def _record(self, task, remaining_trees, last_frame):
+        # add the run to the statistics of its point and stream it
+        self.tree_stats[task["point"]].update(remaining_trees)
+        self.frame_stats[task["point"]].update(last_frame)
+        self.done += 1
+        self._emit("result", point = task["point"], label = self.labels[task["point"]], replicate = task["replicate"],
+                   remaining_trees = remaining_trees, last_frame = last_frame)
+        self._emit("progress", done = self.done, total = self.total)
+        if self.done == self.total:
+            self._end("done")
+
+    def _end(self, status, **values):
+        self.status = status
+        self._emit(status, **values)
+        self._finished.set()
+
+
+class JobManager:
+    def __init__(self, max_workers = None, executor = None, cache = None):
+        """
+        This makes a job service with an empty queue.
+
+        Args:
+            max_workers (int): the number of runs done at once, defaults to the number of CPUs when the pool is made here
+            executor (Executor): the pool to do the runs in, defaults to a pool of max_workers processes
+            cache (ResultCache): if given, seeded runs are taken from and added to the cache
+
+        Raises:
+            ValueError: if an executor is given without max_workers, as the size of a pool cannot be read from it
+        """
+        if executor is None:
+            max_workers = max_workers or os.cpu_count() or 1
+            executor = ProcessPoolExecutor(max_workers)
+        elif max_workers is None:
+            raise ValueError("max_workers must be given with an executor!")
+        # the pool of worker processes the runs are done in. Each process has its own config module, so runs cannot share a process
+        self.executor = executor
+        # the number of runs sent to the pool at once, the rest wait in the queue so higher priority jobs can go first
+        self.max_workers = max_workers
+        # if given, runs of seeded sweeps are looked up in (and added to) this cache before being sent to a worker
+        self.cache = cache
+        # every job submitted, by its number
+        self.jobs = {}
+        self._queue = asyncio.PriorityQueue()
+        self._order = itertools.count()
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._dispatcher = None
+
+    def submit(self, spec, priority = 0):
+        """
+        This function adds a sweep to the queue.
+
+        Args:
+            spec (dict): the sweep spec, see the sweep module
+            priority (int): jobs with a higher priority have their runs started before jobs with a lower priority
+
+        Returns:
+            (Job): the job, used to stream its events, cancel it or get its results
+
+        Raises:
+            ValueError: if the spec is not valid (see sweep.sweep_points)
+        """
+        labels, settings = sweep_points(spec)
+        tasks = sweep_tasks(spec)
+        job = Job(len(self.jobs), spec, priority, tasks, labels)
+        self.jobs[job.id] = job
+
+        # the queue gives the smallest entry first, so the priority is negated. The order it was added keeps the runs in order
+        for task in tasks:
+            self._queue.put_nowait((-priority, next(self._order), job, task))
+
+        # start sending runs to the worker pool, if it is not already
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+        return job
+
+    async def close(self):
+        """
+        This function cancels every job that has not ended and shuts down the worker pool.
+        """
+        for job in self.jobs.values():
+            job.cancel()
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        self.executor.shutdown(wait = False, cancel_futures = True)
+
+    async def _dispatch(self):
+        # send runs to the pool in priority order, keeping at most max_workers in progress
+        slots = self._slots
+        loop = asyncio.get_running_loop()
+        while not self._queue.empty():
+            priority, order, job, task = await self._queue.get()
+            if job.status in ("cancelled", "failed"):
+                continue
+
+            # runs that are already in the cache are finished straight away
+            key = task_key(task) if self.cache is not None else None
+            if key is not None:
+                result = self.cache.get(key)
+                if result is not None:
+                    job._start()
+                    job._record(task, *result)
+                    continue
+
+            # wait for a free worker, the job may have been cancelled in the meantime
+            await slots.acquire()
+            if job.status in ("cancelled", "failed"):
+                slots.release()
+                continue
+            job._start()
+            future = loop.run_in_executor(self.executor, run_sweep_task, task)
+            job._futures.add(future)
+            future.add_done_callback(lambda future, job = job, task = task, key = key: self._finish(future, job, task, key, slots))
+
+    def _finish(self, future, job, task, key, slots):
+        # a run has finished, free its slot and record its result unless the job has ended
+        slots.release()
+        job._futures.discard(future)
+        if job.status in ("cancelled", "failed") or future.cancelled():
+            return
+        if future.exception() is not None:
+            for other in job._futures:
+                other.cancel()
+            job._end("failed", error = repr(future.exception()))
+            return
+        result = future.result()
+        if key is not None:
+            self.cache.put(key, *result)
+        job._record(task, *result)
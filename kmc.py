@@ -0,0 +1,127 @@
+"""
+This module runs the simulation event by event while there is no fire, instead of frame by frame. With a very low lightning probability most
+frames have no fire in them, and all that happens is that a few trees grow, yet update_grid still draws two random numbers for every cell.
+
+Without fire, every cell is independent: a burnt cell grows a tree with probability tree_growth each frame, and a tree is struck with probability
+lightning each frame from the frame after it grew. So the frame each burnt cell grows a tree in and the frame each tree is struck in are
+geometric, and can be drawn directly. The next fire starts at the earliest strike, and everything up to it (the trees grown and the proportions
+of every frame) follows from the growth frames, in one step. While there is fire the grid is updated frame by frame with update_grid as before.
+The proportions recorded, the last frame and the grids have the same distribution as those of runner.advance, though not the same values for
+the same seed, as the random numbers are drawn differently.
+
+Runs with rain, keyed streams (config.streams), cluster recording (config.cluster_every) or the totals of each cell (config.accumulators) are
+run frame by frame with runner.advance.
+"""
+
+#Importing modules
+import numpy as np
+import config
+from grid_updater import ignite, update_grid
+from runner import advance
+
+
+def supported(rain = False):
+    """
+    This function checks if the simulation in config.py can be run event by event.
+
+    Args:
+        rain (boolean): If true, the simulation is being run with rain
+
+    Returns:
+        (boolean): true if it can
+    """
+    return not rain and config.streams is None and config.cluster_every is None and config.accumulators is None
+
+
+def _first_frames(probability, size, first):
+    # the frame each of size cells first succeeds in, trying once a frame from the frame first, with inf if it never can
+    if probability <= 0:
+        return np.full(size, np.inf)
+    return first + config.rng.geometric(min(probability, 1.0), size) - 1.0
+
+
+def _record(trees, frames, size):
+    # add the proportions of frames with no fire, and the first frame every cell is burnt if it is one of them
+    config.prop_of_trees.extend(trees / size)
+    config.prop_of_fires.extend(np.zeros(len(trees)))
+    burnt_out = np.flatnonzero(trees == 0)
+    if config.first_time and burnt_out.size:
+        config.last_frame = int(frames[burnt_out[0]])
+        config.first_time = False
+
+
+def jump(grid, frame_num, end_frame):
+    """
+    This function runs the frames of a grid with no fire up to and including the frame the next fire starts in, or up to end_frame.
+
+    Args:
+        grid (numpy array): the grid the last frame ended on, with no fire in it
+        frame_num (int): the number of the next frame to run
+        end_frame (int): the number of the frame to stop at
+
+    Returns:
+        grid (numpy array): the grid at the end of the last frame run
+
+        frame_num (int): the number of the next frame to run
+    """
+    size = grid.size
+    trees = (grid == config.TREE).ravel()
+    burnt = np.flatnonzero(~trees)
+
+    # the frame each burnt cell grows a tree in, and the frame each tree is first struck in
+    grown = np.full(size, -np.inf)
+    grown[burnt] = _first_frames(config.tree_growth, burnt.size, frame_num)
+    struck = np.empty(size)
+    struck[trees] = _first_frames(config.lightning, int(trees.sum()), frame_num)
+    struck[burnt] = grown[burnt] + _first_frames(config.lightning, burnt.size, 1)
+
+    # the frame the next fire starts in, if it starts before end_frame
+    fire_frame = struck.min()
+    last = int(min(fire_frame, end_frame - 1))
+
+    # the number of trees at the end of each frame up to the last, from the number of burnt cells that have grown a tree by then
+    frames = np.arange(frame_num, last + 1)
+    growth = grown[burnt]
+    counts = np.bincount((growth[growth <= last] - frame_num).astype(int), minlength = frames.size)
+    tree_counts = int(trees.sum()) + np.cumsum(counts)
+
+    if fire_frame > last:
+        _record(tree_counts, frames, size)
+        return np.where((grown <= last).reshape(grid.shape), config.TREE, config.BURNT), last + 1
+
+    # the frames before the fire, then the fire frame itself: lightning strikes the trees there were at the start of it (with their clusters
+    # in the instant burn mode), then the trees of the frame grow
+    _record(tree_counts[:-1], frames[:-1], size)
+    grid = np.where((grown < last).reshape(grid.shape), config.TREE, config.BURNT)
+    grid = ignite(grid, (struck == fire_frame).reshape(grid.shape))
+    grid[(grown == last).reshape(grid.shape)] = config.TREE
+    config.prop_of_trees.append(np.sum(grid == config.TREE) / size)
+    config.prop_of_fires.append(np.sum(grid == config.FIRE) / size)
+    return grid, last + 1
+
+
+def advance_kmc(grid, start_frame, end_frame, rain = False):
+    """
+    This function updates the grid from start_frame up to (but not including) end_frame like runner.advance, jumping over the frames with no
+    fire in them (see jump). Simulations that cannot be run event by event (see supported) are run frame by frame.
+
+    Args:
+        grid (numpy array): the grid the last frame ended on (or the grid from runner.start)
+        start_frame (int): the number of the first frame to run
+        end_frame (int): the number of the frame to stop at
+        rain (boolean): If true, the grid is updated with the effect of rain
+
+    Returns:
+        (numpy array): the grid at the end of the last frame
+    """
+    if not supported(rain):
+        return advance(grid, start_frame, end_frame, rain)
+
+    frame_num = start_frame
+    while frame_num < end_frame:
+        if (grid == config.FIRE).any():
+            grid = update_grid(grid, frame_num)
+            frame_num += 1
+        else:
+            grid, frame_num = jump(grid, frame_num, end_frame)
+    return grid
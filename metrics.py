@@ -0,0 +1,228 @@
+"""
+This module contains the MetricSeries class, which stores a value per frame (e.g. the proportion of trees) in preallocated numpy arrays
+instead of a growing list of numbers. It is what config.prop_of_trees, prop_of_fires and prop_of_rain are.
+
+A series can be kept in one of three modes, set by config.metrics_mode and config.metrics_capacity before a run (see new_series):
+    "grow": every value is kept, the array doubles in size when it is full
+    "ring": only the last capacity values are kept, the oldest is written over
+    "downsample": the whole run is kept in at most capacity buckets of neighbouring frames, with the mean, min and max of each. When the
+                  buckets are full, neighbouring pairs are merged, so each bucket covers twice as many frames
+With "ring" and "downsample" the memory used and the cost of plotting the series stay the same however many frames are run.
+"""
+
+#Importing modules
+import numpy as np
+
+MODES = ("grow", "ring", "downsample")
+
+
+class MetricSeries:
+    def __init__(self, capacity = None, mode = "grow"):
+        """
+        This makes an empty series.
+
+        Args:
+            capacity (int): the number of values (or buckets) kept with "ring" or "downsample", the starting size of the array with "grow"
+            mode (str): "grow", "ring" or "downsample"
+
+        Raises:
+            ValueError: if the mode is not valid, or the capacity is missing or too small for "ring" or "downsample"
+        """
+        if mode not in MODES:
+            raise ValueError("Invalid mode, only accepts 'grow', 'ring' or 'downsample'!")
+        if mode != "grow" and (capacity is None or capacity < 2):
+            raise ValueError("Capacity must be at least 2 for 'ring' and 'downsample'!")
+
+        self.mode = mode
+        # downsampling merges the buckets in pairs, so it needs an even number of them
+        self.capacity = capacity if mode != "downsample" else capacity - capacity % 2
+        # the number of values added so far, and the newest one
+        self.count = 0
+        self.last = np.nan
+        # the number of values stored, and with "ring" the place of the oldest one
+        self._size = 0
+        self._start = 0
+        # the number of frames in each full bucket with "downsample"
+        self.width = 1
+
+        length = self.capacity if self.capacity else 64
+        self._values = np.zeros(length)
+        if mode == "downsample":
+            self._mins = np.zeros(length)
+            self._maxs = np.zeros(length)
+            self._counts = np.zeros(length, dtype = np.int64)
+
+    def append(self, value):
+        """
+        This function adds the value of the next frame.
+
+        Args:
+            value (float): the value
+        """
+        self.count += 1
+        self.last = value
+
+        if self.mode == "grow":
+            if self._size == self._values.size:
+                self._values = np.concatenate((self._values, np.zeros(self._values.size)))
+            self._values[self._size] = value
+            self._size += 1
+
+        elif self.mode == "ring":
+            self._values[(self._start + self._size) % self.capacity] = value
+            if self._size < self.capacity:
+                self._size += 1
+            else:
+                self._start = (self._start + 1) % self.capacity
+
+        else:
+            # add to the last bucket until it covers width frames, then start a new one, merging the buckets first if they are all used
+            if self._size == 0 or self._counts[self._size - 1] == self.width:
+                if self._size == self.capacity:
+                    self._merge()
+                self._values[self._size] = self._mins[self._size] = self._maxs[self._size] = value
+                self._counts[self._size] = 1
+                self._size += 1
+            else:
+                b = self._size - 1
+                self._counts[b] += 1
+                self._values[b] += (value - self._values[b]) / self._counts[b]
+                self._mins[b] = min(self._mins[b], value)
+                self._maxs[b] = max(self._maxs[b], value)
+
+    def extend(self, values):
+        """
+        This function adds the values of the next frames, in order. It is the same as adding them one at a time with append.
+
+        Args:
+            values (numpy array): the values
+        """
+        values = np.asarray(values, dtype = float)
+        if self.mode != "grow":
+            for value in values:
+                self.append(value)
+            return
+        if values.size == 0:
+            return
+        # double the array until the values fit, then copy them in at once
+        size = self._values.size
+        while size < self._size + values.size:
+            size *= 2
+        if size != self._values.size:
+            self._values = np.concatenate((self._values, np.zeros(size - self._values.size)))
+        self._values[self._size:self._size + values.size] = values
+        self._size += values.size
+        self.count += values.size
+        self.last = values[-1]
+
+    def _merge(self):
+        # merge each pair of neighbouring buckets into one, the buckets are all full so both of a pair cover the same number of frames
+        half = self._size // 2
+        self._values[:half] = (self._values[0:self._size:2] + self._values[1:self._size:2]) / 2
+        self._mins[:half] = np.minimum(self._mins[0:self._size:2], self._mins[1:self._size:2])
+        self._maxs[:half] = np.maximum(self._maxs[0:self._size:2], self._maxs[1:self._size:2])
+        self._counts[:half] = self._counts[0:self._size:2] + self._counts[1:self._size:2]
+        self._size = half
+        self.width *= 2
+
+    def values(self):
+        """
+        This function returns the stored values, oldest first. With "downsample" they are the means of the buckets.
+
+        Returns:
+            (numpy array): the values, a view of the series' array except with a "ring" that has wrapped round
+        """
+        if self.mode == "ring" and self._start:
+            return np.roll(self._values, -self._start)
+        return self._values[:self._size]
+
+    def mins(self):
+        """
+        This function returns the smallest value of each bucket with "downsample", or the values with the other modes.
+
+        Returns:
+            (numpy array): the smallest values
+        """
+        return self._mins[:self._size] if self.mode == "downsample" else self.values()
+
+    def maxs(self):
+        """
+        This function returns the largest value of each bucket with "downsample", or the values with the other modes.
+
+        Returns:
+            (numpy array): the largest values
+        """
+        return self._maxs[:self._size] if self.mode == "downsample" else self.values()
+
+    def frames(self):
+        """
+        This function returns the frame number of each stored value, counting the first value added as frame 0. With "downsample" it is the
+        middle of the frames in each bucket.
+
+        Returns:
+            (numpy array): the frame numbers, for the x axis of a plot
+        """
+        if self.mode == "downsample":
+            return np.arange(self._size) * self.width + (self._counts[:self._size] - 1) / 2
+        return np.arange(self.count - self._size, self.count)
+
+    def get_state(self):
+        """
+        This function returns everything needed to rebuild the series, it is used to checkpoint a simulation.
+
+        Returns:
+            (dict): the mode, capacity, counts and the stored values (and bucket mins, maxs and sizes with "downsample") as arrays
+        """
+        state = {"mode": self.mode, "capacity": self.capacity, "count": self.count, "last": float(self.last), "width": self.width,
+                 "values": self.values().copy()}
+        if self.mode == "downsample":
+            state.update(mins = self.mins().copy(), maxs = self.maxs().copy(), counts = self._counts[:self._size].copy())
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        This function rebuilds a series from the state returned by get_state.
+
+        Args:
+            state (dict): the state returned by get_state
+
+        Returns:
+            (MetricSeries): the same series
+        """
+        values = np.asarray(state["values"], dtype = float)
+        series = cls(state["capacity"] or max(values.size, 64), state["mode"])
+        series.count = state["count"]
+        series.last = state["last"]
+        series.width = state["width"]
+        series._size = values.size
+        series._values[:values.size] = values
+        if series.mode == "downsample":
+            series._mins[:values.size] = state["mins"]
+            series._maxs[:values.size] = state["maxs"]
+            series._counts[:values.size] = state["counts"]
+        return series
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        return self.values()[index]
+
+    def __iter__(self):
+        return iter(self.values())
+
+    def __array__(self, dtype = None, copy = None):
+        return np.asarray(self.values(), dtype = dtype)
+
+
+def new_series():
+    """
+    This function makes an empty series with the mode and capacity set in config.metrics_mode and config.metrics_capacity.
+
+    Returns:
+        (MetricSeries): the series
+    """
+    #Imported here as config.py uses this module to make its first series
+    import config
+    return MetricSeries(config.metrics_capacity, config.metrics_mode)
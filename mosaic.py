@@ -0,0 +1,196 @@
+"""
+This module runs and draws many simulations in one figure, e.g. the replicas of an ensemble or the points of a sweep. The grids are kept as one
+stack and updated together, each step of the stack costing about as much as one step of a grid of the same total size. They are drawn as one
+mosaic array with a single imshow, and the proportions of trees and fires of every simulation are drawn as two line collections, so watching
+64 simulations costs about as much as one large animation.
+
+The simulations spread fire as update_grid does (with config.spread_prob, config.susceptibility and the wind if they are set), but each has its
+own lightning and new tree probabilities. The instant burn mode, rain and the keyed streams are not supported, the random numbers come from
+config.rng.
+
+Example (in a notebook):
+    >>> ensemble = Ensemble(16, 50, 50, lightning = np.linspace(0.001, 0.03, 16), tree_growth = 0.05)
+    >>> fig, animate = initialise_mosaic(ensemble, frame_num = 500)
+    >>> anim = FuncAnimation(fig, animate, frames = 500, interval = 20)
+"""
+
+#Importing modules
+import numpy as np
+import config
+from grid_updater import spread_fire
+
+#The value of the cells between the grids of the mosaic, drawn white
+GAP = 3
+
+
+def mosaic(stack, columns = None, gap = 1):
+    """
+    This function packs a stack of grids into one array, in rows of columns grids with gap cells between them.
+
+    Args:
+        stack (numpy array): the grids, with the grid number first
+        columns (int): the number of grids in each row, defaults to a square mosaic
+        gap (int): the number of cells between neighbouring grids
+
+    Returns:
+        (numpy array): the mosaic, the cells between and after the grids are GAP
+
+    Example:
+        >>> mosaic(np.zeros((3, 1, 1), dtype = int))
+        np.array([[0, 3, 0], [3, 3, 3], [0, 3, 3]])
+    """
+    count, height, width = stack.shape
+    columns = columns or int(np.ceil(np.sqrt(count)))
+    rows = -(-count // columns)
+    # each grid is padded with the gap below and to the right, and the missing grids of the last row are all gap
+    padded = np.full((rows * columns, height + gap, width + gap), GAP, dtype = stack.dtype)
+    padded[:count, :height, :width] = stack
+    packed = padded.reshape(rows, columns, height + gap, width + gap).transpose(0, 2, 1, 3).reshape(rows * (height + gap), columns * (width + gap))
+    # the gap after the last row and column is not needed
+    return packed[:packed.shape[0] - gap, :packed.shape[1] - gap]
+
+
+class Ensemble:
+    def __init__(self, count, GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, istate = config.TREE):
+        """
+        This makes a stack of simulations, all starting from the same uniform grid.
+
+        Args:
+            count (int): the number of simulations
+            GRID_HEIGHT, GRID_WIDTH, istate: as in setup.configure
+            lightning (float): the probability of lightning, or an array with the probability of each simulation
+            tree_growth (float): the probability of a new tree, or an array with the probability of each simulation
+
+        Raises:
+            ValueError: if any of the arguments are invalid, or keyed streams (config.streams) are set
+        """
+        lightning = np.broadcast_to(np.asarray(lightning, dtype = float), (count,)).copy()
+        tree_growth = np.broadcast_to(np.asarray(tree_growth, dtype = float), (count,)).copy()
+        if count < 1 or GRID_HEIGHT <= 0 or GRID_WIDTH <= 0 or np.any((lightning < 0) | (lightning > 1) | (tree_growth < 0) | (tree_growth > 1)):
+            raise ValueError("Invalid values!")
+        if istate not in (config.TREE, config.FIRE, config.BURNT):
+            raise ValueError("Invalid initial state value, only accepts 0, 1 or 2!")
+        if config.streams is not None:
+            raise ValueError("Keyed streams are not supported, the ensemble uses config.rng!")
+
+        # the probabilities are kept with two extra axes so they apply to each grid of the stack
+        self.lightning = lightning[:, None, None]
+        self.tree_growth = tree_growth[:, None, None]
+        self.stack = np.full((count, GRID_HEIGHT, GRID_WIDTH), istate, dtype = int)
+        #If the initial state is empty, set a random cell of each grid to be a tree, as setup.configure does
+        if istate == config.BURNT:
+            self.stack[np.arange(count), config.rng.integers(GRID_HEIGHT, size = count), config.rng.integers(GRID_WIDTH, size = count)] = config.TREE
+
+        # the number of steps run, and the frame each simulation first burnt out at (the number of steps run if it has not)
+        self.frame = 0
+        self.burnt_out = np.full(count, -1)
+        # the proportions of trees and fires of each simulation in each step, the arrays double in size when they are full
+        self._trees = np.zeros((count, 64))
+        self._fires = np.zeros((count, 64))
+
+    def __len__(self):
+        return len(self.stack)
+
+    def step(self):
+        """
+        This function runs one step of every simulation.
+
+        Returns:
+            (numpy array): the stack of grids
+        """
+        stack = self.stack
+        # the fire spreads in every grid at once, the neighbours are shifted within each grid
+        stack = spread_fire(stack, stack.shape[2], stack.shape[1], self.frame)
+        # lightning and new trees, with the probabilities of each simulation
+        stack[(config.rng.random(stack.shape) > 1 - self.lightning) & (stack == config.TREE)] = config.FIRE
+        stack[(config.rng.random(stack.shape) > 1 - self.tree_growth) & (stack == config.BURNT)] = config.TREE
+        self.stack = stack
+
+        if self.frame == self._trees.shape[1]:
+            self._trees = np.concatenate((self._trees, np.zeros_like(self._trees)), axis = 1)
+            self._fires = np.concatenate((self._fires, np.zeros_like(self._fires)), axis = 1)
+        self._trees[:, self.frame] = (stack == config.TREE).mean(axis = (1, 2))
+        self._fires[:, self.frame] = (stack == config.FIRE).mean(axis = (1, 2))
+
+        # the simulations whose grid is all burnt out for the first time
+        self.burnt_out[(self.burnt_out < 0) & (stack == config.BURNT).all(axis = (1, 2))] = self.frame
+        self.frame += 1
+        return stack
+
+    def trees(self):
+        """
+        This function returns the proportion of trees of each simulation in each step.
+
+        Returns:
+            (numpy array): the proportions, with a row per simulation and a column per step
+        """
+        return self._trees[:, :self.frame]
+
+    def fires(self):
+        """
+        This function returns the proportion of fires of each simulation in each step.
+
+        Returns:
+            (numpy array): the proportions, with a row per simulation and a column per step
+        """
+        return self._fires[:, :self.frame]
+
+    def last_frame(self):
+        """
+        This function returns the frame each simulation first burnt out at, or the number of steps run if it has not (see config.last_frame).
+
+        Returns:
+            (numpy array): the last frame of each simulation
+        """
+        return np.where(self.burnt_out < 0, self.frame, self.burnt_out)
+
+
+def _segments(values):
+    # the line of each simulation as (step, value) points, all at once
+    steps = np.broadcast_to(np.arange(values.shape[1], dtype = float), values.shape)
+    return np.stack((steps, values), axis = -1)
+
+
+def initialise_mosaic(ensemble, columns = None, frame_num = config.frame, gap = 1):
+    """
+    This function makes the figure of an ensemble: the mosaic of its grids and a graph of the proportions of trees and fires of each simulation.
+
+    Args:
+        ensemble (Ensemble): the simulations
+        columns (int): the number of grids in each row of the mosaic, defaults to a square mosaic
+        frame_num (int): the number of frames the x axis of the graph covers
+        gap (int): the number of cells between neighbouring grids
+
+    Returns:
+        fig (matplotlib.figure.Figure): the figure
+
+        animate (function): the function FuncAnimation calls for each frame, it runs a step of the ensemble and redraws the figure
+    """
+    #matplotlib is only loaded when something is drawn
+    from matplotlib.collections import LineCollection
+    from matplotlib.colors import ListedColormap
+    import matplotlib.pyplot as plt
+
+    # the colours of the animation, with white for the gaps between the grids
+    cmap = ListedColormap(["tab:green", "tab:red", "tab:gray", "white"])
+    fig = plt.figure(figsize = (16, 8))
+    ax1 = fig.add_subplot(121)
+    ax1.axis("off")
+    image = ax1.imshow(mosaic(ensemble.stack, columns, gap), cmap = cmap, vmin = 0, vmax = 3, interpolation = "nearest")
+
+    ax2 = fig.add_subplot(122, xlim = (0, frame_num), ylim = (0, 1))
+    # one collection for the trees of every simulation and one for the fires, instead of two lines each
+    trees = ax2.add_collection(LineCollection([], colors = "tab:green", alpha = 0.4, label = "Trees"))
+    fires = ax2.add_collection(LineCollection([], colors = "tab:red", alpha = 0.4, label = "Fire"))
+    ax2.set_xlabel("Frame Number")
+    ax2.legend()
+    plt.close()
+
+    def animate(i):
+        stack = ensemble.step()
+        image.set_array(mosaic(stack, columns, gap))
+        trees.set_segments(_segments(ensemble.trees()))
+        fires.set_segments(_segments(ensemble.fires()))
+        return image, trees, fires
+
+    return fig, animate
@@ -0,0 +1,218 @@
+"""
+This module maps the results of the simulation over lightning and new tree growth probabilities adaptively. Instead of running every point of a
+full grid like simulation_combine, it starts from a coarse grid and only splits the cells (into 4, like a quadtree) whose corners give very
+different results, so the runs go to the transitions between phases rather than the flat regions either side of them.
+The result is the scattered points that were run, and the leaf cells, which phase_map interpolates into a map for plotting.
+"""
+
+#Importing modules
+import heapq
+
+import numpy as np
+import config
+from running_stats import RunningStats
+from sweep import combine_settings, run_task
+
+
+def check_phase_args(light_range, tree_range, coarse, times, max_depth, budget, frame_num, tree_threshold = 0.1, frame_threshold = 0.1):
+    """
+    Checks the arguments of phase_diagram().
+
+    Raises:
+
+        ValueError: If any of the arguments are not valid values
+    """
+    #Checks the ranges are probabilities, smallest first
+    for low, high in (light_range, tree_range):
+        if not 0 <= low < high <= 1:
+            raise ValueError("Invalid range, must have 0 <= low < high <= 1!")
+
+    #At least 2 points are needed along each side to make a cell
+    if coarse < 2:
+        raise ValueError("Coarse grid must have at least 2 points along each side!")
+
+    elif times <= 0:
+        raise ValueError("Number of times must be at least 1!")
+
+    elif max_depth < 0:
+        raise ValueError("Maximum depth cannot be negative!")
+
+    elif budget is not None and budget < coarse ** 2:
+        raise ValueError("Budget must cover the coarse grid!")
+
+    elif frame_num < 1:
+        raise ValueError("Invalid frame number, frame number must be at least 1!")
+
+    #The differences between corners are divided by the thresholds
+    elif tree_threshold <= 0 or frame_threshold <= 0:
+        raise ValueError("Thresholds must be positive!")
+
+
+def phase_diagram(light_range = (0.0, 0.1), tree_range = (0.0, 0.1), coarse = 5, times = 1, max_depth = 3, budget = None, tree_threshold = 0.1, frame_threshold = 0.1, frame_num = config.frame, instant_burn = False, GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, seed = None, cache = None):
+    """
+    Runs the simulation over an adaptively refined grid of lightning and new tree growth probabilities.
+    A cell is split when the remaining trees at its corners differ by more than tree_threshold, or their last frames by more than frame_threshold
+    of frame_num. The cells with the largest differences are split first, until none need splitting, they reach max_depth or the budget is used.
+
+    Args:
+
+        light_range : (tuple) the lowest and highest lightning probabilities
+
+        tree_range : (tuple) the lowest and highest new tree growth probabilities
+
+        coarse : (int) the number of points along each side of the starting grid
+
+        times : (int) the number of times to run the simulation at each point
+
+        max_depth : (int) the number of times a cell of the starting grid can be split, each split halves the spacing of the points
+
+        budget : (int) the most points to run, None for no limit
+
+        tree_threshold : (float) the difference in remaining trees between corners that splits a cell
+
+        frame_threshold : (float) the difference in last frame between corners, as a proportion of frame_num, that splits a cell
+
+        frame_num, instant_burn, GRID_HEIGHT, GRID_WIDTH : the settings of the simulation, as in simulation_combine()
+
+        seed, cache : as in simulation()
+
+    Returns:
+
+        points : (list) the (lightning, new tree) probabilities of each point that was run
+
+        mean_remaining_trees : (list) the mean remaining trees at each point
+
+        mean_last_frame : (list) the mean last frame at each point
+
+        cells : (list) the (lightning low, tree low, lightning high, tree high) corners of each leaf cell, for phase_map()
+
+    Raises:
+
+        ValueError: If any of the arguments are not valid values
+    """
+    check_phase_args(light_range, tree_range, coarse, times, max_depth, budget, frame_num, tree_threshold, frame_threshold)
+
+    #Points are kept on a lattice as fine as the deepest split, so the corners shared by neighbouring cells are only run once
+    steps = (coarse - 1) * 2 ** max_depth
+    results = {}
+
+    def value(i, j):
+        #the lightning and new tree probabilities of a lattice point
+        return (light_range[0] + (light_range[1] - light_range[0]) * i / steps, tree_range[0] + (tree_range[1] - tree_range[0]) * j / steps)
+
+    def run(i, j):
+        #run a lattice point the first time it is needed, numbering its runs from 0 so they are seeded the same as simulation_combine's
+        if (i, j) not in results:
+            settings = combine_settings(*value(i, j), frame_num, instant_burn, GRID_HEIGHT, GRID_WIDTH)
+            tree_stats, frame_stats = RunningStats(), RunningStats()
+            for replicate in range(times):
+                remaining_trees, last_frame = run_task(settings, seed, replicate, cache)
+                tree_stats.update(remaining_trees)
+                frame_stats.update(last_frame)
+            results[(i, j)] = (tree_stats.mean, frame_stats.mean)
+        return results[(i, j)]
+
+    def spread(i, j, size):
+        #how much bigger than its threshold the largest difference between the corners of a cell is, above 1 if it needs splitting
+        corners = np.array([run(i, j), run(i + size, j), run(i, j + size), run(i + size, j + size)])
+        return max(np.ptp(corners[:, 0]) / tree_threshold, np.ptp(corners[:, 1]) / (frame_threshold * frame_num))
+
+    #Start with the cells of the coarse grid. The heap gives the cell with the largest spread first, cells are (i, j, size) on the lattice
+    size = 2 ** max_depth
+    heap = []
+    leaves = set()
+    for i in range(0, steps, size):
+        for j in range(0, steps, size):
+            heapq.heappush(heap, (-spread(i, j, size), i, j, size))
+            leaves.add((i, j, size))
+
+    while heap:
+        score, i, j, size = heapq.heappop(heap)
+        #The cells left are smooth enough, or too small to split
+        if -score <= 1:
+            break
+        if size == 1:
+            continue
+        #Splitting runs up to 5 new points, the middle of the cell and of its sides
+        half = size // 2
+        new = [(i + half, j), (i, j + half), (i + half, j + half), (i + size, j + half), (i + half, j + size)]
+        if budget is not None and len(results) + sum(point not in results for point in new) > budget:
+            break
+
+        leaves.remove((i, j, size))
+        for ci, cj in ((i, j), (i + half, j), (i, j + half), (i + half, j + half)):
+            heapq.heappush(heap, (-spread(ci, cj, half), ci, cj, half))
+            leaves.add((ci, cj, half))
+
+    points = sorted(results)
+    cells = [value(i, j) + value(i + size, j + size) for i, j, size in sorted(leaves)]
+    return ([value(i, j) for i, j in points], [results[point][0] for point in points], [results[point][1] for point in points], cells)
+
+
+def phase_map(points, values, cells, resolution = 100):
+    """
+    Interpolates the results of phase_diagram() onto a regular grid for plotting. Inside each leaf cell the value is interpolated bilinearly from
+    its 4 corners.
+
+    Args:
+
+        points : (list) the (lightning, new tree) probabilities of each point, from phase_diagram()
+
+        values : (list) the value at each point, e.g. the mean remaining trees
+
+        cells : (list) the leaf cells, from phase_diagram()
+
+        resolution : (int) the number of values along each side of the map
+
+    Returns:
+
+        light_axis : (numpy ndarray) the lightning probabilities along the map's columns
+
+        tree_axis : (numpy ndarray) the new tree probabilities along the map's rows
+
+        values_map : (numpy ndarray) the interpolated values, with a row for each new tree probability
+    """
+    lookup = dict(zip(points, values))
+    cells = np.array(cells)
+    light_axis = np.linspace(cells[:, 0].min(), cells[:, 2].max(), resolution)
+    tree_axis = np.linspace(cells[:, 1].min(), cells[:, 3].max(), resolution)
+    values_map = np.full((resolution, resolution), np.nan)
+
+    for light_low, tree_low, light_high, tree_high in cells:
+        #The map values that fall in this cell, as fractions of the way across it
+        columns = np.flatnonzero((light_axis >= light_low) & (light_axis <= light_high))
+        rows = np.flatnonzero((tree_axis >= tree_low) & (tree_axis <= tree_high))
+        u = (light_axis[columns] - light_low) / (light_high - light_low)
+        v = ((tree_axis[rows] - tree_low) / (tree_high - tree_low))[:, None]
+        values_map[np.ix_(rows, columns)] = ((1 - u) * (1 - v) * lookup[(light_low, tree_low)] + u * (1 - v) * lookup[(light_high, tree_low)] +
+                                             (1 - u) * v * lookup[(light_low, tree_high)] + u * v * lookup[(light_high, tree_high)])
+
+    return light_axis, tree_axis, values_map
+
+
+def phase_plot(points, mean_remaining_trees, mean_last_frame, cells, resolution = 100):
+    """
+    Plots the interpolated maps of the remaining trees and last frame from phase_diagram(), with the points that were run on top.
+
+    Args:
+
+        points, mean_remaining_trees, mean_last_frame, cells : the results of phase_diagram()
+
+        resolution : (int) the number of values along each side of the maps
+    """
+    #matplotlib is only loaded when something is plotted
+    import matplotlib.pyplot as plt
+
+    figure, axes = plt.subplots(1, 2, figsize = (12, 5))
+    for ax, values, title in ((axes[0], mean_remaining_trees, "Proportion of trees in last frame"), (axes[1], mean_last_frame, "No. of frames in simulation")):
+        light_axis, tree_axis, values_map = phase_map(points, values, cells, resolution)
+        image = ax.imshow(values_map, origin = "lower", aspect = "auto", extent = (light_axis[0], light_axis[-1], tree_axis[0], tree_axis[-1]))
+        #Show where the simulation was run, the points cluster along the transitions
+        ax.scatter([point[0] for point in points], [point[1] for point in points], s = 4, color = "black")
+        figure.colorbar(image, ax = ax)
+        ax.set_title(title)
+        ax.set_xlabel("Lightning probability")
+        ax.set_ylabel("New tree probability")
+
+    #Display the plot
+    plt.show()
@@ -2,7 +2,6 @@
 This module contains functions to resize the grid plot.
 """
 
-import cv2
 import numpy as np
 from config import GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE
 
@@ -17,6 +16,8 @@ def shrink(arr):
     Output:
         arr (numpy_array) : the new grid that has been shrunk
     """
+    # cv2 is imported here so it is only loaded when the rain is drawn
+    import cv2
     # create a copy of the array to shrink
     arr_ = arr.copy()
     # use cv2 to resize this grid to the size of grid height x grid width
@@ -33,6 +34,7 @@ def enlarge(arr):
     Output:
         arr (numpy_array) : the new grid that has been enlarged
     """
+    import cv2
     # create a copy of the array to enlarge
     arr_ = arr.copy()
      # use cv2 to resize this grid 
@@ -0,0 +1,139 @@
+"""
+This module contains the ResultCache class which stores the results of single simulation runs on disk, so that running the same sweep
+again (e.g. re-running a notebook cell) reuses the runs that have already been done, and an interrupted sweep carries on where it stopped.
+Each result is stored under a key made from every setting of the run, the seed, the replicate number and config.MODEL_VERSION.
+The cache is a sqlite database with a limit on the number of results, the least recently used results are removed when it is full.
+
+The cache can be cleared from the terminal:
+    python result_cache.py PATH --clear
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import time
+
+import numpy as np
+import config
+
+
+class ResultCache:
+    def __init__(self, path, max_entries = 100000):
+        # the file the sqlite database is stored in
+        self.path = path
+        # the maximum number of results to keep, the least recently used are removed above this
+        self.max_entries = max_entries
+        
+        # open the database and create the results table the first time the cache is used
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, model_version INTEGER, "
+                        "remaining_trees REAL, last_frame REAL, last_used REAL)")
+        self.db.commit()
+
+    @staticmethod
+    def make_key(settings, seed, replicate):
+        """
+        This function makes the key a simulation run is stored under.
+
+        Args:
+            settings (dict): the settings of the run (grid size, lightning, tree_growth, frame_num, cloud_th and rain)
+            seed (int): the seed of the sweep
+            replicate (int): the number of the run at these settings
+
+        Returns:
+            (str): a hash of all the arguments and the model version
+        """
+        # numpy numbers are turned into python numbers so they can be written as json
+        payload = {name: (value.item() if isinstance(value, np.generic) else value) for name, value in settings.items()}
+        payload["seed"] = seed
+        payload["replicate"] = replicate
+        payload["model_version"] = config.MODEL_VERSION
+        # sort the keys so the same settings always give the same key
+        return hashlib.sha256(json.dumps(payload, sort_keys = True).encode()).hexdigest()
+
+    def get(self, key):
+        """
+        This function looks up a result in the cache.
+
+        Args:
+            key (str): the key made by make_key
+
+        Returns:
+            (tuple): the remaining trees and last frame of the run, or None if it is not in the cache
+        """
+        row = self.db.execute("SELECT remaining_trees, last_frame FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        # mark the result as used so it is not removed first
+        self.db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.db.commit()
+        return row
+
+    def put(self, key, remaining_trees, last_frame):
+        """
+        This function stores the result of a run in the cache, removing the least recently used results if the cache is full.
+
+        Args:
+            key (str): the key made by make_key
+            remaining_trees (float): the proportion of trees remaining in the last frame
+            last_frame (float): the last frame of the run
+        """
+        self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                        (key, config.MODEL_VERSION, float(remaining_trees), float(last_frame), time.time()))
+        # remove the oldest results above the size limit
+        self.db.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,))
+        self.db.commit()
+
+    def clear(self, model_version = None):
+        """
+        This function removes results from the cache.
+
+        Args:
+            model_version (int): if given, only remove results made with model versions older than this, otherwise remove everything
+
+        Returns:
+            (int): the number of results removed
+        """
+        if model_version is None:
+            removed = self.db.execute("DELETE FROM results").rowcount
+        else:
+            removed = self.db.execute("DELETE FROM results WHERE model_version < ?", (model_version,)).rowcount
+        self.db.commit()
+        return removed
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        """
+        This function closes the database.
+        """
+        self.db.close()
+
+
+def main(argv = None):
+    """
+    This function clears or shows the size of a cache from the terminal.
+
+    Args:
+        argv (list): the command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(description = "Manage the on-disk cache of simulation results.")
+    parser.add_argument("path", help = "the cache file")
+    parser.add_argument("--clear", action = "store_true", help = "remove every result")
+    parser.add_argument("--outdated", action = "store_true", help = "remove only results made by older model versions")
+    args = parser.parse_args(argv)
+    
+    cache = ResultCache(args.path)
+    if args.clear:
+        print(f"Removed {cache.clear()} results")
+    elif args.outdated:
+        print(f"Removed {cache.clear(config.MODEL_VERSION)} results")
+    print(f"{len(cache)} results in cache")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+This module gives random numbers that depend only on what they are for, not on the order they are drawn in. It uses the Philox4x32-10
+counter-based generator (Salmon et al., "Parallel random numbers: as easy as 1, 2, 3", 2011): a number is made by scrambling a counter
+with a key, so there is no state to carry from one draw to the next.
+
+The key is the (seed, replica) of the run and the counter is the (cell, frame, purpose) of the number, so the lightning draw of a cell in a
+frame is the same whether the grid is updated in one go, in tiles, in another process or after a checkpoint, and whatever else has been
+drawn before it. Set a Streams object as config.streams (see setup.configure) and the update grid functions use it instead of config.rng.
+"""
+
+#Importing modules
+import numpy as np
+
+#What the numbers are for, the purpose is part of the counter so each purpose has its own numbers
+LIGHTNING = 0
+GROWTH = 1
+SPREAD = 2
+SETUP = 3
+WEATHER = 4
+
+#The constants of Philox4x32 (the multipliers and the Weyl sequence the key is bumped by each round)
+_M0 = np.uint64(0xD2511F53)
+_M1 = np.uint64(0xCD9E8D57)
+_W0 = np.uint64(0x9E3779B9)
+_W1 = np.uint64(0xBB67AE85)
+_MASK = np.uint64(0xFFFFFFFF)
+_SHIFT = np.uint64(32)
+
+#The cell index is one 32-bit word of the counter, so grids with more cells than this would share numbers between cells
+MAX_CELLS = 2 ** 32
+
+
+def philox4x32(counter, key, rounds = 10):
+    """
+    This function scrambles counters with keys using Philox4x32, for many counters at once.
+
+    Args:
+        counter (numpy array): the counters, 4 32-bit words in the last axis
+        key (numpy array): the keys, 2 32-bit words in the last axis, broadcast against the counters
+        rounds (int): the number of rounds, 10 is the standard Philox4x32-10
+
+    Returns:
+        (numpy array): the random 32-bit words, the same shape as the counters
+
+    Example:
+        >>> philox4x32(np.zeros(4, dtype = np.uint32), np.zeros(2, dtype = np.uint32))
+        np.array([0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8], dtype = np.uint32)
+    """
+    # the words are kept in 64 bits so the product of two 32-bit words fits
+    counter = np.asarray(counter, dtype = np.uint64)
+    key = np.asarray(key, dtype = np.uint64)
+    words = _rounds(counter[..., 0], counter[..., 1], counter[..., 2], counter[..., 3], key[..., 0], key[..., 1], rounds)
+    return np.stack(np.broadcast_arrays(*words), axis = -1).astype(np.uint32)
+
+
+def _rounds(c0, c1, c2, c3, k0, k1, rounds):
+    # the Philox rounds on the 4 words of the counters, which can be arrays or single numbers (as in uniform_at, where only the cell changes)
+    for r in range(rounds):
+        # the key is bumped before every round but the first
+        if r:
+            k0 = (k0 + _W0) & _MASK
+            k1 = (k1 + _W1) & _MASK
+        product0 = _M0 * c0
+        product1 = _M1 * c2
+        c0, c1, c2, c3 = (product1 >> _SHIFT) ^ c1 ^ k0, product1 & _MASK, (product0 >> _SHIFT) ^ c3 ^ k1, product0 & _MASK
+    return c0, c1, c2, c3
+
+
+class Streams:
+    # the most cells a grid can have, see setup.configure
+    MAX_CELLS = MAX_CELLS
+
+    def __init__(self, seed, replica = 0):
+        """
+        This makes the random numbers of one run.
+
+        Args:
+            seed (int): the seed of the run, up to 64 bits
+            replica (int): the number of the run with this seed, up to 32 bits
+
+        Raises:
+            ValueError: if the seed or replica are negative or too large
+        """
+        if not (0 <= seed < 2 ** 64 and 0 <= replica < 2 ** 32):
+            raise ValueError("Invalid seed or replica!")
+        self.seed = int(seed)
+        self.replica = int(replica)
+        # the low half of the seed and the replica are the key, the high half of the seed is the last word of every counter
+        self.key = np.array([self.seed & 0xFFFFFFFF, self.replica], dtype = np.uint64)
+        self.seed_high = self.seed >> 32
+
+    def uniform_at(self, frame_num, purpose, index):
+        """
+        This function gives the random numbers of some cells in a frame, each between 0 and 1.
+
+        Args:
+            frame_num (int): the frame number
+            purpose (int): what the numbers are for, e.g. LIGHTNING
+            index (numpy array): the index of each cell in the flattened grid (row * grid width + column), below MAX_CELLS
+
+        Returns:
+            (numpy array): a number for each cell, the same shape as index
+        """
+        # only the cell changes from one counter to the next, the other words are the same for every cell
+        index = np.asarray(index, dtype = np.uint64) & _MASK
+        words = _rounds(index, np.uint64(frame_num), np.uint64(purpose), np.uint64(self.seed_high), self.key[0], self.key[1], 10)
+        # 53 random bits from the first two words, the most a float64 can hold, as in numpy's random()
+        return ((words[0] >> np.uint64(5)) * 67108864.0 + (np.broadcast_to(words[1], index.shape) >> np.uint64(6))) / 9007199254740992.0
+
+    def uniform(self, frame_num, purpose, shape, region = None):
+        """
+        This function gives the random numbers of a grid, or of a region of it, in a frame.
+
+        Args:
+            frame_num (int): the frame number
+            purpose (int): what the numbers are for, e.g. LIGHTNING
+            shape (tuple): the (height, width) of the whole grid
+            region (tuple): the (top, left, bottom, right) cells of a region, the bottom and right are not included. Defaults to the whole grid
+
+        Returns:
+            (numpy array): the numbers of the region, the same as that region of the numbers of the whole grid
+
+        Raises:
+            ValueError: if the grid has more than MAX_CELLS cells
+        """
+        if shape[0] * shape[1] > MAX_CELLS:
+            raise ValueError("Grid too large for keyed streams, must have at most 2**32 cells!")
+        top, left, bottom, right = (0, 0) + tuple(shape) if region is None else region
+        rows = np.arange(top, bottom, dtype = np.uint64)
+        cols = np.arange(left, right, dtype = np.uint64)
+        return self.uniform_at(frame_num, purpose, rows[:, None] * np.uint64(shape[1]) + cols[None, :])
+
+    def generator(self, purpose):
+        """
+        This function makes a numpy generator for the random numbers that are not per cell (e.g. the weather), keyed by the seed, replica and purpose.
+
+        Args:
+            purpose (int): what the numbers are for, e.g. WEATHER
+
+        Returns:
+            (numpy.random.Generator): a generator that always starts from the same point for the same seed, replica and purpose
+        """
+        return np.random.Generator(np.random.Philox(key = self.seed | (self.replica << 64) | (purpose << 96)))
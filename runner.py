@@ -0,0 +1,178 @@
+"""
+This module runs the forest fire simulation without any figures. It makes the same updates to the grid as the animate functions, frame by frame,
+so it is used for long runs and sweeps where nothing needs to be drawn. Runs can be checkpointed every so many frames and resumed with the
+checkpoint module, and can start from a snapshot of a settled simulation (see the snapshots module) instead of a uniform grid.
+"""
+
+#Importing modules
+from numbers import Integral
+
+import config
+from accumulators import Accumulators
+from grid_updater import update_grid, update_grid_with_rain
+from metrics import new_series
+from setup import configure, reset
+
+
+def start(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, frame_num = config.frame, istate = config.TREE, rain = False, cloud_th = config.cloud_th, instant_burn = False, spread_prob = None, susceptibility = None, wind_bias = 0.0, streams = None, accumulate = False):
+    """
+    This function resets the config file and sets up a new simulation, like the initialise functions but without a figure.
+    
+    Args:
+        GRID_HEIGHT (int): The grid height, default value set in the config
+        GRID_WIDTH (int): The grid width, default value set in the config
+        lightning (float): The probability that lightning, default value set in the config
+        tree_growth (float): The probability that a new tree, default value set in the config
+        frame_num (int): The number of frames the simulation will run for
+        istate (int): The initial state of cells 
+        rain (boolean): If true, the simulation will be run with the effect of rain
+        cloud_th (float): The number above which becomes a cloud, default value set in the config
+        instant_burn (boolean): If true, lightning burns the whole cluster of trees it strikes in one frame
+        spread_prob, susceptibility, wind_bias: how likely fire is to spread to each neighbour, see setup.configure
+        streams (rng_streams.Streams): keyed random number streams to use instead of config.rng, see setup.configure
+        accumulate (boolean): If true, the totals of each cell (how many times it burnt, etc.) are kept in config.accumulators
+        
+    Returns:
+        (numpy array): The first grid of the simulation
+        
+    Raises:
+        ValueError: if any of the arguments are invalid (see setup.configure)
+    """
+    #Reset the variables in config.py
+    reset()
+    
+    #Change the frame number and last_frame in config.py    
+    config.frame = frame_num
+    config.last_frame = frame_num
+    
+    #Check the parameters, set them in config.py and make the first grid
+    grid = configure(GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, istate, rain, cloud_th, instant_burn, spread_prob, susceptibility, wind_bias, streams)
+    
+    #Start keeping the totals of each cell from the first grid if asked to
+    if accumulate:
+        config.accumulators = Accumulators(grid)
+    return grid
+
+
+def warm_start(snapshots, GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, frame_num = config.frame, rain = False, cloud_th = config.cloud_th, instant_burn = False, settle = 50, max_distance = None, keep_rng = False):
+    """
+    This function sets up a new simulation from the nearest snapshot in a library, instead of from a uniform grid like start. The snapshot is
+    run for settle frames with the new settings, then the proportions are cleared so the new run's frames are counted from 0. With rain, new
+    rain clouds are made with cloud_th for the settle frames and the frames of the new run.
+    
+    Args:
+        snapshots (SnapshotLibrary): the library of snapshots
+        GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, rain, cloud_th, instant_burn: as in start
+        settle (int): the number of frames run with the new settings before the run starts
+        max_distance (float): the furthest (in lightning and tree_growth together) a snapshot may be, see SnapshotLibrary.nearest
+        keep_rng (boolean): If true, the random number generator carries on from the snapshot's state. By default it carries on from
+                            config.rng, so each replicate of a seeded sweep gets its own random numbers
+        
+    Returns:
+        (numpy array): The first grid of the simulation, or None if there is no suitable snapshot (start can be used instead)
+    """
+    #The checkpoint module is only needed when a snapshot is used
+    from checkpoint import load_checkpoint
+    
+    entry = snapshots.nearest(GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, rain, instant_burn, max_distance)
+    if entry is None:
+        return None
+    
+    #Put the snapshot into config.py, keeping the random number generator of this run unless asked not to
+    rng = config.rng
+    reset()
+    grid, next_frame, rain = load_checkpoint(snapshots.path(entry))
+    if not keep_rng:
+        config.rng = rng
+    
+    #The snapshot's rain clouds only cover its own frames and were made with its cloud threshold, so new ones are made for the settle frames
+    #and the frames of the new run
+    if rain:
+        from weather import Weather
+        config.weather = Weather(cloud_th, max(settle, frame_num), GRID_WIDTH, GRID_HEIGHT, config.rng)
+    
+    #Change to the settings of the new run, and let the snapshot settle into them
+    config.lightning = lightning
+    config.tree_growth = tree_growth
+    config.cloud_th = cloud_th
+    grid = advance(grid, 0, settle, rain)
+    
+    #Start counting the frames, proportions and burn outs of the new run
+    config.frame = frame_num
+    config.last_frame = frame_num
+    config.first_time = True
+    for name in ("prop_of_trees", "prop_of_fires", "prop_of_rain"):
+        setattr(config, name, new_series())
+    config.cluster_history = []
+    return grid
+
+
+def advance(grid, start_frame, end_frame, rain = False, checkpoint_path = None, checkpoint_every = None):
+    """
+    This function updates the grid from start_frame up to (but not including) end_frame, writing a checkpoint every checkpoint_every frames.
+    
+    Args:
+        grid (numpy array): the grid the last frame ended on (or the grid from start)
+        start_frame (int): the number of the first frame to run
+        end_frame (int): the number of the frame to stop at
+        rain (boolean): If true, the grid is updated with the effect of rain
+        checkpoint_path (str): the file to write checkpoints to, no checkpoints are written if it is not given
+        checkpoint_every (int): the number of frames between checkpoints, needed when checkpoint_path is given
+        
+    Returns:
+        (numpy array): the grid at the end of the last frame
+    
+    Raises:
+        ValueError: if checkpoint_path is given and checkpoint_every is not a positive integer
+    """
+    #The checkpoint module is only needed when checkpoints are written
+    if checkpoint_path is not None:
+        if isinstance(checkpoint_every, bool) or not isinstance(checkpoint_every, Integral) or checkpoint_every <= 0:
+            raise ValueError("Invalid checkpoint_every, must be a positive integer when checkpoint_path is given!")
+        from checkpoint import save_checkpoint
+    
+    for frame_num in range(start_frame, end_frame):
+        
+        #Update the grid the same way the animate functions do
+        if rain:
+            grid, rain_intensity = update_grid_with_rain(grid, frame_num)
+        else:
+            grid = update_grid(grid, frame_num)
+        
+        #Write a checkpoint every checkpoint_every frames, it records that the next frame to run is frame_num + 1
+        if checkpoint_path is not None and (frame_num + 1 - start_frame) % checkpoint_every == 0:
+            save_checkpoint(checkpoint_path, grid, frame_num + 1, rain)
+    
+    return grid
+
+
+def run_replicate(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, frame_num = config.frame, cloud_th = config.cloud_th, rain = False, instant_burn = False, snapshots = None, settle = 50, streams = None, event_driven = False):
+    """
+    This function runs the whole simulation once, from the first frame to frame_num.
+    
+    Args:
+        GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, rain, cloud_th, instant_burn: as in start
+        snapshots (SnapshotLibrary): if given, the run starts from the nearest suitable snapshot (see warm_start), or from a uniform grid if
+                                     there is none
+        settle (int): the number of frames a snapshot is run with the new settings before the run starts
+        streams (rng_streams.Streams): keyed random number streams to use instead of config.rng, see setup.configure
+        event_driven (boolean): If true, the frames with no fire are jumped over instead of run one by one (see kmc.advance_kmc), which is much
+                                faster when lightning is rare. The results have the same distribution, but not the same values for a seed
+        
+    Returns:
+        remaining_trees (float): the proportion of alive trees in the last frame
+        
+        last_frame (int): the frame the simulation burnt out at, or the max frame number if it never did
+    """
+    grid = None
+    if snapshots is not None:
+        grid = warm_start(snapshots, GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, rain, cloud_th, instant_burn, settle)
+    if grid is None:
+        grid = start(GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, rain = rain, cloud_th = cloud_th, instant_burn = instant_burn, streams = streams)
+    if event_driven:
+        #The kmc module imports this one, so it is only loaded when it is used
+        from kmc import advance_kmc
+        advance_kmc(grid, 0, frame_num, rain)
+    else:
+        advance(grid, 0, frame_num, rain)
+    return config.prop_of_trees.last, config.last_frame
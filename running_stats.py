@@ -0,0 +1,65 @@
+"""
+This module contains the RunningStats class which keeps a streaming mean and variance of simulation results (Welford's algorithm).
+It lets the simulation functions update their statistics as each replicate finishes instead of storing every value in a list,
+and gives the confidence interval used to decide when a parameter point has been simulated enough times.
+"""
+
+import numpy as np
+
+
+class RunningStats:
+    def __init__(self):
+        # number of values seen so far
+        self.count = 0
+        # the running mean of the values
+        self.mean = 0.0
+        # the running sum of squared differences from the mean (M2 in Welford's algorithm)
+        self.m2 = 0.0
+
+    def update(self, value):
+        """
+        This function adds one new value to the statistics.
+
+        Args:
+            value (float): the result of one replicate (e.g. remaining trees or last frame)
+        """
+        self.count += 1
+        # move the mean towards the new value ...
+        delta = value - self.mean
+        self.mean += delta / self.count
+        # ... and update the sum of squares using both the old and new mean, this is numerically stable
+        self.m2 += delta * (value - self.mean)
+
+    def variance(self):
+        """
+        This function returns the sample variance of the values seen so far.
+
+        Returns:
+            (float): the sample variance, or nan if fewer than 2 values have been added
+        """
+        if self.count < 2:
+            return np.nan
+        return self.m2 / (self.count - 1)
+
+    def std(self):
+        """
+        This function returns the sample standard deviation of the values seen so far.
+
+        Returns:
+            (float): the sample standard deviation, or nan if fewer than 2 values have been added
+        """
+        return np.sqrt(self.variance())
+
+    def ci_halfwidth(self, z = 1.96):
+        """
+        This function returns the half width of the normal approximation confidence interval on the mean.
+
+        Args:
+            z (float): the critical value of the interval, 1.96 is a 95% interval
+
+        Returns:
+            (float): the half width of the interval, or inf if fewer than 2 values have been added
+        """
+        if self.count < 2:
+            return np.inf
+        return z * self.std() / np.sqrt(self.count)
@@ -0,0 +1,271 @@
+"""
+This module schedules the runs of a sweep (see the sweep module) by how long they are expected to take and how much memory they need. The cost of
+a run varies a lot across a sweep: the work of each frame grows with the number of cells, and with rain the Weather makes a rain cloud grid of
+(GRID_WIDTH + 2 * frame_num) * (GRID_HEIGHT + 2 * frame_num) cells before the first frame. Sent to the workers in order, the longest runs can
+end up last and leave the other workers idle.
+
+The CostModel predicts the time and memory of a run from these sizes, with coefficients fitted to a quick pilot (calibrate) or to the runs of
+earlier sweeps (fit). run_scheduled sends the runs to the workers longest first, only starting a run when the memory of the runs in progress
+leaves room for it, and records the predicted and actual time of each run so the model can be refitted.
+
+Example:
+    >>> model = CostModel()
+    >>> model.calibrate(sweep_tasks(spec))
+    >>> tasks, results, records = run_scheduled(spec, workers = 8, model = model, memory_limit = 4e9)
+    >>> print(report(records))
+    >>> model.fit(records)
+"""
+
+#Importing modules
+import time
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from sweep import run_sweep_task, sweep_tasks, task_key
+
+
+def features(settings):
+    """
+    This function works out the sizes the time of a run depends on.
+
+    Args:
+        settings (dict): the settings of the run, see sweep.point_settings
+
+    Returns:
+        (numpy array): 1, the cells of the grid times the frames, and with rain the cells of the rain cloud grid (otherwise 0)
+    """
+    cells = settings["GRID_HEIGHT"] * settings["GRID_WIDTH"]
+    frames = settings["frame_num"]
+    return np.array([1.0, cells * frames, _rain_cells(settings)])
+
+
+def memory_features(settings):
+    """
+    This function works out the sizes the memory of a run depends on, which does not grow with the frames except through the rain cloud grid.
+
+    Args:
+        settings (dict): the settings of the run, see sweep.point_settings
+
+    Returns:
+        (numpy array): 1, the cells of the grid, and with rain the cells of the rain cloud grid (otherwise 0)
+    """
+    return np.array([1.0, settings["GRID_HEIGHT"] * settings["GRID_WIDTH"], _rain_cells(settings)])
+
+
+def _rain_cells(settings):
+    # the size of the rain cloud grid the Weather makes, 0 without rain
+    if not settings["rain"]:
+        return 0
+    return (settings["GRID_WIDTH"] + 2 * settings["frame_num"]) * (settings["GRID_HEIGHT"] + 2 * settings["frame_num"])
+
+
+def _fit(rows, values):
+    # a least squares fit that keeps every coefficient at or above 0, dropping the features that would be negative and fitting again
+    rows = np.asarray(rows, dtype = float)
+    values = np.asarray(values, dtype = float)
+    used = rows.any(axis = 0)
+    while True:
+        coefficients = np.zeros(rows.shape[1])
+        coefficients[used] = np.linalg.lstsq(rows[:, used], values, rcond = None)[0]
+        if (coefficients >= 0).all():
+            return coefficients
+        used &= coefficients > 0
+
+
+def _measure(task, trace = False):
+    # run a task in this process and time it, and with trace the peak memory numpy allocated while it ran
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = run_sweep_task(task)
+    seconds = time.perf_counter() - start
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+class CostModel:
+    def __init__(self, time_coefficients = (1e-3, 2e-8, 5e-6), memory_coefficients = (1e5, 100.0, 16.0)):
+        """
+        This makes a cost model. The default coefficients are rough, calibrate or fit the model before relying on it.
+
+        Args:
+            time_coefficients (tuple): the seconds per unit of each of the features (see features)
+            memory_coefficients (tuple): the bytes per unit of each of the memory features (see memory_features)
+        """
+        self.time_coefficients = np.asarray(time_coefficients, dtype = float)
+        self.memory_coefficients = np.asarray(memory_coefficients, dtype = float)
+
+    def predict_time(self, settings):
+        """
+        This function predicts how long a run takes.
+
+        Args:
+            settings (dict): the settings of the run
+
+        Returns:
+            (float): the seconds
+        """
+        return float(features(settings) @ self.time_coefficients)
+
+    def predict_memory(self, settings):
+        """
+        This function predicts the most memory a run needs at once.
+
+        Args:
+            settings (dict): the settings of the run
+
+        Returns:
+            (float): the bytes
+        """
+        return float(memory_features(settings) @ self.memory_coefficients)
+
+    def fit(self, records):
+        """
+        This function fits the time coefficients (and the memory coefficients, if the records have memory) to measured runs.
+
+        Args:
+            records (list): a dictionary for each run with its "settings", the "seconds" it took and optionally the "memory" it used, as made by
+                            run_scheduled and calibrate
+
+        Returns:
+            (CostModel): the model
+        """
+        rows = [features(record["settings"]) for record in records]
+        self.time_coefficients = _fit(rows, [record["seconds"] for record in records])
+        measured = [record for record in records if record.get("memory")]
+        if measured:
+            self.memory_coefficients = _fit([memory_features(record["settings"]) for record in measured], [record["memory"] for record in measured])
+        return self
+
+    def calibrate(self, tasks, samples = 6, pilot_frames = 40):
+        """
+        This function fits the model to a quick pilot: a few of the tasks, spread from the cheapest to the most expensive, are run in this process
+        with at most pilot_frames frames, and again with half as many so the time of each frame can be told apart from the time of setting up.
+        The memory of each is measured in a third run.
+
+        Args:
+            tasks (list): the tasks of the sweep, see sweep.sweep_tasks
+            samples (int): the number of tasks to run
+            pilot_frames (int): the most frames each pilot run has
+
+        Returns:
+            (list): the records of the pilot runs, see fit
+        """
+        # the distinct settings of the sweep, from the fewest cells to the most, with the rain runs last
+        distinct = {}
+        for task in tasks:
+            settings = dict(task["settings"], frame_num = min(task["settings"]["frame_num"], pilot_frames))
+            distinct.setdefault(tuple(sorted(settings.items())), dict(task, settings = settings))
+        ordered = sorted(distinct.values(), key = lambda task: (task["settings"]["rain"], task["settings"]["GRID_HEIGHT"] * task["settings"]["GRID_WIDTH"]))
+        picked = [ordered[i] for i in np.unique(np.linspace(0, len(ordered) - 1, min(samples, len(ordered))).round().astype(int))]
+
+        records = []
+        for n, task in enumerate(picked):
+            settings = task["settings"]
+            for frames in sorted({settings["frame_num"], max(settings["frame_num"] // 2, 1)}):
+                pilot = dict(settings, frame_num = frames)
+                result, seconds, peak = _measure(dict(task, settings = pilot, seed = 0, replicate = n))
+                records.append({"settings": pilot, "seconds": seconds})
+            records[-1]["memory"] = _measure(dict(task, seed = 0, replicate = n), trace = True)[2]
+        self.fit(records)
+        return records
+
+
+def _timed_task(task):
+    # run a task in a worker process, returning its result and how long it took
+    start = time.perf_counter()
+    result = run_sweep_task(task)
+    return result, time.perf_counter() - start
+
+
+def run_scheduled(spec, workers = 1, model = None, memory_limit = None, cache = None):
+    """
+    This function runs every run of a sweep in worker processes, the runs predicted to take longest first. With a memory limit a run is only
+    started when the predicted memory of the runs in progress leaves room for it, a shorter run that fits is started instead of one that does
+    not. A run is always started when none are in progress, even if it is predicted to need more than the limit.
+
+    Args:
+        spec (dict): the sweep spec, see the sweep module
+        workers (int): the number of worker processes
+        model (CostModel): the cost model, defaults to a model calibrated on a pilot of the sweep
+        memory_limit (float): the most bytes the runs in progress may be predicted to need, None for no limit
+        cache (ResultCache): if given, seeded runs are taken from and added to the cache
+
+    Returns:
+        tasks (list): every run of the sweep, see sweep.sweep_tasks
+
+        results (list): the (remaining trees, last frame) of each run
+
+        records (list): a dictionary for each run that was not in the cache, with its "settings", "predicted" and actual "seconds",
+                        "predicted_memory" and the "worker_start" time (seconds since the sweep started)
+    """
+    tasks = sweep_tasks(spec)
+    if model is None:
+        model = CostModel()
+        model.calibrate(tasks)
+    results = [None] * len(tasks)
+
+    #Runs already in the cache do not need to be run again
+    keys = [None] * len(tasks)
+    if cache is not None:
+        for i, task in enumerate(tasks):
+            keys[i] = task_key(task)
+            if keys[i] is not None:
+                results[i] = cache.get(keys[i])
+
+    #The runs left, longest first
+    predicted = {i: (model.predict_time(tasks[i]["settings"]), model.predict_memory(tasks[i]["settings"])) for i in range(len(tasks)) if results[i] is None}
+    queue = sorted(predicted, key = lambda i: -predicted[i][0])
+
+    records = []
+    running = {}
+    memory = 0.0
+    began = time.perf_counter()
+    with ProcessPoolExecutor(workers) as executor:
+        while queue or running:
+            #Start the longest runs that fit in the free workers and memory
+            while queue and len(running) < workers:
+                fits = [i for i in queue if memory_limit is None or not running or memory + predicted[i][1] <= memory_limit]
+                if not fits:
+                    break
+                i = fits[0]
+                queue.remove(i)
+                memory += predicted[i][1]
+                future = executor.submit(_timed_task, tasks[i])
+                running[future] = (i, time.perf_counter() - began)
+
+            done, pending = wait(running, return_when = FIRST_COMPLETED)
+            for future in done:
+                i, started = running.pop(future)
+                memory -= predicted[i][1]
+                result, seconds = future.result()
+                results[i] = tuple(result)
+                if keys[i] is not None:
+                    cache.put(keys[i], *result)
+                records.append({"settings": tasks[i]["settings"], "predicted": predicted[i][0], "seconds": seconds,
+                                "predicted_memory": predicted[i][1], "worker_start": started})
+    return tasks, results, records
+
+
+def report(records):
+    """
+    This function summarises how well the cost model predicted the runs of a sweep.
+
+    Args:
+        records (list): the records from run_scheduled
+
+    Returns:
+        (str): the total predicted and actual time, the median ratio of actual to predicted time and the correlation between them
+    """
+    if not records:
+        return "No runs"
+    predicted = np.array([record["predicted"] for record in records])
+    actual = np.array([record["seconds"] for record in records])
+    ratio = np.median(actual / np.maximum(predicted, 1e-12))
+    correlation = np.corrcoef(predicted, actual)[0, 1] if len(records) > 1 and predicted.std() > 0 and actual.std() > 0 else np.nan
+    return (f"{len(records)} runs: predicted {predicted.sum():.2f}s, actual {actual.sum():.2f}s, "
+            f"median actual/predicted {ratio:.2f}, correlation {correlation:.2f}")
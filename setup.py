@@ -8,13 +8,13 @@ In the beginning, we conceived an entire forest that had been struck by lightnin
    The subplot3(bar chart) shows the density of each variable in the forest.
 """
 #Importing modules
-from matplotlib.colors import ListedColormap
-import matplotlib.pyplot as plt
+#matplotlib and the weather module (which needs perlin_noise) are imported in the functions that use them, so running the simulation without
+#figures (see the runner module) does not have to load them
 import numpy as np
 import config
-from weather import Weather
+from metrics import new_series
 
-def initialise(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, istate = config.TREE):
+def initialise(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, istate = config.TREE, instant_burn = False):
     
     """
     This is the initialize function, it creates the base grids for animation, 3 grids are created - a grid of animation, a line graph and a bar chart
@@ -26,6 +26,7 @@ def initialise(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH,
         lightning (float): The probability that lightning, default value set in the config
         tree_growth (float): The probability that a new tree, default value set in the config
         istate (int): The initial state of cells 
+        instant_burn (boolean): If true, lightning burns the whole cluster of trees it strikes in one frame
     
     Returns:
         (matplotlib.figure.Figure): The figure instance used for animation
@@ -34,20 +35,11 @@ def initialise(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH,
         ValueError: if any of the arguments are invalid. Check grid height and length are positive integers and the probability of lightning and new tree growth is between 0 and 1. Also checks if istate is in 0, 1 or 2.
     
     """
-    #Checks the parameters are valid for setting up the grid. 
-    #Check the grid height and width are positive and porbabilities of lightning and tree growth are between 0 and 1.
-    if (GRID_HEIGHT <= 0 or GRID_WIDTH <= 0 or lightning > 1 or lightning < 0  or tree_growth > 1 or tree_growth < 0):
-        raise ValueError("Invalid values!")
-    #Check the initial state of cells are either 0, 1 or 2
-    if(istate not in [0, 1, 2]):
-        raise ValueError("Invalid initial state, only accept 0, 1 or 2!")
+    from matplotlib.colors import ListedColormap
+    import matplotlib.pyplot as plt
     
-    #Set variables according to user inputs
-    config.GRID_HEIGHT = GRID_HEIGHT
-    config.GRID_WIDTH = GRID_WIDTH
-    config.lightning = lightning
-    config.tree_growth = tree_growth
-    config.istate = istate
+    #Check the parameters, set them in config.py and make the first grid
+    initial_grid = configure(GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, istate, instant_burn = instant_burn)
 
     # Sets up a color map for the figure. Trees are green, red is on fire and gray are empty, burnt out cells.
     cmap = ListedColormap(["tab:green", "tab:red", "tab:gray"])
@@ -61,20 +53,6 @@ def initialise(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH,
     # Turn off axis
     ax1.axis("off")
     
-    # #set up a new numpy array of zeros of the grid height and grid width, make sure these zeros are set as integers
-    initial_grid = np.full((GRID_HEIGHT, GRID_WIDTH), istate, dtype = int)
-    
-    #If the initial state is empty, set a random cell to be a tree to avoid triggering the end of the animation
-    if(istate == 2):
-        #Set a random index 
-        index = config.rng.integers(GRID_HEIGHT, size = 2)
-        #Change it to list
-        index = list(index)
-        #Set the variable in config.py
-        config.index = index
-        #Set the indexed cell to 0
-        initial_grid[index[0], index[1]] = 0
-    
     # Display grid as an image. Use the color map as described above, the vmin and vmax values make sure the correct colormap values are used.
     config.grid_plot = ax1.imshow(initial_grid, cmap = cmap, vmin = 0, vmax = 2) 
     
@@ -162,18 +140,42 @@ def reset():
     
     # Resets boolean variable to record the first burn out event
     config.first_time = True
+    
+    # Fire spreads one ring of neighbours per frame again
+    config.instant_burn = False
+    
+    # Fire spreads to every neighbouring tree for certain again, with no wind
+    config.spread_prob = None
+    config.susceptibility = None
+    config.wind_bias = 0.0
+    config.wind = None
+    
+    # Random numbers come from config.rng again
+    config.streams = None
 
     # Reset index to None
     config.index = None
     
-    # Lists to store the proportions of trees and fires relative to grid size in each frame for plotting purposes are cleared.
-    config.prop_of_trees = []
-    config.prop_of_fires = []
-    config.prop_of_rain = []
+    # Series to store the proportions of trees and fires relative to grid size in each frame for plotting purposes are cleared.
+    config.prop_of_trees = new_series()
+    config.prop_of_fires = new_series()
+    config.prop_of_rain = new_series()
+    
+    # Stop recording cluster sizes and clear the recorded ones
+    config.cluster_every = None
+    config.cluster_history = []
+    
+    # Stop keeping the totals of each cell
+    config.accumulators = None
 
     
     #Frame Number
     config.frame = 100
+    
+    # One model step per frame of the animation again
+    config.frame_skip = 1
+    config.target_fps = None
+    config.model_step = 0
 
     # Frame number of the last frame
     config.last_frame = config.frame
@@ -188,7 +190,7 @@ def reset():
     config.cloud_th = 0.6
     
     
-def initialise_with_rain(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, cloud_th = config.cloud_th):
+def initialise_with_rain(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, cloud_th = config.cloud_th, instant_burn = False):
     
     """
     This is the initialize function when adding rain to our animation, it creates the base grids for animation, 3 grids are created - a grid of animation, a line graph, and a bar chart
@@ -200,6 +202,7 @@ def initialise_with_rain(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.G
         lightning (float): The probability that lightning, default value set in the config
         tree_growth (float): The probability that a new tree, default value set in the config
         cloud_th (float): The number above which becomes a cloud, default value set in the config
+        instant_burn (boolean): If true, lightning burns the whole cluster of trees it strikes in one frame
     
     Returns:
         (matplotlib.figure.Figure): The figure instance used for animation
@@ -209,20 +212,11 @@ def initialise_with_rain(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.G
     
     """
     
-    #Checks the parameters are valid for setting up the grid. 
-    #Check the grid height and width are positive and probabilities of lightning and tree growth are between 0 and 1.
-    if (GRID_HEIGHT <= 0 or GRID_WIDTH <= 0 or lightning > 1 or lightning < 0  or tree_growth > 1 or tree_growth < 0 or config.cloud_th > 1 or config.cloud_th < 0):
-        raise ValueError("Invalid values!")
-        
-    #Set variables according to user inputs
-    config.GRID_HEIGHT = GRID_HEIGHT
-    config.GRID_WIDTH = GRID_WIDTH
-    config.lightning = lightning
-    config.tree_growth = tree_growth
-    config.cloud_th = cloud_th
+    from matplotlib.colors import ListedColormap
+    import matplotlib.pyplot as plt
     
-    # Initialise the weather class 
-    config.weather = Weather(config.cloud_th, config.last_frame, GRID_WIDTH, GRID_HEIGHT)
+    #Check the parameters, set them in config.py, set up the weather and make the first grid
+    initial_grid = configure(GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, rain = True, cloud_th = cloud_th, instant_burn = instant_burn)
     
 
     # Pick color for grid - 'tab:green' for 0, 'tab:red' for 1, 'tab:gray' for 2, '#00008B' is dark blue for 3
@@ -236,8 +230,6 @@ def initialise_with_rain(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.G
     ax1 = fig.add_subplot(131)
     # Turn off axis
     ax1.axis("off")
-    # #set up a new numpy array of zeros of the grid height and grid width, make sure these zeros are set as intergers
-    initial_grid = np.zeros((GRID_HEIGHT, GRID_WIDTH), dtype = int) 
     # Display grid as image. Use the colour map as described above, the vmin and vmax values makes sure the correct colourmap values are used.
     config.grid_plot = ax1.imshow(initial_grid, cmap = cmap, vmin = 0, vmax = 3) 
     
@@ -264,3 +256,92 @@ def initialise_with_rain(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.G
     
     #return the final figure
     return fig
+
+    
+def configure(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, istate = config.TREE, rain = False, cloud_th = config.cloud_th, instant_burn = False, spread_prob = None, susceptibility = None, wind_bias = 0.0, streams = None):
+    
+    """
+    This function checks the parameters of a simulation, sets them in the config file and makes the first grid. It is used by the initialise functions,
+    and on its own to run the simulation without any figures (see the runner module).
+    
+    Args: 
+        GRID_HEIGHT (int): The grid height, default value set in the config
+        GRID_WIDTH (int): The grid width, default value set in the config
+        lightning (float): The probability that lightning, default value set in the config
+        tree_growth (float): The probability that a new tree, default value set in the config
+        istate (int): The initial state of cells, the grid always starts full of trees when there is rain
+        rain (boolean): If true, the weather is set up for a simulation with rain
+        cloud_th (float): The number above which becomes a cloud, default value set in the config
+        instant_burn (boolean): If true, lightning burns the whole cluster of trees it strikes in one frame (see grid_updater.ignite)
+        spread_prob (float or list): The probability of fire spreading to a neighbouring tree, one for every direction or 8 in the order of grid_updater.NEIGHBOURHOOD, None for certain spread
+        susceptibility (numpy array): A grid of how likely each cell is to catch fire from a burning neighbour, None for every cell the same
+        wind_bias (float): How strongly fire spreads with the wind rather than against it, 0 for no effect
+        streams (rng_streams.Streams): If given, the random numbers of every cell, the first grid and the weather come from these keyed streams instead of config.rng
+    
+    Returns:
+        (numpy array): The first grid of the simulation
+        
+    Raises:
+        ValueError: if any of the arguments are invalid. Check grid height and length are positive integers and the probability of lightning, new tree growth and cloud threshold are between 0 and 1. Also checks if istate is in 0, 1 or 2, and that the spread probabilities and susceptibilities are between 0 and 1, with one susceptibility per cell, the wind bias is not negative and the grid has at most 2**32 cells when streams are given.
+    
+    """
+    #Checks the parameters are valid for setting up the grid. 
+    #Check the grid height and width are positive and probabilities of lightning and tree growth are between 0 and 1.
+    if (GRID_HEIGHT <= 0 or GRID_WIDTH <= 0 or lightning > 1 or lightning < 0  or tree_growth > 1 or tree_growth < 0 or cloud_th > 1 or cloud_th < 0):
+        raise ValueError("Invalid values!")
+    #Check the initial state of cells are either 0, 1 or 2
+    if(istate not in [0, 1, 2]):
+        raise ValueError("Invalid initial state, only accept 0, 1 or 2!")
+    
+    #Check the spread probabilities and susceptibilities are between 0 and 1 and there is one probability or one per direction and one susceptibility per cell
+    if spread_prob is not None and (np.size(spread_prob) not in [1, 8] or np.min(spread_prob) < 0 or np.max(spread_prob) > 1):
+        raise ValueError("Invalid spread probabilities!")
+    if susceptibility is not None and (np.shape(susceptibility) != (GRID_HEIGHT, GRID_WIDTH) or np.min(susceptibility) < 0 or np.max(susceptibility) > 1):
+        raise ValueError("Invalid susceptibility grid!")
+    if wind_bias < 0:
+        raise ValueError("Invalid wind bias!")
+    #Keyed streams number the cells with one 32-bit word of their counter
+    if streams is not None and GRID_HEIGHT * GRID_WIDTH > streams.MAX_CELLS:
+        raise ValueError("Grid too large for keyed streams, must have at most 2**32 cells!")
+    
+    #Set variables according to user inputs
+    config.GRID_HEIGHT = GRID_HEIGHT
+    config.GRID_WIDTH = GRID_WIDTH
+    config.lightning = lightning
+    config.tree_growth = tree_growth
+    config.istate = config.TREE if rain else istate
+    config.instant_burn = instant_burn
+    config.spread_prob = spread_prob
+    config.susceptibility = None if susceptibility is None else np.asarray(susceptibility, dtype = float)
+    config.wind_bias = wind_bias
+    config.streams = streams
+    
+    #With keyed streams, the random numbers used to set up the run come from generators of their own, so they do not depend on config.rng
+    if streams is not None:
+        from rng_streams import SETUP, WEATHER
+        setup_rng, weather_rng = streams.generator(SETUP), streams.generator(WEATHER)
+    else:
+        setup_rng = weather_rng = config.rng
+    
+    #With rain, the weather class is initialised. It needs the cloud threshold and the number of frames to make its rain cloud
+    if rain:
+        from weather import Weather
+        config.cloud_th = cloud_th
+        config.weather = Weather(config.cloud_th, config.last_frame, GRID_WIDTH, GRID_HEIGHT, weather_rng)
+    
+    # #set up a new numpy array of the initial state of the grid height and grid width, make sure these are set as integers
+    initial_grid = np.full((GRID_HEIGHT, GRID_WIDTH), config.istate, dtype = int)
+    
+    #If the initial state is empty, set a random cell to be a tree to avoid triggering the end of the animation
+    if(config.istate == 2):
+        #Set a random index 
+        index = setup_rng.integers(GRID_HEIGHT, size = 2)
+        #Change it to list
+        index = list(index)
+        #Set the variable in config.py
+        config.index = index
+        #Set the indexed cell to 0
+        initial_grid[index[0], index[1]] = 0
+    
+    #return the first grid
+    return initial_grid
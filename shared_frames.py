@@ -0,0 +1,303 @@
+"""
+This module runs the simulation in its own process and passes the frames to the animation through a ring buffer in shared memory
+(multiprocessing.shared_memory), so drawing a frame does not hold up the simulation and the simulation does not hold up the drawing.
+
+The ring holds a few slots, each with a grid and the frame number it belongs to. The simulation process writes each new frame into the next slot,
+and the proportions of trees and fires of every frame into a table that is also in shared memory, so the graph keeps every frame even when the
+animation skips some. Nothing is pickled or sent through a pipe, the animation reads the grids straight out of the shared memory.
+
+When the simulation is faster than the animation there are two policies:
+    "drop": the simulation never waits, old slots are written over and the animation always shows the newest frame
+    "block": the simulation waits for a free slot, so the animation shows every frame in order
+
+Each slot has a sequence number which is odd while the slot is being written (a seqlock), so a reader that copies a slot while it is being
+written over can tell and read it again.
+
+Only simulations without rain can be run this way: the simulation process updates the grid with update_grid, and the rain intensity that
+animate_with_rain draws is not passed through the ring. Rain animations are run in the notebook process with animate_with_rain.
+
+Example (in a notebook):
+    >>> fig = initialise(100, 100, 0.01, 0.05)
+    >>> ring, process = start_producer(100, 100, 0.01, 0.05, frame_num = 1000)
+    >>> anim = FuncAnimation(fig, make_animate(ring), frames = 1000, interval = 20)
+    >>> ...
+    >>> stop_producer(ring, process)
+"""
+
+#Importing modules
+import time
+from multiprocessing import Process
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import config
+from animation import draw_bar_chart
+
+#The places of the counters in the header of the ring
+_WRITTEN = 0    # the number of frames written so far
+_READ = 1       # the number of frames the animation has finished with
+_DONE = 2       # 1 once the simulation has finished
+_STOP = 3       # set to 1 to ask the simulation to stop early
+_LAST_FRAME = 4 # config.last_frame of the simulation
+_BLOCK = 5      # 1 for the "block" policy, 0 for "drop"
+_HEADER_SIZE = 6
+
+POLICIES = ("drop", "block")
+
+
+class FrameRing:
+    def __init__(self, shape, slots = 8, frame_num = config.frame, policy = "drop", name = None):
+        """
+        This makes a new ring in shared memory, or attaches to one made by another process if its name is given.
+
+        Args:
+            shape (tuple): the (height, width) of the grids
+            slots (int): the number of grids the ring holds
+            frame_num (int): the number of frames of the simulation, the size of the table of proportions
+            policy (str): "drop" or "block", what the simulation does when the animation falls behind
+            name (str): the name of an existing ring to attach to
+
+        Raises:
+            ValueError: if the number of slots or the policy are invalid
+        """
+        if slots < 1:
+            raise ValueError("Invalid number of slots!")
+        if policy not in POLICIES:
+            raise ValueError("Invalid policy, only accepts 'drop' or 'block'!")
+
+        # the sizes of the parts of the shared memory: the header, a sequence number and frame number per slot, the grids and the proportions
+        height, width = shape
+        sizes = [8 * _HEADER_SIZE, 8 * slots, 8 * slots, slots * height * width, 8 * 2 * frame_num]
+        offsets = np.cumsum([0] + sizes)
+        # the grids are only a byte per cell, so the proportions after them are padded to the next multiple of 8 bytes
+        offsets[4] = -(-offsets[4] // 8) * 8
+
+        self.shape = (height, width)
+        self.slots = slots
+        self.frame_num = frame_num
+        self.created = name is None
+        self.memory = SharedMemory(create = True, size = int(offsets[4] + sizes[4])) if self.created else SharedMemory(name = name)
+        self.name = self.memory.name
+
+        buffer = self.memory.buf
+        self.header = np.ndarray((_HEADER_SIZE,), dtype = np.int64, buffer = buffer, offset = offsets[0])
+        self.sequence = np.ndarray((slots,), dtype = np.int64, buffer = buffer, offset = offsets[1])
+        self.frames = np.ndarray((slots,), dtype = np.int64, buffer = buffer, offset = offsets[2])
+        self.grids = np.ndarray((slots, height, width), dtype = np.int8, buffer = buffer, offset = offsets[3])
+        self.proportions = np.ndarray((frame_num, 2), dtype = np.float64, buffer = buffer, offset = offsets[4])
+
+        if self.created:
+            self.header[:] = 0
+            self.header[_BLOCK] = policy == "block"
+            self.header[_LAST_FRAME] = frame_num
+            self.sequence[:] = 0
+            self.frames[:] = -1
+        self.policy = POLICIES[self.header[_BLOCK]]
+
+    def publish(self, grid, frame_num, trees, fires, poll = 0.001):
+        """
+        This function writes a frame into the next slot, waiting for a free slot first with the "block" policy.
+
+        Args:
+            grid (numpy array): the grid of the frame
+            frame_num (int): the frame number
+            trees (float): the proportion of trees in the frame
+            fires (float): the proportion of trees on fire in the frame
+            poll (float): the number of seconds between checks for a free slot
+
+        Returns:
+            (boolean): false if the animation asked the simulation to stop, in which case the frame is not written
+        """
+        written = int(self.header[_WRITTEN])
+        # with the "block" policy, wait until the animation has finished with the frame in the slot
+        while self.policy == "block" and written - self.header[_READ] >= self.slots:
+            if self.header[_STOP]:
+                return False
+            time.sleep(poll)
+        if self.header[_STOP]:
+            return False
+
+        # the sequence number is odd while the slot is being written, so readers know not to trust it
+        slot = written % self.slots
+        self.sequence[slot] += 1
+        self.grids[slot] = grid
+        self.frames[slot] = frame_num
+        self.sequence[slot] += 1
+
+        # the proportions are written before the frame is counted, so every counted frame has them
+        self.proportions[frame_num] = trees, fires
+        self.header[_WRITTEN] = written + 1
+        return True
+
+    def read(self):
+        """
+        This function reads a frame the animation has not shown yet. With the "drop" policy it is the newest frame, with the "block" policy
+        it is the next frame in order.
+
+        Returns:
+            frame_num (int): the frame number, or None if there is no new frame yet
+
+            grid (numpy array): a copy of the grid of the frame, or None if there is no new frame yet
+        """
+        while True:
+            written = int(self.header[_WRITTEN])
+            read = int(self.header[_READ])
+            if written <= read:
+                return None, None
+            count = read if self.policy == "block" else written - 1
+            slot = count % self.slots
+
+            # copy the slot, then check it was not being written, or written over, while it was copied
+            before = self.sequence[slot]
+            grid = self.grids[slot].astype(int)
+            frame_num = int(self.frames[slot])
+            if before % 2 == 0 and self.sequence[slot] == before:
+                self.header[_READ] = count + 1
+                return frame_num, grid
+
+    def written(self):
+        """
+        This function returns the number of frames the simulation has written so far.
+
+        Returns:
+            (int): the number of frames written
+        """
+        return int(self.header[_WRITTEN])
+
+    def done(self):
+        """
+        This function checks if the simulation has finished.
+
+        Returns:
+            (boolean): true once the simulation has written its last frame
+        """
+        return bool(self.header[_DONE])
+
+    def last_frame(self):
+        """
+        This function returns the frame the simulation burnt out at, or its number of frames if it has not (see config.last_frame).
+
+        Returns:
+            (int): the last frame
+        """
+        return int(self.header[_LAST_FRAME])
+
+    def stop(self):
+        """
+        This function asks the simulation to stop after the frame it is on.
+        """
+        self.header[_STOP] = 1
+
+    def close(self):
+        """
+        This function detaches from the shared memory, and frees it if this ring made it. The arrays of the ring cannot be used afterwards.
+        """
+        del self.header, self.sequence, self.frames, self.grids, self.proportions
+        self.memory.close()
+        if self.created:
+            self.memory.unlink()
+
+
+def _produce(name, shape, slots, frame_num, settings, seed):
+    """
+    This function runs the simulation in the producer process and writes each frame into the ring.
+
+    Args:
+        name (str): the name of the ring
+        shape (tuple): the (height, width) of the grids
+        slots (int): the number of slots of the ring
+        frame_num (int): the number of frames to run
+        settings (dict): the arguments of runner.start
+        seed (int): the seed of the random number generator, or None for a random seed
+    """
+    #Imported here as only the producer process runs the simulation
+    from grid_updater import update_grid
+    from runner import start
+
+    ring = FrameRing(shape, slots, frame_num, name = name)
+    try:
+        config.rng = np.random.default_rng(seed)
+        grid = start(frame_num = frame_num, **settings)
+        for i in range(frame_num):
+            grid = update_grid(grid, i)
+            if not ring.publish(grid, i, config.prop_of_trees.last, config.prop_of_fires.last):
+                break
+            ring.header[_LAST_FRAME] = config.last_frame
+    finally:
+        ring.header[_DONE] = 1
+        ring.close()
+
+
+def start_producer(GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, frame_num = config.frame, istate = config.TREE, instant_burn = False, slots = 8, policy = "drop", seed = None, rain = False):
+    """
+    This function makes a ring and starts the simulation in a new process that writes its frames into it.
+
+    Args:
+        GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, istate, instant_burn: as in runner.start
+        slots (int): the number of grids the ring holds
+        policy (str): "drop" or "block", what the simulation does when the animation falls behind
+        seed (int): the seed of the simulation's random number generator, or None for a random seed
+        rain (boolean): rain is not supported (see the top of this module), kept so asking for it fails instead of running without it
+
+    Returns:
+        ring (FrameRing): the ring to read the frames from
+
+        process (multiprocessing.Process): the simulation process
+
+    Raises:
+        ValueError: if rain is asked for, or the number of slots or policy are not valid (see FrameRing)
+    """
+    if rain:
+        raise ValueError("Rain is not supported when the simulation runs in its own process, use animate_with_rain!")
+    ring = FrameRing((GRID_HEIGHT, GRID_WIDTH), slots, frame_num, policy)
+    settings = dict(GRID_HEIGHT = GRID_HEIGHT, GRID_WIDTH = GRID_WIDTH, lightning = lightning, tree_growth = tree_growth, istate = istate, instant_burn = instant_burn)
+    process = Process(target = _produce, args = (ring.name, ring.shape, slots, frame_num, settings, seed), daemon = True)
+    process.start()
+    return ring, process
+
+
+def stop_producer(ring, process, timeout = 5):
+    """
+    This function stops the simulation process, waits for it to finish and frees the ring.
+
+    Args:
+        ring (FrameRing): the ring from start_producer
+        process (multiprocessing.Process): the simulation process from start_producer
+        timeout (float): the number of seconds to wait before terminating the process
+    """
+    ring.stop()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+    ring.close()
+
+
+def make_animate(ring):
+    """
+    This function makes the function FuncAnimation calls for each frame when the simulation runs in its own process. It draws the newest frame
+    in the ring (or the next one with the "block" policy) on the figure made by setup.initialise, and keeps the last one if there is no new frame.
+
+    Args:
+        ring (FrameRing): the ring from start_producer
+
+    Returns:
+        (function): the animate function, called with the animation frame number
+    """
+    def animate(i):
+        frame_num, grid = ring.read()
+        if grid is not None:
+            config.grid_plot.set_array(grid)
+
+        #The graph shows every frame written so far, including the frames that were dropped
+        written = ring.written()
+        if written:
+            proportions = ring.proportions[:written]
+            config.line1.set_data(np.arange(written), proportions[:, 0].copy())
+            config.line2.set_data(np.arange(written), proportions[:, 1].copy())
+            draw_bar_chart(*proportions[-1])
+
+        #Return the plot for the grid and the lines we need for the graph
+        return config.grid_plot, config.line1, config.line2,
+
+    return animate
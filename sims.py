@@ -1,18 +1,15 @@
 """
-This module contains: simulation(), simulation_combine() and sim_plot(). The simulation and simulation_combine functions run the forest fire simulation. The simulation function only changes one parameter at a time, this is useful for studying the effect of one parameter on the function. The simulation_combine function can take values to change both the lightning and new tree growth probabilities, this is useful for looking at the effect of changing both these parameters. The sim_plot is used for creating graphs of these simulations: a line graph showing the changing proportion of trees on fire and alive trees, and a dynamic bar chart representing the number of cells in the grid that are empty, on fire or alive.
+This module contains: simulation(), simulation_combine(), simulation_adaptive(), simulation_combine_adaptive(), simulation_surrogate(), simulation_paired() and sim_plot(). The simulation and simulation_combine functions run the forest fire simulation. The simulation function only changes one parameter at a time, this is useful for studying the effect of one parameter on the function. The simulation_combine function can take values to change both the lightning and new tree growth probabilities, this is useful for looking at the effect of changing both these parameters. The adaptive versions of both functions repeat each value until the confidence intervals on its results are narrow enough instead of a fixed number of times, so the noisy values get more runs. The surrogate version only simulates some of the values and predicts the rest, and the paired version runs every value with the same random numbers to measure the differences between them. The sim_plot is used for creating graphs of these simulations: a line graph showing the changing proportion of trees on fire and alive trees, and a dynamic bar chart representing the number of cells in the grid that are empty, on fire or alive, with the confidence intervals shaded when they are given.
 """
 
 #Import all the needed modules
-from animation import animate, animate_with_rain
-from setup import initialise, init, reset, initialise_with_rain
 import config
+from running_stats import RunningStats
+from sweep import check_simulation_args, check_combine_args, check_adaptive_args, check_crn_args, point_settings, combine_settings, run_task
 
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from IPython.display import HTML
 
-def simulation(parameter, sim_values, times = 1, GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, frame_num = config.frame, cloud_th = config.cloud_th, rain = False):
+def simulation(parameter, sim_values, times = 1, GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, frame_num = config.frame, cloud_th = config.cloud_th, rain = False, instant_burn = False, seed = None, cache = None, crn = False, snapshots = None, settle = 50):
     """
     Runs forest fire simulation for a parameter over the specified values for specified number of times.
     Note: the parameters that are not changed will be run as specified in config.py so this should be checked before running
@@ -35,6 +32,14 @@ def simulation(parameter, sim_values, times = 1, GRID_HEIGHT = config.GRID_HEIGH
         tree_growth (float): The probability that a new tree, default value set in the config
         frame_num (int): The number of frames to run the simulation 
         rain (boolean): If true, the simulation will be run with the effect of rain, defaults to false
+        instant_burn (boolean): If true, lightning burns the whole cluster of trees it strikes in one frame instead of spreading frame by frame
+        seed (int): If given, every run is seeded from this seed, its settings and its replicate number so the results are repeatable
+        cache (ResultCache): If given with a seed, runs already stored in the cache are reused and new runs are added to it
+        crn (boolean): If true (with a seed), common random numbers are used: replicate k of every value draws the same random numbers, so the
+                       differences between values are not buried in the noise of the replicates (see simulation_paired)
+        snapshots (SnapshotLibrary): If given, every run starts from the nearest suitable snapshot of the library (or its folder) instead of a
+                                     uniform grid (see runner.warm_start), so runs measuring the steady state do not spend their frames reaching it
+        settle (int): The number of frames a snapshot is run with the new settings before each run starts
     
     Returns:
     
@@ -51,33 +56,9 @@ def simulation(parameter, sim_values, times = 1, GRID_HEIGHT = config.GRID_HEIGH
         TypeError: If any of the arguments are not of the correct data type
     
     """
-    #Checks the number of the times argument is above 0
-    if times <= 0:
-        raise ValueError("Number of times must be at least 1!")
-        
-    #Checks the simulation values are stored in a numpy array
-    elif (type(sim_values) != np.ndarray):
-        raise TypeError("Invalid simulation value type, only accepts 1D numpy array!")
-        
-    #Checks there is at least one value in the values for the testing
-    elif (sim_values.size <= 0 ):
-        raise ValueError("Must have at least one value in simualation values!")
-        
-    #Checks the paramater value is valid (either 0, 1, 2 or 3)    
-    elif (parameter > 3 or parameter < 0):
-        raise ValueError("Invalid parameter values, see documentation.")
-        
-    #Check the grid height and width are positive and probabilities of lightning and tree growth are between 0 and 1.
-    elif (GRID_HEIGHT <= 0 or GRID_WIDTH <= 0 or lightning > 1 or lightning < 0  or tree_growth > 1 or tree_growth < 0):
-        raise ValueError("Invalid values!")
-        
-    #If parameter is 3 (simulating rain) and rain is false, raises an error, 
-    elif (parameter == 3 and rain == False):
-        raise ValueError("Conflicting rain argument!")
-        
-    #If the frame number is smaller than 1, raise an error
-    elif(frame_num < 1):
-        raise ValueError("Invalid frame number, frame number must be at least 1!")
+    #Checks the arguments are valid before running anything
+    check_simulation_args(parameter, sim_values, times, GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, rain)
+    check_crn_args(crn, seed, snapshots)
     
     #Creates two empty arrays
     #This first array will store the proportion of the grid that are still alive trees for each value in the parameter. A mean is taken for
@@ -90,92 +71,16 @@ def simulation(parameter, sim_values, times = 1, GRID_HEIGHT = config.GRID_HEIGH
     #Iterate over each value in the simulation values so each one is tested.
     for param in list(sim_values):
         
-        #Set empty list for this value
-        #This array will store the proportion of the grid that are still trees in each simulation for one value when the simulation has
-        #ended. This can either be ending by the grid burning out or the max number of frames is reached.
-        remaining_trees_per_sim = []  
-        #This array will store the number of the last frame that the simulation ends on. This can either be when the simulation burns out
-        #or when the max number of frames has ended.
-        last_frame_per_sim = [] 
-
-        #Repeat this simulation the number of times set as specified in the "times" argument
-        for time in range(times):
-            
-            #Reset the variables in config.py
-            reset() 
-            
-            #Change the frame number and last_frame in config.py    
-            config.frame = frame_num
-            config.last_frame = frame_num
-
-            #If rain effect is not activated
-            if(rain == False):
-
-                #Checks which parameter is to be tested and sets the appropriate parameter.
-                #If it is 0: in the initialize function set tree growth to be the value in the list
-                if (parameter == 0):
-                    fig = initialise(tree_growth = param, GRID_HEIGHT = GRID_HEIGHT, GRID_WIDTH = GRID_WIDTH, lightning = lightning)
-
-                #If it is 1: in the initialize function set to lightning to be the value in the list
-                elif (parameter == 1):
-                    fig = initialise(lightning = param, GRID_HEIGHT = GRID_HEIGHT, GRID_WIDTH = GRID_WIDTH, tree_growth = tree_growth)
-
-                #If it is 2: in the initialize function set it to grid height and width
-                #Note: as this grid is a square only one value is used for both grid height, grid width
-                elif (parameter == 2):
-                    fig = initialise(GRID_HEIGHT = param, GRID_WIDTH = param, lightning = lightning, tree_growth = tree_growth)
-            
-                #Run the FuncAnimation function from the MatPlot Library (see packages imported) using the appropriate parameters
-                #Fig makes sure the output is placed in a figure
-                #animate_with_rain calls the animate_with_rain function (see modules imported)
-                #the number of frames is set to the value declared in the config module
-                #Interval of 1 to proceed through the animation faster
-                #The init function (see the init module) is called first to set up the plot.
-                anim = FuncAnimation(fig, animate, frames=config.frame, interval=1, init_func = init)
-                #Display this in HTML
-                HTML(anim.to_jshtml())
-            
-            #If rain is in effect
-            else:
-                
-                #Checks which parameter is to be tested and sets the appropriate parameter.
-                #If it is 0: in the initialize function set tree growth to be the value in the list
-                if (parameter == 0):
-                    fig = initialise_with_rain(tree_growth = param, GRID_HEIGHT = GRID_HEIGHT, GRID_WIDTH = GRID_WIDTH, lightning = lightning, cloud_th = cloud_th)
-
-                #If it is 1: in the initialize function set to lightning to be the value in the list
-                elif (parameter == 1):
-                    fig = initialise_with_rain(lightning = param, GRID_HEIGHT = GRID_HEIGHT, GRID_WIDTH = GRID_WIDTH, tree_growth = tree_growth, cloud_th = cloud_th)
-
-                #If it is 2: in the initialize function set it to grid height and width
-                #Note: as this grid is a square only one value is used for both grid height, grid width
-                elif (parameter == 2):
-                    fig = initialise_with_rain(GRID_HEIGHT = param, GRID_WIDTH = param, lightning = lightning, tree_growth = tree_growth, cloud_th = cloud_th)
-            
-                #If it is 3 set it to cloud threshold 
-                elif (parameter == 3):
-                    fig = initialise_with_rain(cloud_th = 1-param, GRID_HEIGHT = GRID_HEIGHT, GRID_WIDTH = GRID_WIDTH, lightning = lightning, tree_growth = tree_growth)
-                # we do 1 minus the cloud threshold so we can plot the rain probability and the trend is easier to interoperate
-                #Run the FuncAnimation function from the MatPlot Library (see packages imported) using the appropriate parameters
-                #Fig makes sure the output is placed in a figure
-                #animate calls the animate function (see modules imported)
-                #the number of frames is set to the value declared in the config module
-                #Interval of 1 to proceed through the animation faster
-                #The init function (see the init module) is called first to set up the plot.
-                anim = FuncAnimation(fig, animate_with_rain, frames=config.frame, interval=1, init_func = init)
-                #Display this in HTML
-                HTML(anim.to_jshtml())
-            
-            #Set the remaining trees to be the proportion of alive trees in the last frame. This value is appended to the array storing the
-            #number of remaining trees in the simulations
-            remaining_trees_per_sim.append(config.prop_of_trees[-1])
-            #Set the last frame in a simulation and add this to the array storing number of the last frames.
-            last_frame_per_sim.append(config.last_frame)
+        #Work out the settings of the simulation for this value of the parameter
+        settings = point_settings(parameter, param, GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, cloud_th, rain, instant_burn)
+        
+        #Repeat this simulation the number of times set as specified in the "times" argument, the running statistics keep the mean of the
+        #remaining trees and last frame of the simulations for this value
+        tree_stats, frame_stats = _run_point(settings, times, seed = seed, cache = cache, crn = crn, snapshots = snapshots, settle = settle)
         
-        #There is now an array for one value in the parameter list. A mean of each list is then taken to find the mean number of trees 
-        #remaining and mean value for the last frame. This value is then appended to the arrays containing the mean for each value.
-        mean_remaining_trees.append(np.mean(np.array(remaining_trees_per_sim)))
-        mean_last_frame.append(np.mean(np.array(last_frame_per_sim)))
+        #The mean number of trees remaining and mean value for the last frame are appended to the arrays containing the mean for each value.
+        mean_remaining_trees.append(tree_stats.mean)
+        mean_last_frame.append(frame_stats.mean)
     
 
     #Return the mean remaining tree number and mean last frame lists.
@@ -185,7 +90,7 @@ def simulation(parameter, sim_values, times = 1, GRID_HEIGHT = config.GRID_HEIGH
 
 
 
-def simulation_combine(light_values, tree_values, times = 1, frame_num = config.frame):
+def simulation_combine(light_values, tree_values, times = 1, frame_num = config.frame, instant_burn = False, seed = None, cache = None, crn = False, snapshots = None, settle = 50):
     """
     Runs forest fire simulation over specified values for the specified number of times. Each lightning probability is tested against each new
     tree value for the number of times specified.
@@ -199,6 +104,8 @@ def simulation_combine(light_values, tree_values, times = 1, frame_num = config.
         times : (int) number of times to repeat the simulation, defaults to 10
         
         frame_num (int): The number of frames to run simulation 
+        
+        instant_burn, seed, cache, crn, snapshots, settle : as in simulation()
     
     Returns:
     
@@ -218,30 +125,9 @@ def simulation_combine(light_values, tree_values, times = 1, frame_num = config.
     
     """
     
-    #Checks the number of the times argument is above 0
-    if times <= 0:
-        raise ValueError("Number of times must be at least 1!")
-        
-    #Checks the simulation values are stored in a numpy array
-    elif (type(light_values) != np.ndarray):
-        raise TypeError("Invalid simulation value type, only accepts 1D numpy array!")
-        
-    #Checks there is at least one value in the values for the testing
-    elif (light_values.size <= 0 ):
-        raise ValueError("Must have at least one value in simualation values!")
-        
-    #Checks the simulation values are stored in a numpy array
-    elif (type(tree_values) != np.ndarray):
-        raise TypeError("Invalid simulation value type, only accepts 1D numpy array!")
-        
-    #Checks there is at least one value in the values for the testing
-    elif (tree_values.size <= 0 ):
-        raise ValueError("Must have at least one value in simualation values!")
-    
-    #If the frame number is smaller than 1, raise an error
-    elif(frame_num < 1):
-        raise ValueError("Invalid frame number, frame number must be at least 1!")
-        
+    #Checks the arguments are valid before running anything
+    check_combine_args(light_values, tree_values, times, frame_num)
+    check_crn_args(crn, seed, snapshots)
     
     #Creates two empty arrays
     #This first array will store the proportion of the grid that are still alive trees for each value in parameter. A mean is taken for
@@ -259,48 +145,15 @@ def simulation_combine(light_values, tree_values, times = 1, frame_num = config.
         #for each value in the lightning list iterate over the new tree probability list and test each one.
         for tree_value in list(tree_values):
         
-            #Set empty list for this value
-            remaining_trees_per_sim = []  
-            last_frame_per_sim = [] 
+            #Set the probabilities of new tree growth and lightning to be the values specified in the lists
+            settings = combine_settings(lightning_value, tree_value, frame_num, instant_burn)
                     
             #Repeat this simulation the number of times set as specified in the "times" argument
-            for time in range(times):
-            
-                #Reset the variables in config.py
-                reset()             
-                
-                #Change the frame number in config.py    
-                config.frame = frame_num 
-                config.last_frame = frame_num
-            
-                #Set the probabilities of new tree growth and lightning to be the values specified in the lists using the initialize
-                #function (see the initialize module)
-                fig = initialise(tree_growth = tree_value, lightning = lightning_value)
-                
-            
-                #Run the FuncAnimation function from the MatPlot Library (see packages imported) using the appropriate parameters
-                #Fig makes sure the output is placed in a figure
-                #animate calls the animate function (see modules imported)
-                #the number of frames is set to the value declared in config module
-                #Interval of 1 to proceed through the animation faster
-                #The init function (see the init module) is called first to set up the plot.
-                anim = FuncAnimation(fig, animate, frames=config.frame, interval=1, init_func = init)
-                #Display this in HTML so can be displayed in a Jupiter Notebook
-                HTML(anim.to_jshtml())
-            
-            
-                #Set the remaining trees to be the proportion of alive trees in the last frame. This value is appended to the array storing
-                #the number of remaining of trees in the simulations
-                remaining_trees_per_sim.append(config.prop_of_trees[-1])
-                #Set the last frame in a simulation and add this to the array storing number of the last frames.
-                last_frame_per_sim.append(config.last_frame)
-                
+            tree_stats, frame_stats = _run_point(settings, times, seed = seed, cache = cache, crn = crn, snapshots = snapshots, settle = settle)
                 
-                
-            #There is now an array for set of conditions. A mean of each list is then taken to find the mean number of trees 
-            #remaining and mean value for the last frame. This value is then appended to the arrays containing the mean for each value.
-            mean_remaining_trees.append(np.mean(np.array(remaining_trees_per_sim)))
-            mean_last_frame.append(np.mean(np.array(last_frame_per_sim)))
+            #The mean number of trees remaining and mean value for the last frame are appended to the arrays containing the mean for each value.
+            mean_remaining_trees.append(tree_stats.mean)
+            mean_last_frame.append(frame_stats.mean)
             #The condition tested is then appended to the list of conditions
             condition.append((lightning_value, tree_value))
     
@@ -311,7 +164,266 @@ def simulation_combine(light_values, tree_values, times = 1, frame_num = config.
 
 
 
-def sim_plot(sim_values, rem_trees, last_frame, x_axis):
+def simulation_adaptive(parameter, sim_values, ci_width = 0.05, min_times = 3, max_times = 50, z = 1.96, GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, frame_num = config.frame, cloud_th = config.cloud_th, rain = False, instant_burn = False, seed = None, cache = None, crn = False, snapshots = None, settle = 50):
+    """
+    Runs forest fire simulation for a parameter over the specified values, repeating each value until the confidence intervals on its
+    results are narrow enough. Noisy values get more replicates and quiet values stop early, instead of every value being run the same
+    number of times as in simulation().
+    
+    Args:
+    
+        parameter : (int) the parameter to be changed in the simulation, see simulation()
+        
+        sim_values : (numpy ndarray) a 1D array corresponding to the probabilities/values of the parameter(s) to be used in simulation
+        
+        ci_width : (float) the target full width of the confidence intervals. The interval on remaining trees is a proportion of the grid
+                   and the interval on last frame is measured as a proportion of frame_num, both must be narrower than this to stop
+        
+        min_times : (int) the minimum number of times to run each value, must be at least 2 to estimate a confidence interval
+        
+        max_times : (int) the maximum number of times to run each value, even if the intervals are still too wide
+        
+        z : (float) the critical value of the confidence intervals, defaults to 1.96 for 95% intervals
+        
+        GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, cloud_th, rain, instant_burn, seed, cache, crn, snapshots, settle: as in simulation()
+    
+    Returns:
+    
+        mean_remaining_trees : (list) the mean remaining number of trees for each value in sim_values
+        
+        mean_last_frame : (list) the mean last frame number for each value in sim_values
+        
+        trees_ci : (list) the half width of the confidence interval on the remaining trees for each value in sim_values
+        
+        last_frame_ci : (list) the half width of the confidence interval on the last frame for each value in sim_values
+        
+        runs : (list) the number of times each value in sim_values was run
+                            
+    Raises:
+    
+        ValueError: If any of the arguments are of the correct type but not a valid value
+        
+        TypeError: If any of the arguments are not of the correct data type
+    
+    """
+    #Checks the arguments shared with simulation() and then the replicate bounds
+    check_simulation_args(parameter, sim_values, max_times, GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, rain)
+    check_adaptive_args(ci_width, min_times, max_times)
+    check_crn_args(crn, seed, snapshots)
+    
+    #Lists to store the means, interval half widths and number of runs for each value
+    mean_remaining_trees = []
+    mean_last_frame = []
+    trees_ci = []
+    last_frame_ci = []
+    runs = []
+    
+    #Iterate over each value in the simulation values so each one is tested.
+    for param in list(sim_values):
+        
+        #Run this value until its intervals are narrow enough or max_times is reached
+        settings = point_settings(parameter, param, GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, cloud_th, rain, instant_burn)
+        tree_stats, frame_stats = _run_point(settings, min_times, ci_width, max_times, z, seed, cache, crn, snapshots, settle)
+        
+        mean_remaining_trees.append(tree_stats.mean)
+        mean_last_frame.append(frame_stats.mean)
+        trees_ci.append(tree_stats.ci_halfwidth(z))
+        last_frame_ci.append(frame_stats.ci_halfwidth(z))
+        runs.append(tree_stats.count)
+    
+    return mean_remaining_trees, mean_last_frame, trees_ci, last_frame_ci, runs
+
+
+
+
+def simulation_combine_adaptive(light_values, tree_values, ci_width = 0.05, min_times = 3, max_times = 50, z = 1.96, frame_num = config.frame, instant_burn = False, seed = None, cache = None, crn = False, snapshots = None, settle = 50):
+    """
+    Runs forest fire simulation over every combination of lightning and new tree values like simulation_combine(), but repeats each
+    combination until the confidence intervals on its results are narrow enough (see simulation_adaptive()).
+    
+    Args:
+    
+        light_values : (numpy ndarray) a 1D array corresponding to the probabilities/values of lightning to be used in the simulation
+        
+        tree_values : (numpy ndarray) a 1D array corresponding to the probabilities/values of new tree growth to be used in the simulation
+        
+        ci_width, min_times, max_times, z : as in simulation_adaptive()
+        
+        frame_num (int): The number of frames to run simulation 
+        
+        instant_burn, seed, cache, crn, snapshots, settle : as in simulation()
+    
+    Returns:
+    
+        mean_remaining_trees : (list) the mean remaining number of trees for each combination
+        
+        mean_last_frame : (list) the mean last frame number for each combination
+        
+        trees_ci : (list) the half width of the confidence interval on the remaining trees for each combination
+        
+        last_frame_ci : (list) the half width of the confidence interval on the last frame for each combination
+        
+        runs : (list) the number of times each combination was run
+                 
+        condition: (list) a list of pairs of values representing the lightning and new tree probabilities used as (lightning, new tree)
+                            
+    Raises:
+    
+        ValueError: If any of the arguments are of the correct type but not a valid value
+        
+        TypeError: If any of the arguments are not of the correct data type
+    
+    """
+    check_combine_args(light_values, tree_values, max_times, frame_num)
+    check_adaptive_args(ci_width, min_times, max_times)
+    check_crn_args(crn, seed, snapshots)
+    
+    mean_remaining_trees = []
+    mean_last_frame = []
+    trees_ci = []
+    last_frame_ci = []
+    runs = []
+    condition = []
+    
+    #Test each lightning value against each new tree value
+    for lightning_value in list(light_values):
+        for tree_value in list(tree_values):
+            
+            settings = combine_settings(lightning_value, tree_value, frame_num, instant_burn)
+            tree_stats, frame_stats = _run_point(settings, min_times, ci_width, max_times, z, seed, cache, crn, snapshots, settle)
+            
+            mean_remaining_trees.append(tree_stats.mean)
+            mean_last_frame.append(frame_stats.mean)
+            trees_ci.append(tree_stats.ci_halfwidth(z))
+            last_frame_ci.append(frame_stats.ci_halfwidth(z))
+            runs.append(tree_stats.count)
+            condition.append((lightning_value, tree_value))
+    
+    return mean_remaining_trees, mean_last_frame, trees_ci, last_frame_ci, runs, condition
+
+
+def simulation_surrogate(parameter, sim_values, times = 1, initial = 3, budget = None, tol = 0.05, GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, frame_num = config.frame, cloud_th = config.cloud_th, rain = False, instant_burn = False, seed = None, cache = None, crn = False, snapshots = None, settle = 50):
+    """
+    Runs forest fire simulation for a parameter over only some of the specified values, and predicts the results at the others with a Gaussian
+    process (see the surrogate module). The values simulated are picked one at a time, each time the value whose prediction is least certain,
+    so a usable curve needs far fewer values simulated than simulation().
+    
+    Args:
+    
+        parameter, sim_values, times : as in simulation(), each value that is simulated is run times times
+        
+        initial : (int) the number of values, evenly spread, simulated before the first prediction
+        
+        budget : (int) the most values to simulate, defaults to all of them
+        
+        tol : (float) stop once no prediction has a standard deviation above this, for the remaining trees and for the last frame as a
+              proportion of frame_num
+        
+        GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, cloud_th, rain, instant_burn, seed, cache, crn, snapshots, settle: as in simulation()
+    
+    Returns:
+    
+        mean_remaining_trees : (list) the mean remaining number of trees for each value in sim_values, simulated or predicted
+        
+        mean_last_frame : (list) the mean last frame number for each value in sim_values, simulated or predicted
+        
+        trees_sd : (list) the standard deviation of each prediction of the remaining trees, 0 for the values simulated
+        
+        last_frame_sd : (list) the standard deviation of each prediction of the last frame, 0 for the values simulated
+        
+        simulated : (list) true for the values that were simulated
+                            
+    Raises:
+    
+        ValueError: If any of the arguments are of the correct type but not a valid value
+        
+        TypeError: If any of the arguments are not of the correct data type
+    
+    """
+    #Imported here as the other simulation functions do not need it
+    from surrogate import active_sweep
+    
+    #Checks the arguments are valid before running anything
+    check_simulation_args(parameter, sim_values, times, GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, rain)
+    check_crn_args(crn, seed, snapshots)
+    
+    def run(index):
+        #Run a value the same way as simulation() does, so the values simulated give the same results
+        settings = point_settings(parameter, sim_values[index], GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, cloud_th, rain, instant_burn)
+        tree_stats, frame_stats = _run_point(settings, times, seed = seed, cache = cache, crn = crn, snapshots = snapshots, settle = settle)
+        return tree_stats.mean, frame_stats.mean
+    
+    means, stds, simulated = active_sweep(sim_values, run, (1, frame_num), initial, budget, tol)
+    return list(means[:, 0]), list(means[:, 1]), list(stds[:, 0]), list(stds[:, 1]), list(simulated)
+
+
+def simulation_paired(parameter, sim_values, times = 10, z = 1.96, GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, lightning = config.lightning, tree_growth = config.tree_growth, frame_num = config.frame, cloud_th = config.cloud_th, rain = False, instant_burn = False, seed = 0, cache = None):
+    """
+    Runs forest fire simulation for a parameter over the specified values with common random numbers, and works out the differences between
+    neighbouring values replicate by replicate. Replicate k of every value draws the same random number for each cell, frame and purpose (see
+    sweep.run_task()), so the runs of neighbouring values are positively correlated and the confidence intervals on their paired differences are
+    much narrower than those on the differences of independent runs.
+    
+    Args:
+    
+        parameter, sim_values, times : as in simulation()
+        
+        z : (float) the critical value of the confidence intervals, defaults to 1.96 for 95% intervals
+        
+        GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, cloud_th, rain, instant_burn, cache: as in simulation()
+        
+        seed : (int) the seed of the common random numbers
+    
+    Returns:
+    
+        mean_remaining_trees : (list) the mean remaining number of trees for each value in sim_values
+        
+        mean_last_frame : (list) the mean last frame number for each value in sim_values
+        
+        trees_diff : (list) the mean difference in remaining trees between each value and the one before it, one shorter than sim_values
+        
+        trees_diff_ci : (list) the half width of the confidence interval on each difference in remaining trees
+        
+        last_frame_diff : (list) the mean difference in last frame between each value and the one before it
+        
+        last_frame_diff_ci : (list) the half width of the confidence interval on each difference in last frame
+                            
+    Raises:
+    
+        ValueError: If any of the arguments are of the correct type but not a valid value, or times is below 2
+        
+        TypeError: If any of the arguments are not of the correct data type
+    
+    """
+    #Checks the arguments are valid before running anything, at least 2 replicates are needed for the intervals
+    check_simulation_args(parameter, sim_values, times, GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, rain)
+    check_crn_args(True, seed)
+    if times < 2:
+        raise ValueError("Number of times must be at least 2 for paired differences!")
+    
+    #The results of every replicate of every value are kept, as each replicate is paired with the same replicate of the next value
+    results = np.zeros((len(sim_values), times, 2))
+    for i, param in enumerate(list(sim_values)):
+        settings = point_settings(parameter, param, GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, cloud_th, rain, instant_burn)
+        for replicate in range(times):
+            results[i, replicate] = run_task(settings, seed, replicate, cache, crn = True)
+    
+    #The statistics of the differences between each value and the one before it, replicate by replicate
+    trees_diff, trees_diff_ci, last_frame_diff, last_frame_diff_ci = [], [], [], []
+    for before, after in zip(results[:-1], results[1:]):
+        tree_stats, frame_stats = RunningStats(), RunningStats()
+        for (trees_before, frame_before), (trees_after, frame_after) in zip(before, after):
+            tree_stats.update(trees_after - trees_before)
+            frame_stats.update(frame_after - frame_before)
+        trees_diff.append(tree_stats.mean)
+        trees_diff_ci.append(tree_stats.ci_halfwidth(z))
+        last_frame_diff.append(frame_stats.mean)
+        last_frame_diff_ci.append(frame_stats.ci_halfwidth(z))
+    
+    return list(results[:, :, 0].mean(axis = 1)), list(results[:, :, 1].mean(axis = 1)), trees_diff, trees_diff_ci, last_frame_diff, last_frame_diff_ci
+
+
+def sim_plot(sim_values, rem_trees, last_frame, x_axis, rem_trees_ci = None, last_frame_ci = None):
     """
     This function plots the proportion of trees in the last frame and the number of frames in the simulation and is used after the simulation function to visualise the results.
     
@@ -324,6 +436,10 @@ def sim_plot(sim_values, rem_trees, last_frame, x_axis):
         
         x_axis: (string) label for the x axis of the plot
         
+        rem_trees_ci: (list) optional half widths of the confidence intervals on rem_trees (see simulation_adaptive), drawn as a shaded band
+        
+        last_frame_ci: (list) optional half widths of the confidence intervals on last_frame, drawn as a shaded band
+        
     
     Raises:
         Type Error: An incorrect data type is passed into the parameters, simulation values must be added as a numpy array.
@@ -340,6 +456,13 @@ def sim_plot(sim_values, rem_trees, last_frame, x_axis):
     elif (sim_values.size != len(rem_trees) or sim_values.size != len(last_frame)):
         raise ValueError("Arguments are of differen size/lengths!")
     
+    #Checks the confidence intervals, if given, match the values they belong to
+    elif ((rem_trees_ci is not None and len(rem_trees_ci) != sim_values.size) or (last_frame_ci is not None and len(last_frame_ci) != sim_values.size)):
+        raise ValueError("Arguments are of differen size/lengths!")
+    
+    
+    #matplotlib is only loaded when something is plotted
+    import matplotlib.pyplot as plt
     
     #Creates two subplots and sets the figure size to be 12x5
     size_sim, axes = plt.subplots(1, 2, sharex = True, figsize = (12, 5))
@@ -347,6 +470,9 @@ def sim_plot(sim_values, rem_trees, last_frame, x_axis):
     #For the first plot:
     #Plot the simulation values against the list of values contaning the remaining trees
     axes[0].plot(list(sim_values), rem_trees)
+    #Shade the confidence interval around the line if one was given
+    if rem_trees_ci is not None:
+        axes[0].fill_between(list(sim_values), np.array(rem_trees) - np.array(rem_trees_ci), np.array(rem_trees) + np.array(rem_trees_ci), alpha = 0.3)
     #Add a title to the plot
     axes[0].set_title("No. of remaining trees in last frame")
     #Set the y axis label
@@ -355,6 +481,9 @@ def sim_plot(sim_values, rem_trees, last_frame, x_axis):
     #For the second plot:
     #Plot the simulation values against the list of values containing the last frame numbers
     axes[1].plot(list(sim_values), last_frame)
+    #Shade the confidence interval around the line if one was given
+    if last_frame_ci is not None:
+        axes[1].fill_between(list(sim_values), np.array(last_frame) - np.array(last_frame_ci), np.array(last_frame) + np.array(last_frame_ci), alpha = 0.3)
     #Add a title to the plot
     axes[1].set_title("No. of frames in simulation")
     #Set the y axis label
@@ -366,3 +495,65 @@ def sim_plot(sim_values, rem_trees, last_frame, x_axis):
     
     #Display the plot
     plt.show()
+
+
+
+
+def _run_point(settings, times, ci_width = None, max_times = None, z = 1.96, seed = None, cache = None, crn = False, snapshots = None, settle = 50):
+    """
+    Runs the simulation with the given settings repeatedly and keeps running statistics of the results.
+    
+    Args:
+    
+        settings : (dict) the settings of the simulation, see sweep.point_settings()
+        
+        times : (int) the number of times to run the simulation, or the minimum number of times if ci_width is given
+        
+        ci_width : (float) if given, keep running until the full width of both confidence intervals is below this value (the last frame
+                   interval is measured as a proportion of frame_num), or until max_times runs
+        
+        max_times : (int) the maximum number of times to run the simulation when ci_width is given
+        
+        z : (float) the critical value of the confidence intervals
+        
+        seed : (int) if given, each run is seeded from the seed, the settings and the replicate number
+        
+        cache : (ResultCache) if given with a seed, reuse runs stored in the cache and store new runs in it
+        
+        crn : (boolean) if true, use common random numbers, see sweep.run_task()
+        
+        snapshots, settle : if snapshots is given, each run starts from its nearest suitable snapshot, see sweep.run_task()
+    
+    Returns:
+    
+        tree_stats : (RunningStats) the statistics of the proportion of trees remaining in the last frame
+        
+        frame_stats : (RunningStats) the statistics of the last frame number
+    """
+    tree_stats = RunningStats()
+    frame_stats = RunningStats()
+    
+    while True:
+        
+        #Run the simulation once (or take it from the cache), this is the replicate numbered by the runs done so far
+        remaining_trees, last_frame = run_task(settings, seed, tree_stats.count, cache, crn, snapshots, settle)
+        
+        #Add the results to the statistics
+        tree_stats.update(remaining_trees)
+        frame_stats.update(last_frame)
+        
+        #Always run at least the number of times asked for
+        if tree_stats.count < times:
+            continue
+        
+        #With a fixed number of times, or when the maximum is reached, stop
+        if ci_width is None or tree_stats.count >= max_times:
+            break
+        
+        #Otherwise stop once both intervals are narrower than the target
+        trees_width = 2 * tree_stats.ci_halfwidth(z)
+        frame_width = 2 * frame_stats.ci_halfwidth(z) / settings["frame_num"]
+        if trees_width <= ci_width and frame_width <= ci_width:
+            break
+    
+    return tree_stats, frame_stats
@@ -0,0 +1,146 @@
+"""
+This module keeps a library of snapshots of simulations that have run long enough to settle into their steady state, so new runs can start
+from one instead of from the uniform grid of setup.configure. Each snapshot is a checkpoint (see the checkpoint module) of a run at one
+(lightning, tree_growth, grid size, rain) setting after burn_in frames, with its random number generator state and weather.
+
+A run started from a snapshot (see runner.warm_start) uses the nearest snapshot with the same grid size, rain and instant burn, runs a few
+frames with its own settings to settle again, and then starts counting its frames. Runs measuring the steady state no longer spend most of
+their frames getting to it.
+
+The library is a folder with a snapshot file per setting and an index.json file listing the settings of each.
+
+Example:
+    >>> library = SnapshotLibrary("snapshots")
+    >>> library.build([(0.01, 0.05), (0.02, 0.05)], burn_in = 1000, GRID_HEIGHT = 100, GRID_WIDTH = 100, seed = 1)
+    >>> run_replicate(100, 100, 0.012, 0.05, frame_num = 200, snapshots = library)
+"""
+
+#Importing modules
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import config
+from checkpoint import save_checkpoint
+from runner import advance, start
+
+#The settings that must be the same for a snapshot to be used, the lightning and tree_growth only need to be close
+EXACT = ("GRID_HEIGHT", "GRID_WIDTH", "rain", "instant_burn", "model_version")
+
+
+class SnapshotLibrary:
+    def __init__(self, folder):
+        """
+        This opens a library of snapshots, making its folder if it does not exist.
+
+        Args:
+            folder (str): the folder the snapshots are kept in
+        """
+        self.folder = folder
+        os.makedirs(folder, exist_ok = True)
+        self.index_path = os.path.join(folder, "index.json")
+        # the settings of each snapshot, with the name of its file
+        self.entries = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.entries = json.load(f)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _write_index(self):
+        # write to a temporary file and replace the index with it in one step, as the checkpoints are written
+        handle, temp_path = tempfile.mkstemp(dir = self.folder, suffix = ".tmp")
+        with os.fdopen(handle, "w") as f:
+            json.dump(self.entries, f, indent = 1)
+        os.replace(temp_path, self.index_path)
+
+    def add(self, grid, burn_in, rain = False):
+        """
+        This function adds the simulation in config.py as a snapshot, replacing any snapshot of the same settings.
+
+        Args:
+            grid (numpy array): the grid of the last frame run
+            burn_in (int): the number of frames the simulation has run
+            rain (boolean): If true, the simulation is being run with rain
+
+        Returns:
+            (dict): the entry of the snapshot in the index
+        """
+        entry = {"GRID_HEIGHT": config.GRID_HEIGHT, "GRID_WIDTH": config.GRID_WIDTH, "lightning": float(config.lightning),
+                 "tree_growth": float(config.tree_growth), "rain": rain, "instant_burn": config.instant_burn, "cloud_th": config.cloud_th,
+                 "model_version": config.MODEL_VERSION, "burn_in": burn_in}
+        # the file is named by a hash of the settings, so the same settings always go in the same file
+        name = hashlib.sha256(json.dumps({key: entry[key] for key in EXACT + ("lightning", "tree_growth")}, sort_keys = True).encode()).hexdigest()
+        entry["file"] = name[:16] + ".npz"
+        save_checkpoint(os.path.join(self.folder, entry["file"]), grid, burn_in, rain)
+        # a hash of what was written, so a snapshot rebuilt in the same file is told apart from the one it replaced (see sweep.run_key)
+        with open(os.path.join(self.folder, entry["file"]), "rb") as f:
+            entry["digest"] = hashlib.sha256(f.read()).hexdigest()
+
+        self.entries = [other for other in self.entries if other["file"] != entry["file"]] + [entry]
+        self._write_index()
+        return entry
+
+    def build(self, points, burn_in = 1000, GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH, rain = False, cloud_th = config.cloud_th, instant_burn = False, seed = None):
+        """
+        This function runs a simulation at each (lightning, tree_growth) point for burn_in frames and adds it as a snapshot.
+
+        Args:
+            points (list): the (lightning, tree_growth) of each snapshot
+            burn_in (int): the number of frames to run before the snapshot is taken
+            GRID_HEIGHT, GRID_WIDTH, rain, cloud_th, instant_burn: as in runner.start
+            seed (int): if given, the run of each point is seeded from the seed and its point, so the library is repeatable. config.rng is
+                        put back afterwards
+
+        Returns:
+            (list): the entries of the snapshots added
+        """
+        entries = []
+        rng = config.rng
+        try:
+            for n, (lightning, tree_growth) in enumerate(points):
+                if seed is not None:
+                    config.rng = np.random.default_rng([seed, n])
+                grid = start(GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, burn_in, rain = rain, cloud_th = cloud_th, instant_burn = instant_burn)
+                grid = advance(grid, 0, burn_in, rain)
+                entries.append(self.add(grid, burn_in, rain))
+        finally:
+            config.rng = rng
+        return entries
+
+    def nearest(self, GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, rain = False, instant_burn = False, max_distance = None):
+        """
+        This function finds the snapshot with the closest lightning and tree_growth to a setting, among the snapshots with the same grid size,
+        rain, instant burn and model version.
+
+        Args:
+            GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, rain, instant_burn: the settings of the run
+            max_distance (float): the furthest (in lightning and tree_growth together) a snapshot may be, None for no limit
+
+        Returns:
+            (dict): the entry of the snapshot, or None if no snapshot is suitable
+        """
+        wanted = {"GRID_HEIGHT": GRID_HEIGHT, "GRID_WIDTH": GRID_WIDTH, "rain": rain, "instant_burn": instant_burn, "model_version": config.MODEL_VERSION}
+        best, best_distance = None, np.inf
+        for entry in self.entries:
+            if any(entry[key] != wanted[key] for key in EXACT):
+                continue
+            distance = np.hypot(entry["lightning"] - lightning, entry["tree_growth"] - tree_growth)
+            if distance < best_distance and (max_distance is None or distance <= max_distance):
+                best, best_distance = entry, distance
+        return best
+
+    def path(self, entry):
+        """
+        This function returns the file of a snapshot.
+
+        Args:
+            entry (dict): the entry of the snapshot, from nearest
+
+        Returns:
+            (str): the checkpoint file of the snapshot
+        """
+        return os.path.join(self.folder, entry["file"])
@@ -0,0 +1,165 @@
+"""
+This module contains the GaussianProcess class, a cheap regression of the results of a sweep, and active_sweep, which uses it to pick the points
+worth simulating. The Gaussian process is fitted to the points already simulated and predicts the results at the others with an uncertainty,
+so a response curve can be drawn from a few simulations. active_sweep simulates the point whose prediction is least certain, fits again and
+repeats, until the predictions are certain enough or the budget of points is used (see sims.simulation_surrogate).
+
+The Gaussian process uses a squared exponential (RBF) kernel on the points scaled to [0, 1]. Its length scale and the noise of the results are
+picked by the marginal likelihood from a grid of values, the variance of the kernel is then given by its closed form, so only numpy is needed.
+"""
+
+#Importing modules
+import numpy as np
+
+#The length scales (on points scaled to [0, 1]) and the noise variances (as a proportion of the kernel variance) tried when fitting
+LENGTHSCALES = np.logspace(-1.5, 0.5, 21)
+NOISES = np.logspace(-6, 0, 13)
+
+
+class GaussianProcess:
+    def __init__(self, lengthscales = LENGTHSCALES, noises = NOISES):
+        """
+        This makes a Gaussian process that has not been fitted yet.
+
+        Args:
+            lengthscales (numpy array): the length scales of the kernel to try, on points scaled to [0, 1]
+            noises (numpy array): the noise variances to try, as a proportion of the variance of the kernel
+        """
+        self.lengthscales = np.asarray(lengthscales, dtype = float)
+        self.noises = np.asarray(noises, dtype = float)
+        # the values picked by fit, and the log marginal likelihood they give
+        self.lengthscale = None
+        self.noise = None
+        self.variance = None
+        self.log_likelihood = None
+
+    def _scale(self, x):
+        # points as rows of a 2D array, scaled so the points fitted to lie in [0, 1] along each axis
+        x = np.asarray(x, dtype = float)
+        x = x.reshape(len(x), -1)
+        return (x - self._low) / self._range
+
+    def _kernel(self, a, b, lengthscale):
+        # the squared exponential kernel, without its variance
+        distance = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis = 2)
+        return np.exp(-distance / (2 * lengthscale ** 2))
+
+    def fit(self, x, y):
+        """
+        This function fits the Gaussian process to some results.
+
+        Args:
+            x (numpy array): the points, a 1D array of values or a 2D array with a row per point
+            y (numpy array): the result at each point
+
+        Returns:
+            (GaussianProcess): the fitted Gaussian process
+
+        Raises:
+            ValueError: if there are no points or x and y have different lengths
+        """
+        y = np.asarray(y, dtype = float)
+        if len(y) == 0 or len(y) != len(x):
+            raise ValueError("Need at least one point, with one result per point!")
+
+        x = np.asarray(x, dtype = float)
+        x = x.reshape(len(x), -1)
+        self._low = x.min(axis = 0)
+        self._range = np.where(np.ptp(x, axis = 0) > 0, np.ptp(x, axis = 0), 1.0)
+        self._x = self._scale(x)
+        # the results are fitted with their mean taken off and divided by their spread, so the same grids of values suit any results
+        self._mean = y.mean()
+        self._std = y.std() if y.std() > 0 else 1.0
+        z = (y - self._mean) / self._std
+
+        n = len(z)
+        best = None
+        for lengthscale in self.lengthscales:
+            correlation = self._kernel(self._x, self._x, lengthscale)
+            for noise in self.noises:
+                factor = np.linalg.cholesky(correlation + noise * np.eye(n))
+                alpha = np.linalg.solve(factor.T, np.linalg.solve(factor, z))
+                # the variance of the kernel that makes the likelihood largest, and the log likelihood with it (without its constant)
+                variance = max(z @ alpha / n, 1e-12)
+                log_likelihood = -0.5 * n * np.log(variance) - np.log(np.diag(factor)).sum()
+                if best is None or log_likelihood > best[0]:
+                    best = (log_likelihood, lengthscale, noise, variance, factor, alpha)
+
+        self.log_likelihood, self.lengthscale, self.noise, self.variance, self._factor, self._alpha = best
+        return self
+
+    def predict(self, x):
+        """
+        This function predicts the results at some points.
+
+        Args:
+            x (numpy array): the points, in the same form as given to fit
+
+        Returns:
+            mean (numpy array): the predicted result at each point
+
+            std (numpy array): the standard deviation of each prediction, not including the noise of a single run
+        """
+        cross = self._kernel(self._scale(x), self._x, self.lengthscale)
+        mean = cross @ self._alpha
+        v = np.linalg.solve(self._factor, cross.T)
+        # the variance is variance * (1 - v.v) as the kernel is divided by the variance
+        variance = self.variance * np.maximum(1 - (v ** 2).sum(axis = 0), 0)
+        return self._mean + self._std * mean, self._std * np.sqrt(variance)
+
+
+def active_sweep(points, run, scales = None, initial = 3, budget = None, tol = 0.05):
+    """
+    This function simulates the points of a sweep in the order that makes the predictions of a Gaussian process certain fastest. It starts with
+    the first, last and evenly spaced points, then repeatedly simulates the point whose prediction is least certain, until no prediction has a
+    standard deviation above tol or budget points have been simulated.
+
+    Args:
+        points (numpy array): the points of the sweep, a 1D array of values or a 2D array with a row per point
+        run (function): runs a point, called with the index of the point, returning its results (e.g. the mean remaining trees and last frame)
+        scales (list): the scale of each result, its standard deviations are divided by this before being compared with tol. Defaults to 1
+        initial (int): the number of points simulated before the first fit
+        budget (int): the most points to simulate, defaults to every point
+        tol (float): the largest standard deviation (after scaling) a prediction may have
+
+    Returns:
+        means (numpy array): the predicted results at every point, with a column per result. The points simulated have their simulated results
+
+        stds (numpy array): the standard deviations of the predictions, 0 for the points simulated
+
+        simulated (numpy array): true for the points that were simulated
+
+    Raises:
+        ValueError: if initial is below 1 or the budget is below initial
+    """
+    count = len(points)
+    budget = count if budget is None else min(budget, count)
+    if initial < 1 or budget < min(initial, count):
+        raise ValueError("Invalid initial points or budget, must have 1 <= initial <= budget!")
+
+    simulated = np.zeros(count, dtype = bool)
+    results = {}
+    # the points spread evenly through the sweep, including both ends
+    for index in np.unique(np.linspace(0, count - 1, min(initial, count)).round().astype(int)):
+        results[index] = np.atleast_1d(run(index))
+        simulated[index] = True
+
+    while True:
+        done = np.flatnonzero(simulated)
+        values = np.array([results[index] for index in done])
+        means = np.zeros((count, values.shape[1]))
+        stds = np.zeros((count, values.shape[1]))
+        for result in range(values.shape[1]):
+            process = GaussianProcess().fit(np.asarray(points)[done], values[:, result])
+            means[:, result], stds[:, result] = process.predict(points)
+        means[done] = values
+        stds[done] = 0
+
+        # the uncertainty of each point, the largest of the scaled standard deviations of its results
+        uncertainty = (stds / (np.ones(values.shape[1]) if scales is None else np.asarray(scales, dtype = float))).max(axis = 1)
+        if simulated.sum() >= budget or uncertainty.max() <= tol:
+            return means, stds, simulated
+
+        index = int(np.argmax(uncertainty))
+        results[index] = np.atleast_1d(run(index))
+        simulated[index] = True
@@ -0,0 +1,383 @@
+"""
+This module describes sweeps of the simulation without anything to do with figures, so it can be used by the sims functions, by the job
+service in the jobs module and by worker processes. A sweep is a set of parameter points, each run a number of times (replicates).
+A sweep spec is a dictionary with either:
+    "parameter" and "values": the parameter to change (see sims.simulation) and the values to change it to, or
+    "light_values" and "tree_values": every combination of these lightning and new tree probabilities (see sims.simulation_combine)
+and optionally "times", "seed", "GRID_HEIGHT", "GRID_WIDTH", "lightning", "tree_growth", "frame_num", "cloud_th", "rain" and "instant_burn",
+which default to the values in the config file, and "snapshots" (the folder of a snapshot library to warm start the runs from, see the
+snapshots module), "settle" and "crn" (common random numbers, see run_task()).
+"""
+
+#Importing modules
+import config
+import numpy as np
+from result_cache import ResultCache
+from rng_streams import Streams
+from runner import run_replicate
+
+#The default values of a sweep spec
+DEFAULTS = {"times": 1, "seed": None, "GRID_HEIGHT": config.GRID_HEIGHT, "GRID_WIDTH": config.GRID_WIDTH, "lightning": config.lightning,
+            "tree_growth": config.tree_growth, "frame_num": config.frame, "cloud_th": config.cloud_th, "rain": False, "instant_burn": False,
+            "snapshots": None, "settle": 50, "crn": False}
+
+
+def check_simulation_args(parameter, sim_values, times, GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, rain):
+    """
+    Checks the arguments of sims.simulation() and sims.simulation_adaptive().
+    
+    Raises:
+    
+        ValueError: If any of the arguments are of the correct type but not a valid value
+        
+        TypeError: If any of the arguments are not of the correct data type
+    """
+    #Checks the number of the times argument is above 0
+    if times <= 0:
+        raise ValueError("Number of times must be at least 1!")
+        
+    #Checks the simulation values are stored in a numpy array
+    elif (type(sim_values) != np.ndarray):
+        raise TypeError("Invalid simulation value type, only accepts 1D numpy array!")
+        
+    #Checks there is at least one value in the values for the testing
+    elif (sim_values.size <= 0 ):
+        raise ValueError("Must have at least one value in simualation values!")
+        
+    #Checks the paramater value is valid (either 0, 1, 2 or 3)    
+    elif (parameter > 3 or parameter < 0):
+        raise ValueError("Invalid parameter values, see documentation.")
+        
+    #Check the grid height and width are positive and probabilities of lightning and tree growth are between 0 and 1.
+    elif (GRID_HEIGHT <= 0 or GRID_WIDTH <= 0 or lightning > 1 or lightning < 0  or tree_growth > 1 or tree_growth < 0):
+        raise ValueError("Invalid values!")
+        
+    #If parameter is 3 (simulating rain) and rain is false, raises an error, 
+    elif (parameter == 3 and rain == False):
+        raise ValueError("Conflicting rain argument!")
+        
+    #If the frame number is smaller than 1, raise an error
+    elif(frame_num < 1):
+        raise ValueError("Invalid frame number, frame number must be at least 1!")
+
+
+def check_combine_args(light_values, tree_values, times, frame_num):
+    """
+    Checks the arguments of sims.simulation_combine() and sims.simulation_combine_adaptive().
+    
+    Raises:
+    
+        ValueError: If any of the arguments are of the correct type but not a valid value
+        
+        TypeError: If any of the arguments are not of the correct data type
+    """
+    #Checks the number of the times argument is above 0
+    if times <= 0:
+        raise ValueError("Number of times must be at least 1!")
+        
+    #Checks the simulation values are stored in a numpy array
+    elif (type(light_values) != np.ndarray):
+        raise TypeError("Invalid simulation value type, only accepts 1D numpy array!")
+        
+    #Checks there is at least one value in the values for the testing
+    elif (light_values.size <= 0 ):
+        raise ValueError("Must have at least one value in simualation values!")
+        
+    #Checks the simulation values are stored in a numpy array
+    elif (type(tree_values) != np.ndarray):
+        raise TypeError("Invalid simulation value type, only accepts 1D numpy array!")
+        
+    #Checks there is at least one value in the values for the testing
+    elif (tree_values.size <= 0 ):
+        raise ValueError("Must have at least one value in simualation values!")
+    
+    #If the frame number is smaller than 1, raise an error
+    elif(frame_num < 1):
+        raise ValueError("Invalid frame number, frame number must be at least 1!")
+
+
+def check_point_settings(settings):
+    """
+    Checks the settings of each point of a sweep are valid, with the same checks as setup.configure(), so a bad value is found before any
+    run is started instead of inside a worker.
+    
+    Raises:
+    
+        ValueError: If the grid size of a point is not positive, or its probabilities of lightning and tree growth or cloud threshold are not
+                    between 0 and 1
+    """
+    for n, point in enumerate(settings):
+        if (point["GRID_HEIGHT"] <= 0 or point["GRID_WIDTH"] <= 0 or not 0 <= point["lightning"] <= 1 or not 0 <= point["tree_growth"] <= 1
+                or not 0 <= point["cloud_th"] <= 1):
+            raise ValueError(f"Invalid values at point {n}!")
+
+
+def check_adaptive_args(ci_width, min_times, max_times):
+    """
+    Checks the confidence interval target and replicate bounds of the adaptive simulations.
+    
+    Raises:
+    
+        ValueError: If the target width is not positive or the replicate bounds are not 2 <= min_times <= max_times
+    """
+    #Checks the target width of the intervals is positive
+    if ci_width <= 0:
+        raise ValueError("Confidence interval width must be positive!")
+    
+    #At least two runs are needed to estimate a confidence interval, and the minimum cannot be above the maximum
+    elif (min_times < 2 or min_times > max_times):
+        raise ValueError("Invalid number of times, must have 2 <= min_times <= max_times!")
+
+
+def check_crn_args(crn, seed, snapshots = None):
+    """
+    Checks common random numbers are only asked for with a seed, as the streams of each replicate are keyed by the seed, and not with
+    snapshots, as runs from a snapshot settle with config.rng.
+    
+    Raises:
+    
+        ValueError: If crn is true without a seed or with snapshots
+    """
+    if crn and seed is None:
+        raise ValueError("Common random numbers need a seed!")
+    
+    elif (crn and snapshots is not None):
+        raise ValueError("Common random numbers cannot be used with snapshots!")
+
+
+def point_settings(parameter, param, GRID_HEIGHT, GRID_WIDTH, lightning, tree_growth, frame_num, cloud_th, rain, instant_burn):
+    """
+    Returns the settings of one simulation where the chosen parameter (see sims.simulation()) is set to param.
+    
+    Returns:
+    
+        settings : (dict) the grid height and width, lightning, tree_growth, frame_num, cloud_th, rain and instant_burn of the simulation
+    """
+    settings = {"GRID_HEIGHT": GRID_HEIGHT, "GRID_WIDTH": GRID_WIDTH, "lightning": lightning, "tree_growth": tree_growth,
+                "frame_num": frame_num, "cloud_th": cloud_th, "rain": rain, "instant_burn": instant_burn}
+    
+    #If it is 0: set tree growth to be the value in the list
+    if (parameter == 0):
+        settings["tree_growth"] = param
+    
+    #If it is 1: set lightning to be the value in the list
+    elif (parameter == 1):
+        settings["lightning"] = param
+    
+    #If it is 2: set it to grid height and width
+    #Note: as this grid is a square only one value is used for both grid height, grid width
+    elif (parameter == 2):
+        settings["GRID_HEIGHT"] = param
+        settings["GRID_WIDTH"] = param
+    
+    #If it is 3 set it to cloud threshold 
+    # we do 1 minus the cloud threshold so we can plot the rain probability and the trend is easier to interoperate
+    elif (parameter == 3):
+        settings["cloud_th"] = 1 - param
+    
+    return settings
+
+
+def combine_settings(lightning_value, tree_value, frame_num, instant_burn, GRID_HEIGHT = config.GRID_HEIGHT, GRID_WIDTH = config.GRID_WIDTH):
+    """
+    Returns the settings of one simulation of sims.simulation_combine(), on the default grid size without rain.
+    
+    Returns:
+    
+        settings : (dict) the settings of the simulation, see point_settings()
+    """
+    return {"GRID_HEIGHT": GRID_HEIGHT, "GRID_WIDTH": GRID_WIDTH, "lightning": lightning_value, "tree_growth": tree_value,
+            "frame_num": frame_num, "cloud_th": config.cloud_th, "rain": False, "instant_burn": instant_burn}
+
+
+def snapshot_library(snapshots):
+    """
+    Opens a snapshot library given as its folder, as in a sweep spec.
+    
+    Args:
+    
+        snapshots : (SnapshotLibrary or str) the library or its folder, or None
+    
+    Returns:
+    
+        library : (SnapshotLibrary) the library, or None if snapshots is None
+    """
+    if snapshots is None or not isinstance(snapshots, str):
+        return snapshots
+    #The snapshots module is only needed when runs are warm started
+    from snapshots import SnapshotLibrary
+    return SnapshotLibrary(snapshots)
+
+
+def run_key(settings, seed, replicate, crn = False, snapshots = None, settle = 50):
+    """
+    Works out the key of a seeded run in the result cache, see run_task() for the arguments.
+    
+    The key is made from every setting of the run, so the seed of each run and its place in the cache only depend on what is being simulated.
+    Runs with common random numbers, and runs warm started from a snapshot (with the snapshot and number of settle frames), are different
+    runs, so they have different keys. The key of a warm started run includes a hash of the snapshot's file, so rebuilding the snapshot changes
+    it. A run with no suitable snapshot starts from a uniform grid and has the same key as without a library.
+    
+    Returns:
+    
+        key : (str) the key, see ResultCache.make_key()
+    """
+    keyed = dict(settings)
+    if crn:
+        keyed["crn"] = True
+    library = snapshot_library(snapshots)
+    if library is not None:
+        entry = library.nearest(settings["GRID_HEIGHT"], settings["GRID_WIDTH"], settings["lightning"], settings["tree_growth"], settings["rain"],
+                                settings["instant_burn"])
+        if entry is not None:
+            keyed["snapshot"] = {name: entry[name] for name in ("file", "lightning", "tree_growth", "burn_in")}
+            #The hash of the snapshot's file, so runs from a rebuilt snapshot are not taken from the cache. Older libraries have none
+            if "digest" in entry:
+                keyed["snapshot"]["digest"] = entry["digest"]
+            keyed["settle"] = settle
+    return ResultCache.make_key(keyed, seed, replicate)
+
+
+def run_task(settings, seed = None, replicate = 0, cache = None, crn = False, snapshots = None, settle = 50):
+    """
+    Runs the simulation once with the given settings, without drawing anything.
+    
+    Args:
+    
+        settings : (dict) the settings of the simulation, see point_settings()
+        
+        seed : (int) if given, the run is seeded from the seed, the settings and the replicate number so it is repeatable
+        
+        replicate : (int) the number of this run at these settings
+        
+        cache : (ResultCache) if given with a seed, the run is taken from the cache if it is there and stored in it if not
+        
+        crn : (boolean) if true, common random numbers are used: the run's random numbers come from keyed streams (see the rng_streams
+              module) of the seed and replicate number only, so replicate k at every point of a sweep draws the same random number for
+              each cell, frame and purpose and the results of different points are positively correlated
+        
+        snapshots : (SnapshotLibrary or str) if given, the run starts from the nearest suitable snapshot of the library (or its folder), see
+                    runner.warm_start()
+        
+        settle : (int) the number of frames a snapshot is run with the new settings before the run starts
+    
+    Returns:
+    
+        remaining_trees : (float) the proportion of alive trees in the last frame
+        
+        last_frame : (int) the frame the simulation burnt out at, or the max frame number if it never did
+    """
+    check_crn_args(crn, seed, snapshots)
+    library = snapshot_library(snapshots)
+    
+    #Without a seed every run is different, so it is always run and never cached
+    if seed is None:
+        return run_replicate(**settings, snapshots = library, settle = settle)
+    
+    key = run_key(settings, seed, replicate, crn, library, settle)
+    result = cache.get(key) if cache is not None else None
+    
+    #Run it if it is not in the cache, seeding the random number generator from the key, or with the streams of the seed and replicate.
+    #The generator of the session is put back afterwards, so the unseeded runs after this one are still random
+    if result is None:
+        rng = config.rng
+        config.rng = np.random.default_rng(int(key, 16))
+        try:
+            result = run_replicate(**settings, snapshots = library, settle = settle, streams = Streams(seed, replicate) if crn else None)
+        finally:
+            config.rng = rng
+        if cache is not None:
+            cache.put(key, *result)
+    
+    return tuple(result)
+
+
+def run_sweep_task(task, cache = None):
+    """
+    Runs one run (task) of a sweep, see sweep_tasks() and run_task().
+    
+    Returns:
+    
+        remaining_trees, last_frame : see run_task()
+    """
+    return run_task(task["settings"], task["seed"], task["replicate"], cache, **task["options"])
+
+
+def task_key(task):
+    """
+    Works out the key of a run (task) of a sweep in the result cache, see sweep_tasks() and run_key().
+    
+    Returns:
+    
+        key : (str) the key, or None if the run is not seeded and so is never cached
+    """
+    if task["seed"] is None:
+        return None
+    return run_key(task["settings"], task["seed"], task["replicate"], **task["options"])
+
+
+def sweep_points(spec):
+    """
+    Works out the parameter points of a sweep spec.
+    
+    Args:
+    
+        spec : (dict) the sweep spec, see the top of this module
+    
+    Returns:
+    
+        labels : (list) the value of the parameter at each point, or the (lightning, new tree) pair for a combined sweep
+        
+        settings : (list) the settings of the simulation at each point, see point_settings()
+                            
+    Raises:
+    
+        ValueError: If any of the values in the spec are not valid, or it has neither "values" nor "light_values" and "tree_values"
+        
+        TypeError: If any of the values in the spec are not of the correct data type
+    """
+    spec = dict(DEFAULTS, **spec)
+    check_crn_args(spec["crn"], spec["seed"], spec["snapshots"])
+    
+    #A sweep of every combination of lightning and new tree probabilities
+    if "light_values" in spec and "tree_values" in spec:
+        light_values = np.asarray(spec["light_values"])
+        tree_values = np.asarray(spec["tree_values"])
+        check_combine_args(light_values, tree_values, spec["times"], spec["frame_num"])
+        labels = [(lightning_value, tree_value) for lightning_value in light_values for tree_value in tree_values]
+        settings = [combine_settings(lightning_value, tree_value, spec["frame_num"], spec["instant_burn"], spec["GRID_HEIGHT"], spec["GRID_WIDTH"])
+                    for lightning_value, tree_value in labels]
+        check_point_settings(settings)
+        return labels, settings
+    
+    #A sweep of one parameter
+    if "parameter" in spec and "values" in spec:
+        values = np.asarray(spec["values"])
+        check_simulation_args(spec["parameter"], values, spec["times"], spec["GRID_HEIGHT"], spec["GRID_WIDTH"], spec["lightning"],
+                              spec["tree_growth"], spec["frame_num"], spec["rain"])
+        settings = [point_settings(spec["parameter"], param, spec["GRID_HEIGHT"], spec["GRID_WIDTH"], spec["lightning"], spec["tree_growth"],
+                                   spec["frame_num"], spec["cloud_th"], spec["rain"], spec["instant_burn"]) for param in values]
+        check_point_settings(settings)
+        return list(values), settings
+    
+    raise ValueError("Sweep spec needs parameter and values, or light_values and tree_values!")
+
+
+def sweep_tasks(spec):
+    """
+    Works out every run (task) of a sweep spec.
+    
+    Args:
+    
+        spec : (dict) the sweep spec, see the top of this module
+    
+    Returns:
+    
+        tasks : (list) a dictionary for each run with its "point" (index into the points of sweep_points), "replicate", "settings", "seed"
+                and the other "options" of run_task() ("crn", the "snapshots" folder and "settle")
+    """
+    labels, settings = sweep_points(spec)
+    spec = dict(DEFAULTS, **spec)
+    options = {"crn": spec["crn"], "snapshots": spec["snapshots"], "settle": spec["settle"]}
+    return [{"point": point, "replicate": replicate, "settings": settings[point], "seed": spec["seed"], "options": options}
+            for point in range(len(settings)) for replicate in range(spec["times"])]
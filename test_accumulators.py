@@ -0,0 +1,65 @@
+"""
+This module is used to test the totals of each cell kept by the Accumulators class match the totals worked out from every frame of a run,
+and are carried on by a checkpoint.
+"""
+#Importing modules
+import numpy as np
+import config
+from checkpoint import resume
+from grid_updater import update_grid
+from runner import advance, start
+
+def test_accumulators():
+    """
+    This is used to test the burn counts, last ignitions, tree cover, return intervals and ages at burning against the frames of the same run.
+    """
+    config.rng = np.random.default_rng(6)
+    grid = start(25, 25, 0.01, 0.05, frame_num = 200, accumulate = True)
+    frames = [grid]
+    for frame_num in range(200):
+        frames.append(update_grid(frames[-1], frame_num))
+    frames = np.array(frames)
+    totals = config.accumulators
+    
+    #The frames each cell caught fire in, and the frames it had a tree
+    ignitions = (frames[1:] == config.FIRE) & (frames[:-1] != config.FIRE)
+    trees = frames[1:] == config.TREE
+    assert totals.frames == 200
+    assert np.array_equal(totals.burn_count, ignitions.sum(axis = 0))
+    assert np.array_equal(totals.tree_frames, trees.sum(axis = 0))
+    
+    for y in range(25):
+        for x in range(25):
+            fires = np.flatnonzero(ignitions[:, y, x])
+            assert totals.last_ignition[y, x] == (fires[-1] if fires.size else -1)
+            assert totals.interval_sum[y, x] == np.diff(fires).sum()
+            #The age of a tree is the time since the cell last became a tree (frame 0 counts as the first frame in frames)
+            ages = []
+            for fire in fires:
+                history = frames[:fire + 1, y, x] == config.TREE
+                grown = np.flatnonzero(~history)
+                ages.append(fire - (grown[-1] if grown.size else 0))
+            assert totals.age_sum[y, x] == sum(ages)
+    
+    maps = totals.maps()
+    assert np.allclose(maps["burn_frequency"], ignitions.mean(axis = 0))
+    assert np.isnan(maps["return_interval"][totals.burn_count < 2]).all()
+
+def test_accumulators_checkpoint(tmp_path):
+    """
+    This is used to test a run resumed from a checkpoint ends with the same totals as a run that was never stopped.
+    
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+    """
+    config.rng = np.random.default_rng(8)
+    advance(start(20, 20, 0.01, 0.05, frame_num = 100, accumulate = True), 0, 100)
+    expected = config.accumulators.get_state()
+    
+    path = str(tmp_path / "run.npz")
+    config.rng = np.random.default_rng(8)
+    advance(start(20, 20, 0.01, 0.05, frame_num = 100, accumulate = True), 0, 50, checkpoint_path = path, checkpoint_every = 50)
+    config.accumulators = None
+    resume(path)
+    for name, value in config.accumulators.get_state().items():
+        assert np.array_equal(value, expected[name])
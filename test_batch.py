@@ -0,0 +1,116 @@
+"""
+This module is used to test the batch module: reading spec files, running sweeps with and without a result cache, the CSV tables it writes
+and the errors the command line reports.
+"""
+#Importing modules
+import csv
+import json
+
+import pytest
+from result_cache import ResultCache
+#These are the functions to test
+from batch import SETTINGS_COLUMNS, load_spec, main, run_sweep, write_tables
+
+#A small seeded sweep, so each run is quick and repeatable
+SPEC = {"parameter": 1, "values": [0.01, 0.03], "times": 2, "seed": 1, "GRID_HEIGHT": 10, "GRID_WIDTH": 10, "frame_num": 20}
+
+
+def test_load_spec(tmp_path):
+    """
+    This is used to test JSON and TOML spec files give the same spec, and other files are rejected.
+
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+    """
+    (tmp_path / "spec.json").write_text(json.dumps(SPEC))
+    (tmp_path / "spec.toml").write_text("parameter = 1\nvalues = [0.01, 0.03]\ntimes = 2\nseed = 1\nGRID_HEIGHT = 10\nGRID_WIDTH = 10\nframe_num = 20\n")
+    assert load_spec(str(tmp_path / "spec.json")) == SPEC
+    assert load_spec(str(tmp_path / "spec.toml")) == SPEC
+    with pytest.raises(ValueError):
+        load_spec(str(tmp_path / "spec.yaml"))
+
+
+def test_run_sweep(tmp_path):
+    """
+    This is used to test a seeded sweep gives the same results with and without a cache, and the cache holds every run afterwards.
+
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+    """
+    tasks, results = run_sweep(SPEC)
+    assert len(tasks) == len(results) == 4
+
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    assert run_sweep(SPEC, cache = cache)[1] == results
+    assert len(cache) == 4
+    assert run_sweep(SPEC, cache = cache)[1] == results
+    cache.close()
+
+
+def test_write_tables(tmp_path):
+    """
+    This is used to test the columns and rows of the table of points and the table of runs.
+
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+    """
+    tasks, results = run_sweep(SPEC)
+    summary_path, runs_path = str(tmp_path / "summary.csv"), str(tmp_path / "runs.csv")
+    write_tables(SPEC, tasks, results, summary_path, runs_path)
+
+    with open(runs_path) as f:
+        runs = list(csv.DictReader(f))
+    with open(summary_path) as f:
+        summary = list(csv.DictReader(f))
+    assert list(runs[0]) == ["point"] + SETTINGS_COLUMNS + ["seed", "replicate", "remaining_trees", "last_frame"]
+    assert list(summary[0]) == ["point"] + SETTINGS_COLUMNS + ["runs", "mean_remaining_trees", "remaining_trees_ci", "mean_last_frame", "last_frame_ci"]
+    assert len(runs) == 4 and len(summary) == 2
+    assert [float(row["lightning"]) for row in summary] == [0.01, 0.03]
+    assert float(summary[0]["mean_remaining_trees"]) == pytest.approx((results[0][0] + results[1][0]) / 2)
+
+
+@pytest.mark.parametrize("spec, message", [
+    #A misspelt key
+    (dict(SPEC, lightnin = 0.1), "Unknown keys in sweep spec: lightnin"),
+
+    #A tree growth probability that is not between 0 and 1 is found before any run is started
+    ({"parameter": 0, "values": [2.0]}, "Invalid values at point 0!"),
+
+    #As is a grid size that is not positive
+    (dict(SPEC, parameter = 2, values = [10, 0]), "Invalid values at point 1!"),
+])
+
+def test_main_errors(tmp_path, capsys, spec, message):
+    """
+    This is used to test mistakes in a spec file are reported as a command line error, without a traceback.
+
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+
+        capsys: captures what the command line prints
+
+        spec: the spec in the file
+
+        message: the error that must be reported
+    """
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps(spec))
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(path), "--quiet"])
+    assert exit_info.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_missing_spec(tmp_path, capsys):
+    """
+    This is used to test a spec file that does not exist is reported as a command line error, without a traceback.
+
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+
+        capsys: captures what the command line prints
+    """
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(tmp_path / "missing.json")])
+    assert exit_info.value.code == 2
+    assert "No such file or directory" in capsys.readouterr().err
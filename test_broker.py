@@ -0,0 +1,65 @@
+"""
+This module is used to test that the runs of a sweep handed out by a broker to several workers on this machine give the same results as
+running them in one process, including when a worker dies holding a run.
+"""
+#Importing modules
+import json
+import socket
+from multiprocessing import Process
+#These are the functions to test
+from broker import Broker, run_worker
+from sweep import run_task
+
+
+def test_broker():
+    """
+    This is used to test a sweep with a worker that takes a run and dies, and workers that join one after another. The run of the dead worker
+    must be handed out again when its lease runs out, and every result must match the same seeded run done here.
+    """
+    spec = {"light_values": [0.01, 0.05], "tree_values": [0.02, 0.1], "times": 3, "seed": 4, "GRID_HEIGHT": 20, "GRID_WIDTH": 20, "frame_num": 50}
+    broker = Broker(spec, lease = 1.0, retry = 0.05)
+    address = broker.start()
+    workers = []
+    try:
+        #A worker that takes a run and never sends its result
+        with socket.create_connection(address) as dead:
+            dead.sendall(b'{"type": "get", "worker": "dead"}\n')
+            task = json.loads(dead.makefile().readline())
+            assert task["type"] == "task"
+        
+        for n in range(3):
+            workers.append(Process(target = run_worker, args = (address, f"worker{n}")))
+            workers[-1].start()
+        assert broker.wait(60)
+    finally:
+        for worker in workers:
+            worker.join(10)
+        broker.close()
+    
+    assert broker.requeued >= 1
+    assert "dead" in broker.workers and broker.workers["dead"] == 0
+    assert sum(broker.workers.values()) == len(broker.tasks)
+    for task, result in zip(broker.tasks, broker.results):
+        assert tuple(result) == tuple(run_task(task["settings"], task["seed"], task["replicate"]))
+        assert type(result[1]) is int
+
+
+def test_bad_messages():
+    """
+    This is used to test messages about runs that are not part of the sweep are answered with an error, and the connection still works after.
+    """
+    broker = Broker({"parameter": 1, "values": [0.01], "times": 2, "seed": 1, "GRID_HEIGHT": 10, "GRID_WIDTH": 10, "frame_num": 10})
+    address = broker.start()
+    try:
+        with socket.create_connection(address) as connection:
+            replies = connection.makefile()
+            for task in (2, -1, "0", 1.0, None):
+                for message in ({"type": "result", "worker": "w", "task": task, "remaining_trees": 0.5, "last_frame": 10},
+                                {"type": "heartbeat", "worker": "w", "task": task}):
+                    connection.sendall((json.dumps(message) + "\n").encode())
+                    assert json.loads(replies.readline())["type"] == "error"
+            connection.sendall(b'{"type": "get", "worker": "w"}\n')
+            assert json.loads(replies.readline())["type"] == "task"
+    finally:
+        broker.close()
+    assert broker.progress()[0] == 0
@@ -0,0 +1,66 @@
+"""
+This module is used to test that a run resumed from a checkpoint of the checkpoint module carries on exactly as if it had never been stopped.
+"""
+#Importing modules
+import numpy as np
+import pytest
+import config
+from runner import advance, start
+from setup import reset
+#These are the functions to test
+from checkpoint import load_checkpoint, resume
+
+#The variables to be tested.
+@pytest.mark.parametrize("rain", [False, True])
+
+def test_resume(tmp_path, rain):
+    """
+    This is used to test a run checkpointed halfway, cleared from config.py and resumed ends with the same grid, proportions, last frame and
+    random number generator state as a run that was never stopped, with and without rain.
+
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+
+        rain: If true, the runs are run with rain
+    """
+    #The run that is never stopped
+    config.rng = np.random.default_rng(4)
+    expected_grid = advance(start(15, 15, 0.02, 0.05, frame_num = 60, rain = rain), 0, 60, rain)
+    expected = {name: getattr(config, name).values().copy() for name in ("prop_of_trees", "prop_of_fires", "prop_of_rain")}
+    expected_last_frame = config.last_frame
+    expected_draw = config.rng.random()
+
+    #The same run, checkpointed every 30 frames and stopped after the first checkpoint
+    path = str(tmp_path / "run.npz")
+    config.rng = np.random.default_rng(4)
+    advance(start(15, 15, 0.02, 0.05, frame_num = 60, rain = rain), 0, 30, rain, path, 30)
+    grid, next_frame, checkpoint_rain = load_checkpoint(path)
+    assert next_frame == 30 and checkpoint_rain == rain and config.prop_of_trees.count == 30
+
+    #Everything it needs comes from the checkpoint, not from what is left in config.py
+    reset()
+    config.rng = np.random.default_rng(99)
+    grid = resume(path)
+
+    assert np.array_equal(grid, expected_grid)
+    for name, values in expected.items():
+        assert np.array_equal(getattr(config, name).values(), values)
+    assert config.last_frame == expected_last_frame
+    assert config.rng.random() == expected_draw
+
+#The variables to be tested.
+@pytest.mark.parametrize("checkpoint_every", [None, 0, -5, 2.5, True])
+
+def test_checkpoint_every_errors(tmp_path, checkpoint_every):
+    """
+    This is used to test a checkpoint file without a positive whole number of frames between checkpoints is rejected before any frame is run.
+    
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+        
+        checkpoint_every: the number of frames between checkpoints
+    """
+    grid = start(10, 10, 0.01, 0.05, frame_num = 5)
+    with pytest.raises(ValueError):
+        advance(grid, 0, 5, checkpoint_path = str(tmp_path / "run.npz"), checkpoint_every = checkpoint_every)
+    assert config.prop_of_trees.count == 0
@@ -0,0 +1,110 @@
+"""
+This module is used to test the cluster sizes and labels found by the cluster_sizes and label_clusters functions in the module clusters.
+"""
+#Importing modules
+import pytest
+import numpy as np
+#These are the functions to test
+from clusters import cluster_sizes, label_clusters, largest_cluster_fraction
+#This has any of the parameters we may need
+import config
+
+#The variables to be tested.
+@pytest.mark.parametrize("grid, state, sizes", [
+    #A 3x3 grid of trees is one cluster of 9 trees
+    (np.array([[0, 0, 0], [0, 0, 0], [0, 0, 0]]), config.TREE, [9]),
+    
+    #A 3x3 grid with no fire has no fire clusters
+    (np.array([[0, 0, 0], [0, 0, 0], [0, 0, 0]]), config.FIRE, []),
+    
+    #Trees touching only at the corners are in the same cluster, like fire spreading to all 8 neighbours
+    (np.array([[0, 2, 2], [2, 0, 2], [2, 2, 0]]), config.TREE, [3]),
+    
+    #A burnt line splits the trees into two clusters
+    (np.array([[0, 2, 0], [0, 2, 0], [0, 2, 0]]), config.TREE, [3, 3]),
+    
+    #A U shape is only joined at the bottom, so the two arms are in separate runs until the last row
+    (np.array([[0, 2, 0, 1], [0, 2, 0, 1], [0, 0, 0, 2]]), config.TREE, [7]),
+    
+    #Two fire fronts and a single burning tree
+    (np.array([[1, 1, 2, 2], [2, 2, 2, 1], [1, 2, 2, 1]]), config.FIRE, [1, 2, 2]),
+])
+
+def test_cluster_sizes(grid, state, sizes):
+    """
+    This is used to test the cluster sizes of small grids with known clusters.
+    
+    Args:
+        grid: the input grid
+        
+        state: the state of the cells in the clusters
+        
+        sizes: the expected cluster sizes
+        
+    Output:
+        Boolean value: if the cluster sizes are equal to the expected sizes
+        
+    """
+    assert sorted(cluster_sizes(grid, state)) == sizes
+    
+    #The labelled grid must have the same clusters
+    labels = label_clusters(grid, state)
+    assert np.all((labels >= 0) == (grid == state))
+    assert sorted(np.unique(labels[labels >= 0], return_counts = True)[1]) == sizes
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_cluster_sizes_random(seed):
+    """
+    This is used to test the cluster sizes of random grids against a simple flood fill.
+    
+    Args:
+        seed: the seed of the random grid
+        
+    Output:
+        Boolean value: if the cluster sizes are equal to the flood fill's
+        
+    """
+    grid = np.random.default_rng(seed).integers(0, 3, size = (30, 40))
+    
+    #Flood fill every tree cluster, using the neighbourhood of spread_fire
+    neighbourhood = ((-1,-1), (-1,0), (-1,1), (0,-1), (0, 1), (1,-1), (1,0), (1,1))
+    seen = np.zeros(grid.shape, dtype = bool)
+    expected = []
+    for y, x in zip(*np.nonzero(grid == config.TREE)):
+        if seen[y, x]:
+            continue
+        seen[y, x] = True
+        stack = [(y, x)]
+        size = 0
+        while stack:
+            cy, cx = stack.pop()
+            size += 1
+            for dy, dx in neighbourhood:
+                ny, nx = cy + dy, cx + dx
+                if 0 <= ny < grid.shape[0] and 0 <= nx < grid.shape[1] and grid[ny, nx] == config.TREE and not seen[ny, nx]:
+                    seen[ny, nx] = True
+                    stack.append((ny, nx))
+        expected.append(size)
+    
+    sizes = cluster_sizes(grid, config.TREE)
+    assert sorted(sizes) == sorted(expected)
+    assert largest_cluster_fraction(sizes, grid.size) == max(expected) / grid.size
+
+
+def test_labels_reused():
+    """
+    This is used to test the clusters that do not reach the current row are finished, so a tall grid of many small clusters never has more
+    labels than runs in a row, and the sizes are still those of label_clusters.
+    """
+    from clusters import _scan
+    
+    #Rows of single trees with a burnt row between each, so every row starts new clusters
+    grid = np.full((200, 20), config.BURNT)
+    grid[::2, ::2] = config.TREE
+    clusters, rows, finished = _scan(grid, config.TREE)
+    assert clusters.parent.size <= 64 and clusters.count == 0
+    assert sorted(cluster_sizes(grid, config.TREE)) == [1] * 1000
+    
+    labels = label_clusters(grid, config.TREE)
+    assert np.unique(labels[labels >= 0]).size == 1000
@@ -0,0 +1,68 @@
+"""
+This module is used to test the common random numbers option of sweep.run_task and sims.simulation, and sims.simulation_paired.
+"""
+#Importing modules
+import numpy as np
+import pytest
+from result_cache import ResultCache
+from sweep import point_settings
+#These are the functions to test
+from sims import simulation, simulation_paired
+from sweep import run_task
+
+def test_common_random_numbers(tmp_path):
+    """
+    This is used to test runs with common random numbers are repeatable, are cached apart from the other runs, and give paired differences
+    between neighbouring values with narrower intervals than independent runs.
+    
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+    """
+    settings = [point_settings(1, lightning, 30, 30, 0.03, 0.05, 100, 0.6, False, False) for lightning in (0.03, 0.04)]
+    assert run_task(settings[0], 1, 0, crn = True) == run_task(settings[0], 1, 0, crn = True)
+    assert run_task(settings[0], 1, 0, crn = True) != run_task(settings[0], 1, 1, crn = True)
+    
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    plain = run_task(settings[0], 1, 0, cache)
+    assert run_task(settings[0], 1, 0, cache, crn = True) == run_task(settings[0], 1, 0, crn = True)
+    assert run_task(settings[0], 1, 0, cache) == plain
+    cache.close()
+    
+    #The paired differences against the differences of the same number of independent runs
+    trees, frames, trees_diff, trees_diff_ci, frame_diff, frame_diff_ci = simulation_paired(1, np.array([0.03, 0.04]), 12, GRID_HEIGHT = 30, GRID_WIDTH = 30, tree_growth = 0.05, frame_num = 100, seed = 1)
+    independent = np.array([[run_task(point, 1, replicate)[0] for replicate in range(12)] for point in settings])
+    differences = independent[1] - independent[0]
+    assert len(trees_diff) == 1 and np.isclose(trees_diff[0], trees[1] - trees[0])
+    assert trees_diff_ci[0] < 1.96 * differences.std(ddof = 1) / np.sqrt(12)
+    
+    #The means are the same as simulation with common random numbers
+    assert np.allclose(trees, simulation(1, np.array([0.03, 0.04]), 12, 30, 30, tree_growth = 0.05, frame_num = 100, seed = 1, crn = True)[0])
+    
+    with pytest.raises(ValueError):
+        simulation(1, np.array([0.03]), 2, crn = True)
+
+def test_crn_sweeps():
+    """
+    This is used to test the combined sweeps and sweep specs (as used by batch, broker, jobs and the scheduler) can ask for common random
+    numbers, and get the same runs as run_task with common random numbers.
+    """
+    from batch import run_sweep
+    from sims import simulation_combine, simulation_combine_adaptive
+    from sweep import combine_settings, sweep_tasks
+    
+    light_values, tree_values = np.array([0.03, 0.04]), np.array([0.05])
+    expected = [np.mean([run_task(combine_settings(lightning, 0.05, 50, False), 1, replicate, crn = True)[0] for replicate in range(3)])
+                for lightning in light_values]
+    assert np.allclose(simulation_combine(light_values, tree_values, 3, 50, seed = 1, crn = True)[0], expected)
+    assert np.allclose(simulation_combine_adaptive(light_values, tree_values, 1.0, 3, 3, frame_num = 50, seed = 1, crn = True)[0], expected)
+    
+    spec = {"light_values": [0.03, 0.04], "tree_values": [0.05], "times": 3, "frame_num": 50, "seed": 1, "crn": True}
+    assert all(task["options"]["crn"] for task in sweep_tasks(spec))
+    results = run_sweep(spec)[1]
+    assert np.allclose([np.mean([trees for trees, frames in results[3 * i:3 * i + 3]]) for i in range(2)], expected)
+    
+    #Common random numbers need a seed
+    with pytest.raises(ValueError):
+        sweep_tasks(dict(spec, seed = None))
+    with pytest.raises(ValueError):
+        simulation_combine(light_values, tree_values, 3, 50, crn = True)
@@ -0,0 +1,69 @@
+"""
+This module is used to test that the animation runs config.frame_skip steps of the model each frame, and that the graphs get every step.
+"""
+#Importing modules
+import numpy as np
+import pytest
+import config
+from runner import advance, start
+from setup import reset
+
+pytest.importorskip("matplotlib")
+
+def test_frame_skip():
+    """
+    This is used to test 5 frames of the animation with a frame skip of 4 give the same grid and proportions as 20 frames of the same seeded
+    simulation, and the x axis of the graph covers every step.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    #This is the function to test
+    from animation import animate
+    from setup import initialise
+    
+    config.rng = np.random.default_rng(3)
+    reset()
+    config.frame = 10
+    initialise(20, 20, 0.01, 0.05)
+    config.frame_skip = 4
+    for i in range(5):
+        animate(i)
+    grid = config.grid_plot.get_array().copy()
+    trees = config.prop_of_trees.values().copy()
+    
+    assert config.model_step == 20
+    assert config.prop_of_trees.count == 20
+    assert config.line1.axes.get_xlim()[1] >= 20
+    
+    config.rng = np.random.default_rng(3)
+    expected = advance(start(20, 20, 0.01, 0.05, frame_num = 20), 0, 20)
+    assert np.array_equal(grid, expected)
+    assert np.allclose(trees, config.prop_of_trees.values())
+
+def test_frame_skip_with_rain():
+    """
+    This is used to test the rain animation with a frame skip stops at the last frame the rain clouds cover instead of running past it, and
+    that the frame rate is measured again when an animation starts.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    #These are the functions to test
+    import animation
+    from animation import animate_with_rain
+    from setup import initialise_with_rain
+    
+    config.rng = np.random.default_rng(3)
+    reset()
+    config.frame = config.last_frame = 20
+    initialise_with_rain(10, 10, 0.01, 0.05)
+    config.frame_skip = 4
+    for i in range(8):
+        animate_with_rain(i)
+    
+    assert config.model_step == 20
+    assert config.prop_of_trees.count == config.prop_of_rain.count == 20
+    
+    #The first frame of the next animation does not use the time since the last one ended
+    animation.last_tick = 0.0
+    animate_with_rain(0)
+    assert animation.last_tick > 0.0 and config.model_step == 4
@@ -0,0 +1,25 @@
+"""
+This module is used to test that importing the modules that run simulations without figures does not load the heavy libraries used to draw
+figures and rain (matplotlib, cv2, perlin_noise and IPython), so scripts, sweeps and worker processes start quickly.
+"""
+#Importing modules
+import os
+import subprocess
+import sys
+
+#The heavy libraries that are only needed to draw figures or rain
+HEAVY = ["matplotlib", "cv2", "perlin_noise", "IPython"]
+
+#The modules that must not load them when imported
+MODULES = ["grid_updater", "runner", "sweep", "sims", "setup", "checkpoint", "jobs", "batch", "broker", "scheduler", "snapshots", "kmc",
+           "mosaic", "surrogate"]
+
+
+def test_imports():
+    """
+    This is used to test importing the modules in a new python process leaves none of the heavy libraries in sys.modules.
+    """
+    script = "import sys, %s; print([name for name in %r if name in sys.modules])" % (", ".join(MODULES), HEAVY)
+    output = subprocess.run([sys.executable, "-c", script], capture_output = True, text = True, check = True,
+                            cwd = os.path.dirname(os.path.abspath(__file__))).stdout
+    assert output.strip() == "[]"
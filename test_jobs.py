@@ -0,0 +1,103 @@
+"""
+This module is used to test the JobManager and Job classes of the jobs module: the order jobs are run in, the events they stream, cancelling
+them and reusing cached runs.
+"""
+#Importing modules
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from result_cache import ResultCache
+#These are the classes to test
+from jobs import JobManager
+
+#A small sweep, so each run is quick
+SPEC = {"parameter": 1, "values": [0.01, 0.03], "times": 3, "GRID_HEIGHT": 10, "GRID_WIDTH": 10, "frame_num": 10}
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    # a pool of one thread that counts the runs sent to it. Threads share the config module, so only one run can be done at a time
+    def __init__(self):
+        super().__init__(1)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+def test_priority_and_events():
+    """
+    This is used to test a job with a higher priority has its runs done first, even when it is submitted later, and that a job streams a
+    result and a progress event for each run and then a done event.
+    """
+    async def main():
+        manager = JobManager(1, CountingExecutor())
+        low = manager.submit(SPEC, priority = 0)
+        high = manager.submit(SPEC, priority = 5)
+        assert await high.wait() == "done"
+        assert low.done == 0
+
+        events = [event async for event in low.events()]
+        await manager.close()
+        return low, events
+
+    low, events = asyncio.run(main())
+    assert low.status == "done" and low.results()[2] == [3, 3]
+    assert [event["type"] for event in events] == ["result", "progress"] * 6 + ["done"]
+    assert [event["done"] for event in events if event["type"] == "progress"] == list(range(1, 7))
+    assert {(event["point"], event["replicate"]) for event in events if event["type"] == "result"} == {(p, r) for p in range(2) for r in range(3)}
+
+
+def test_cancel():
+    """
+    This is used to test a cancelled job stops streaming after its cancelled event, and its runs that have not started are dropped.
+    """
+    async def main():
+        executor = CountingExecutor()
+        manager = JobManager(1, executor)
+        job = manager.submit(dict(SPEC, times = 20))
+        events = []
+        async for event in job.events():
+            events.append(event)
+            if event["type"] == "progress":
+                job.cancel()
+        await asyncio.sleep(0.1)
+        await manager.close()
+        return job, events, executor.submitted
+
+    job, events, submitted = asyncio.run(main())
+    assert job.status == "cancelled" and events[-1]["type"] == "cancelled"
+    assert job.done < job.total and submitted < job.total
+
+
+def test_cache_reuse(tmp_path):
+    """
+    This is used to test the runs of a seeded job are stored in the cache, and a second job of the same sweep takes them from the cache
+    without sending any runs to the pool.
+
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+    """
+    async def main(cache, executor):
+        manager = JobManager(1, executor, cache)
+        job = manager.submit(dict(SPEC, seed = 1))
+        await job.wait()
+        await manager.close()
+        return job.results()
+
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    executors = [CountingExecutor(), CountingExecutor()]
+    first = asyncio.run(main(cache, executors[0]))
+    second = asyncio.run(main(cache, executors[1]))
+    cache.close()
+    assert first == second
+    assert executors[0].submitted == 6 and executors[1].submitted == 0
+
+
+def test_max_workers():
+    """
+    This is used to test the number of runs at once must be given with a pool made elsewhere.
+    """
+    with pytest.raises(ValueError):
+        JobManager(executor = CountingExecutor())
@@ -0,0 +1,75 @@
+"""
+This module is used to test the event-driven engine of the kmc module and MetricSeries.extend.
+"""
+#Importing modules
+import numpy as np
+import config
+from metrics import MetricSeries
+from runner import advance, run_replicate, start
+#These are the functions to test
+from kmc import advance_kmc, supported
+
+def run(advance_function, seed, instant_burn = False):
+    """
+    This runs a small simulation with rare lightning from an empty grid.
+
+    Args:
+        advance_function (function): runner.advance or kmc.advance_kmc
+        seed (int): the seed of config.rng
+        instant_burn (boolean): If true, lightning burns the whole cluster of trees it strikes in one frame
+
+    Returns:
+        (numpy array): the proportion of trees in each frame
+    """
+    config.rng = np.random.default_rng(seed)
+    grid = start(15, 15, 0.0005, 0.02, 200, istate = config.BURNT, instant_burn = instant_burn)
+    grid = advance_function(grid, 0, 200)
+    assert set(np.unique(grid)) <= {config.TREE, config.FIRE, config.BURNT}
+    return config.prop_of_trees.values()
+
+def test_same_distribution():
+    """
+    This is used to test the event-driven engine records every frame, and that the proportions of trees it gives have the same mean and spread
+    as those of frame by frame runs, with and without the instant burn mode.
+    """
+    for instant_burn in (False, True):
+        stepped = np.array([run(advance, seed, instant_burn) for seed in range(200)])
+        jumped = np.array([run(advance_kmc, seed, instant_burn) for seed in range(200)])
+        assert jumped.shape == stepped.shape == (200, 200)
+        # the standard error of each mean is below 0.01
+        assert np.allclose(jumped.mean(axis = 0)[[20, 100, 199]], stepped.mean(axis = 0)[[20, 100, 199]], atol = 0.03)
+        assert abs(jumped[:, -1].std() - stepped[:, -1].std()) < 0.03
+
+def test_burn_out_and_fallback():
+    """
+    This is used to test the last frame is set when no tree can grow, and that runs the engine does not support are run frame by frame.
+    """
+    config.rng = np.random.default_rng(0)
+    grid = start(10, 10, 0.01, 0.0, 50, istate = config.BURNT)
+    grid[...] = config.BURNT
+    advance_kmc(grid, 0, 50)
+    assert config.last_frame == 0 and config.prop_of_trees.count == 50
+
+    #With rain the results are the same as runner.advance for the same seed
+    results = []
+    for event_driven in (False, True):
+        config.rng = np.random.default_rng(3)
+        results.append(run_replicate(20, 20, 0.01, 0.05, 30, rain = True, event_driven = event_driven))
+        assert not supported(rain = True)
+    assert results[0] == results[1]
+
+def test_extend():
+    """
+    This is used to test extending a MetricSeries is the same as appending the values one at a time, in each mode.
+    """
+    values = np.random.default_rng(0).random(300)
+    for mode in ("grow", "ring", "downsample"):
+        appended = MetricSeries(64, mode)
+        extended = MetricSeries(64, mode)
+        for value in values:
+            appended.append(value)
+        extended.extend(values[:5])
+        extended.extend([])
+        extended.extend(values[5:])
+        assert np.array_equal(appended.values(), extended.values())
+        assert appended.count == extended.count and appended.last == extended.last
@@ -0,0 +1,57 @@
+"""
+This module is used to test the MetricSeries class of the module metrics in each of its modes.
+"""
+#Importing modules
+import numpy as np
+import pytest
+#This is the class to test
+from metrics import MetricSeries
+
+#The variables to be tested.
+@pytest.mark.parametrize("mode, capacity, frames", [
+    #Every value is kept, past the starting size of the array
+    ("grow", None, 100),
+    #Only the last 8 values are kept
+    ("ring", 8, 21),
+    #The values are kept in at most 6 buckets
+    ("downsample", 6, 50),
+])
+
+def test_metric_series(mode, capacity, frames):
+    """
+    This is used to test the stored values, frame numbers, bucket means, mins and maxs match the values added, and the series is the same
+    after being rebuilt from its state.
+    
+    Args:
+        mode: the mode of the series
+        
+        capacity: the number of values or buckets kept
+        
+        frames: the number of values to add
+    """
+    values = np.random.default_rng(0).random(frames)
+    series = MetricSeries(capacity, mode)
+    for value in values:
+        series.append(value)
+    
+    assert series.last == values[-1]
+    assert series.count == frames
+    if mode == "grow":
+        assert np.array_equal(np.asarray(series), values)
+        assert np.array_equal(series.frames(), np.arange(frames))
+    elif mode == "ring":
+        assert np.array_equal(np.asarray(series), values[-capacity:])
+        assert np.array_equal(series.frames(), np.arange(frames - capacity, frames))
+    else:
+        #Each bucket covers width frames, except the last which may not be full yet
+        assert len(series) <= capacity
+        buckets = [values[start:start + series.width] for start in range(0, frames, series.width)]
+        assert np.allclose(series.values(), [bucket.mean() for bucket in buckets])
+        assert np.allclose(series.mins(), [bucket.min() for bucket in buckets])
+        assert np.allclose(series.maxs(), [bucket.max() for bucket in buckets])
+    
+    rebuilt = MetricSeries.from_state(series.get_state())
+    rebuilt.append(0.5)
+    series.append(0.5)
+    assert np.array_equal(rebuilt.values(), series.values())
+    assert np.array_equal(rebuilt.frames(), series.frames())
@@ -0,0 +1,64 @@
+"""
+This module is used to test the mosaic function and the Ensemble class of the mosaic module.
+"""
+#Importing modules
+import numpy as np
+import pytest
+import config
+from grid_updater import spread_fire
+from setup import reset
+#These are the functions to test
+from mosaic import Ensemble, initialise_mosaic, mosaic
+
+def test_mosaic():
+    """
+    This is used to test the grids are packed in rows with gaps between them, and the missing grids of the last row are gaps.
+    """
+    stack = np.arange(5 * 2 * 3).reshape(5, 2, 3) % 3
+    packed = mosaic(stack, columns = 2)
+    assert packed.shape == (3 * 2 + 2, 2 * 3 + 1)
+    assert np.array_equal(packed[0:2, 0:3], stack[0]) and np.array_equal(packed[0:2, 4:7], stack[1])
+    assert np.array_equal(packed[6:8, 0:3], stack[4]) and (packed[6:8, 4:7] == 3).all()
+    assert (packed[2] == 3).all() and (packed[:, 3] == 3).all()
+    assert mosaic(stack).shape == (2 * 2 + 1, 3 * 3 + 2)
+
+def test_ensemble():
+    """
+    This is used to test the fire spreads in each grid of the stack as it does in a grid on its own, the probabilities of each simulation are
+    used, and the proportions and last frames are kept for each simulation.
+    """
+    reset()
+    config.rng = np.random.default_rng(1)
+    ensemble = Ensemble(4, 10, 12, lightning = 0, tree_growth = 0)
+    ensemble.stack = config.rng.integers(0, 3, size = (4, 10, 12))
+    expected = np.array([spread_fire(grid, 12, 10) for grid in ensemble.stack])
+    assert np.array_equal(ensemble.step(), expected)
+    assert np.allclose(ensemble.trees()[:, 0], (expected == 0).mean(axis = (1, 2)))
+    
+    #Lightning in only the first simulation, which burns out, and new trees in only the last
+    ensemble = Ensemble(3, 10, 10, lightning = [1, 0, 0], tree_growth = [0, 0, 1])
+    for i in range(80):
+        ensemble.step()
+    assert ensemble.trees().shape == (3, 80)
+    assert ensemble.last_frame()[0] < 80 and ensemble.last_frame()[1] == 80
+    assert (ensemble.stack[1] == 0).all() and ensemble.fires()[1].max() == 0
+    
+    with pytest.raises(ValueError):
+        Ensemble(2, 10, 10, lightning = [0.1, 2])
+
+def test_initialise_mosaic():
+    """
+    This is used to test the figure of an ensemble draws its mosaic and a line per simulation.
+    """
+    pytest.importorskip("matplotlib")
+    import matplotlib
+    matplotlib.use("Agg")
+    
+    reset()
+    ensemble = Ensemble(6, 8, 8, lightning = 0.01, tree_growth = 0.05)
+    fig, animate = initialise_mosaic(ensemble, columns = 3, frame_num = 10)
+    for i in range(3):
+        image, trees, fires = animate(i)
+    assert image.get_array().shape == (2 * 8 + 1, 3 * 8 + 2)
+    assert len(trees.get_segments()) == 6 and len(trees.get_segments()[0]) == 3
+    fig.canvas.draw()
@@ -1,11 +1,11 @@
 """
-This module is used to test the fire spreading to each of the eight neighbours by the spread_fire function in the module grid_updator.
+This module is used to test the fire spreading to each of the eight neighbours by the spread_fire function in the module grid_updator, with spread probabilities, susceptibilities and wind, and the whole cluster of neighbours burning at once in the instant burn mode.
 """
 #Importing modules
 import pytest
 import numpy as np
 #This is the function to test
-from grid_updater import spread_fire
+from grid_updater import spread_fire, ignite
 #This has any of the parameters we may need
 import config
 
@@ -54,3 +54,79 @@ def test_spread_fire(grid, output, height, width):
     test_result = spread_fire(grid, height, width)
     #The np.array_equal function checks that the two numpy grids are equal, if they are returns "True" and if not "False". This compares the test_result and expected output. This line asserts this output will be True.
     assert np.array_equal(test_result, output) == True
+
+
+#The variables to be tested.
+@pytest.mark.parametrize("grid, strikes, output", [
+    #No lightning, nothing catches fire
+    (np.array([[0, 0, 2], [2, 2, 0], [0, 2, 2]]), 
+     np.array([[False, False, False], [False, False, False], [False, False, False]]),
+     np.array([[0, 0, 2], [2, 2, 0], [0, 2, 2]])),
+    
+    #Lightning in the upper left-hand corner burns the trees connected to it through their 8 neighbours, but not the separate tree
+    (np.array([[0, 0, 2], [2, 2, 0], [0, 2, 2]]), 
+     np.array([[True, False, False], [False, False, False], [False, False, False]]),
+     np.array([[1, 1, 2], [2, 2, 1], [0, 2, 2]])),
+    
+    #Two strikes in two clusters burn both clusters
+    (np.array([[0, 2, 0], [0, 2, 0], [0, 2, 0]]), 
+     np.array([[False, False, False], [True, False, True], [False, False, False]]),
+     np.array([[1, 2, 1], [1, 2, 1], [1, 2, 1]])),
+])
+
+def test_ignite_instant_burn(grid, strikes, output):
+    """
+    This is used to test the ignite function in the instant burn mode, where lightning burns the whole cluster of trees it strikes.
+    
+    Args:
+        grid: the input grid
+        
+        strikes: where lightning strikes
+        
+        output: the expected output
+        
+    Output:
+        Boolean value: if the test result and expected output are equal
+        
+    """
+    config.instant_burn = True
+    test_result = ignite(grid.copy(), strikes)
+    config.instant_burn = False
+    assert np.array_equal(test_result, output) == True
+
+
+#The variables to be tested.
+@pytest.mark.parametrize("spread_prob, susceptibility, wind, wind_bias, caught, spared", [
+    #Fire only spreads upwards, to the cell above
+    ([0, 1, 0, 0, 0, 0, 0, 0], None, None, 0.0, [(0, 1)], [(0, 0), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)]),
+    
+    #Cells with no susceptibility never catch fire, cells with full susceptibility always do
+    (1.0, np.array([[0, 1, 0], [1, 1, 0], [0, 1, 0]]), None, 0.0, [(0, 1), (1, 0), (2, 1)], [(0, 0), (0, 2), (1, 2), (2, 0), (2, 2)]),
+    
+    #A wind blowing right makes the fire spread right for certain and never left
+    (0.5, None, (0, 1), 1.0, [(1, 2)], [(1, 0)]),
+])
+
+def test_spread_fire_probabilistic(spread_prob, susceptibility, wind, wind_bias, caught, spared):
+    """
+    This is used to test the spread_fire function with spread probabilities, susceptibilities and wind, using probabilities of 0 and 1 so the result is certain.
+    
+    Args:
+        spread_prob: the probability of spreading in each direction
+        
+        susceptibility: the susceptibility of each cell
+        
+        wind: the direction of the wind
+        
+        wind_bias: how strongly the fire spreads with the wind
+        
+        caught: the cells that must catch fire
+        
+        spared: the cells that must not catch fire
+    """
+    config.spread_prob, config.susceptibility, config.wind, config.wind_bias = spread_prob, susceptibility, wind, wind_bias
+    test_result = spread_fire(np.array([[0, 0, 0], [0, 1, 0], [0, 0, 0]]), 3, 3)
+    config.spread_prob, config.susceptibility, config.wind, config.wind_bias = None, None, None, 0.0
+    assert test_result[1, 1] == config.BURNT
+    assert all(test_result[cell] == config.FIRE for cell in caught)
+    assert all(test_result[cell] == config.TREE for cell in spared)
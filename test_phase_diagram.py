@@ -0,0 +1,38 @@
+"""
+This module is used to test the adaptive sweep phase_diagram and the interpolation phase_map of the module phase_diagram.
+"""
+#Importing modules
+import numpy as np
+import pytest
+#These are the functions to test
+from phase_diagram import phase_diagram, phase_map
+
+
+def test_phase_diagram():
+    """
+    This is used to test the sweep stays within its budget and ranges, its leaf cells cover the whole range, and the map interpolates between the points.
+    """
+    points, remaining_trees, last_frame, cells = phase_diagram((0.0, 0.05), (0.0, 0.1), coarse = 3, max_depth = 2, budget = 20, frame_num = 30,
+                                                               GRID_HEIGHT = 10, GRID_WIDTH = 10, seed = 1)
+    assert 9 <= len(points) <= 20
+    assert all(0.0 <= light <= 0.05 and 0.0 <= tree <= 0.1 for light, tree in points)
+    #The leaf cells do not overlap and add up to the whole range
+    assert np.isclose(sum((cell[2] - cell[0]) * (cell[3] - cell[1]) for cell in cells), 0.05 * 0.1)
+    
+    #A value that changes linearly is interpolated exactly
+    values = [2 * light + 3 * tree for light, tree in points]
+    light_axis, tree_axis, values_map = phase_map(points, values, cells, resolution = 21)
+    assert np.allclose(values_map, 2 * light_axis[None, :] + 3 * tree_axis[:, None])
+
+
+@pytest.mark.parametrize("arguments", [{"tree_threshold": 0}, {"frame_threshold": 0}, {"frame_threshold": -0.1}, {"frame_num": 0}])
+
+def test_phase_diagram_errors(arguments):
+    """
+    This is used to test thresholds that are not positive, and a frame number of 0, are rejected before anything is run.
+
+    Args:
+        arguments: the invalid arguments
+    """
+    with pytest.raises(ValueError):
+        phase_diagram(coarse = 2, GRID_HEIGHT = 5, GRID_WIDTH = 5, **arguments)
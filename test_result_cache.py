@@ -0,0 +1,76 @@
+"""
+This module is used to test storing, reusing, removing and clearing simulation results in the ResultCache class of the module result_cache.
+"""
+#Importing modules
+import pytest
+#This is the class to test
+from result_cache import ResultCache
+
+#The variables to be tested.
+@pytest.mark.parametrize("settings, other_settings", [
+    #Different lightning probabilities must not share results
+    ({"GRID_HEIGHT": 10, "GRID_WIDTH": 10, "lightning": 0.03, "tree_growth": 0.03, "frame_num": 100, "cloud_th": 0.6, "rain": False},
+     {"GRID_HEIGHT": 10, "GRID_WIDTH": 10, "lightning": 0.04, "tree_growth": 0.03, "frame_num": 100, "cloud_th": 0.6, "rain": False}),
+    
+    #Runs with and without rain must not share results
+    ({"GRID_HEIGHT": 20, "GRID_WIDTH": 20, "lightning": 0.03, "tree_growth": 0.03, "frame_num": 50, "cloud_th": 0.6, "rain": False},
+     {"GRID_HEIGHT": 20, "GRID_WIDTH": 20, "lightning": 0.03, "tree_growth": 0.03, "frame_num": 50, "cloud_th": 0.6, "rain": True}),
+])
+
+def test_result_cache(tmp_path, settings, other_settings):
+    """
+    This is used to test the cache returns stored results for the same key only, removes the least recently used result when it is full
+    and is empty after being cleared.
+    
+    Args:
+        tmp_path: a temporary directory for the cache file
+        
+        settings: the settings of a stored run
+        
+        other_settings: settings which differ from settings in one value
+        
+    Output:
+        Boolean value: if the cache behaves as expected
+        
+    """
+    cache = ResultCache(str(tmp_path / "cache.db"), max_entries = 2)
+    
+    #The same settings, seed and replicate give the same key, anything else gives a different key
+    key = ResultCache.make_key(settings, 1, 0)
+    assert key == ResultCache.make_key(dict(settings), 1, 0)
+    assert key != ResultCache.make_key(other_settings, 1, 0)
+    assert key != ResultCache.make_key(settings, 2, 0)
+    assert key != ResultCache.make_key(settings, 1, 1)
+    
+    #A stored result is returned until it is removed
+    assert cache.get(key) is None
+    cache.put(key, 0.25, 40)
+    assert cache.get(key) == (0.25, 40)
+    
+    #Adding two more results to a cache of size 2 removes the first one
+    cache.put(ResultCache.make_key(settings, 1, 1), 0.5, 100)
+    cache.put(ResultCache.make_key(settings, 1, 2), 0.75, 100)
+    assert len(cache) == 2
+    assert cache.get(key) is None
+    
+    #Clearing the cache removes everything
+    assert cache.clear() == 2
+    assert len(cache) == 0
+    cache.close()
+
+def test_seeded_runs_keep_rng(tmp_path):
+    """
+    This is used to test seeded (and cached) runs do not leave config.rng seeded, so the unseeded runs after them are still random.
+    
+    Args:
+        tmp_path: a temporary directory for the cache file
+    """
+    import config
+    from sweep import point_settings, run_task
+    
+    settings = point_settings(1, 0.03, 10, 10, 0.03, 0.05, 20, 0.6, False, False)
+    rng = config.rng
+    cache = ResultCache(str(tmp_path / "cache.db"))
+    assert run_task(settings, 1, 0, cache) == run_task(settings, 1, 0)
+    cache.close()
+    assert config.rng is rng
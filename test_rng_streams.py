@@ -0,0 +1,60 @@
+"""
+This module is used to test the Philox4x32-10 generator and the keyed streams of the module rng_streams.
+"""
+#Importing modules
+import numpy as np
+import pytest
+import config
+from runner import advance, start
+#These are the function and class to test
+from rng_streams import LIGHTNING, Streams, philox4x32
+
+#The known answers of Philox4x32-10 from the Random123 library.
+@pytest.mark.parametrize("counter, key, output", [
+    ([0, 0, 0, 0], [0, 0], [0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8]),
+    ([0xffffffff, 0xffffffff, 0xffffffff, 0xffffffff], [0xffffffff, 0xffffffff], [0x408f276d, 0x41c83b0e, 0xa20bc7c6, 0x6d5451fd]),
+    ([0x243f6a88, 0x85a308d3, 0x13198a2e, 0x03707344], [0xa4093822, 0x299f31d0], [0xd16cfe09, 0x94fdcceb, 0x5001e420, 0x24126ea1]),
+])
+
+def test_philox4x32(counter, key, output):
+    """
+    This is used to test philox4x32 gives the known answers.
+    
+    Args:
+        counter: the counter words
+        
+        key: the key words
+        
+        output: the expected random words
+    """
+    assert philox4x32(np.array(counter, dtype = np.uint32), np.array(key, dtype = np.uint32)).tolist() == output
+
+
+def test_streams():
+    """
+    This is used to test a tile of numbers is the same as that part of the whole grid's numbers, and that a run with keyed streams does not
+    depend on config.rng.
+    """
+    streams = Streams(2024, 3)
+    whole = streams.uniform(5, LIGHTNING, (50, 40))
+    assert np.array_equal(streams.uniform(5, LIGHTNING, (50, 40), (10, 7, 33, 40)), whole[10:33, 7:40])
+    assert not np.array_equal(Streams(2024, 4).uniform(5, LIGHTNING, (50, 40)), whole)
+    assert 0 <= whole.min() and whole.max() < 1
+    
+    grids = []
+    for rng_seed in (1, 2):
+        config.rng = np.random.default_rng(rng_seed)
+        grids.append(advance(start(30, 30, 0.01, 0.05, frame_num = 60, istate = config.BURNT, spread_prob = 0.7, streams = streams), 0, 60))
+    assert np.array_equal(grids[0], grids[1])
+
+
+def test_too_many_cells():
+    """
+    This is used to test grids with more cells than the counter can number are rejected, instead of sharing random numbers between cells.
+    """
+    streams = Streams(1)
+    with pytest.raises(ValueError):
+        streams.uniform(0, LIGHTNING, (2 ** 16 + 1, 2 ** 16), region = (0, 0, 1, 1))
+    with pytest.raises(ValueError):
+        start(2 ** 16 + 1, 2 ** 16, 0.01, 0.05, streams = streams)
+    assert streams.uniform(0, LIGHTNING, (2 ** 16, 2 ** 16), region = (0, 0, 1, 2)).shape == (1, 2)
@@ -0,0 +1,49 @@
+"""
+This module is used to test the RunningStats class in the module running_stats, which keeps the streaming mean and variance used by the adaptive simulations.
+"""
+#Importing modules
+import pytest
+import numpy as np
+#This is the class to test
+from running_stats import RunningStats
+
+#The variables to be tested.
+@pytest.mark.parametrize("values", [
+    #A single value has a mean but no variance
+    [0.5],
+    
+    #Values that are all the same have no variance
+    [3, 3, 3, 3],
+    
+    #Proportions of remaining trees, like the simulations produce
+    [0.1, 0.25, 0.3, 0.05, 0.2],
+    
+    #Large frame numbers with a small spread, which loses precision with the naive sum of squares
+    [1e9 + 4, 1e9 + 7, 1e9 + 13, 1e9 + 16],
+])
+
+def test_running_stats(values):
+    """
+    This is used to test the streaming mean and variance match numpy's mean and variance of all the values at once.
+    
+    Args:
+        values: the values added one at a time
+        
+    Output:
+        Boolean value: if the streaming and numpy statistics are equal
+        
+    """
+    stats = RunningStats()
+    for value in values:
+        stats.update(value)
+    
+    assert stats.count == len(values)
+    assert np.isclose(stats.mean, np.mean(values))
+    
+    #With fewer than two values there is no variance and the confidence interval is infinitely wide
+    if len(values) < 2:
+        assert np.isnan(stats.variance())
+        assert stats.ci_halfwidth() == np.inf
+    else:
+        assert np.isclose(stats.variance(), np.var(values, ddof = 1))
+        assert np.isclose(stats.ci_halfwidth(), 1.96 * np.std(values, ddof = 1) / np.sqrt(len(values)))
@@ -0,0 +1,48 @@
+"""
+This module is used to test the CostModel class and run_scheduled function of the scheduler module.
+"""
+#Importing modules
+import numpy as np
+from batch import run_sweep
+from sweep import sweep_tasks
+#These are the functions to test
+from scheduler import CostModel, features, report, run_scheduled
+
+def test_cost_model():
+    """
+    This is used to test the model finds the coefficients of made up run times and memory, and bigger and rainy runs are predicted to cost more.
+    """
+    records = []
+    for size in (10, 20, 40):
+        for frames in (50, 100):
+            for rain in (False, True):
+                settings = {"GRID_HEIGHT": size, "GRID_WIDTH": size, "frame_num": frames, "rain": rain}
+                records.append({"settings": settings, "seconds": features(settings) @ [0.01, 1e-7, 2e-6],
+                                "memory": 1000 + 50 * size * size + 8 * rain * (size + 2 * frames) ** 2})
+    model = CostModel().fit(records)
+    assert np.allclose(model.time_coefficients, [0.01, 1e-7, 2e-6])
+    assert np.allclose(model.memory_coefficients, [1000, 50, 8])
+    
+    small = {"GRID_HEIGHT": 10, "GRID_WIDTH": 10, "frame_num": 100, "rain": False}
+    assert model.predict_time(dict(small, GRID_HEIGHT = 100, GRID_WIDTH = 100)) > model.predict_time(small)
+    assert model.predict_time(dict(small, rain = True)) > model.predict_time(small)
+    assert model.predict_memory(dict(small, frame_num = 1000)) == model.predict_memory(small)
+
+def test_run_scheduled():
+    """
+    This is used to test a scheduled sweep gives the same results as run_sweep, starts the runs predicted to take longest first and records
+    the predicted and actual time of every run.
+    """
+    spec = {"parameter": 2, "values": [10, 40, 20], "times": 2, "seed": 3, "frame_num": 30}
+    #The pilot runs each size with 10 and 5 frames
+    records = CostModel().calibrate(sweep_tasks(spec), pilot_frames = 10)
+    assert len(records) == 6 and all(record["seconds"] > 0 for record in records)
+    
+    #The default coefficients are used so the order does not depend on the timing of the pilot
+    model = CostModel()
+    tasks, results, records = run_scheduled(spec, workers = 1, model = model, memory_limit = 1)
+    assert results == run_sweep(spec)[1]
+    assert len(records) == 6
+    started = sorted(records, key = lambda record: record["worker_start"])
+    assert [record["settings"]["GRID_HEIGHT"] for record in started] == [40, 40, 20, 20, 10, 10]
+    assert "6 runs" in report(records)
@@ -0,0 +1,55 @@
+"""
+This module is used to test that the frames passed through the shared memory ring of the module shared_frames are the frames of the simulation.
+"""
+#Importing modules
+import time
+import numpy as np
+import pytest
+import config
+from runner import advance, start
+#These are the functions to test
+from shared_frames import start_producer, stop_producer
+
+@pytest.mark.parametrize("policy", ["block", "drop"])
+
+def test_shared_frames(policy):
+    """
+    This is used to test the frames are read in order, every frame is read with the "block" policy, and the last frame and the proportions
+    match the same seeded simulation run in this process.
+    
+    Args:
+        policy: the policy of the ring
+    """
+    ring, process = start_producer(30, 30, 0.01, 0.05, frame_num = 100, slots = 3, policy = policy, seed = 7)
+    frames = []
+    deadline = time.time() + 30
+    try:
+        while not (ring.done() and ring.written() == 100 and frames and frames[-1] == 99):
+            #Once the last frame is read the ring has nothing new until the simulation says it is done, so the last grid read is kept
+            frame_num, new_grid = ring.read()
+            if frame_num is None:
+                assert time.time() < deadline
+                time.sleep(0.001)
+                continue
+            frames.append(frame_num)
+            grid = new_grid
+        proportions = ring.proportions.copy()
+    finally:
+        stop_producer(ring, process)
+    
+    config.rng = np.random.default_rng(7)
+    expected = advance(start(30, 30, 0.01, 0.05, frame_num = 100), 0, 100)
+    
+    assert all(np.diff(frames) > 0)
+    if policy == "block":
+        assert frames == list(range(100))
+    assert (grid == expected).all()
+    assert np.allclose(proportions[:, 0], config.prop_of_trees)
+    assert np.allclose(proportions[:, 1], config.prop_of_fires)
+
+def test_no_rain():
+    """
+    This is used to test asking for rain fails before a producer process is started, as the ring does not carry the rain.
+    """
+    with pytest.raises(ValueError):
+        start_producer(10, 10, rain = True)
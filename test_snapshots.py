@@ -0,0 +1,117 @@
+"""
+This module is used to test the SnapshotLibrary class of the snapshots module and runs started from its snapshots by runner.warm_start.
+"""
+#Importing modules
+import numpy as np
+import config
+from runner import run_replicate
+#These are the functions to test
+from runner import warm_start
+from snapshots import SnapshotLibrary
+
+def test_snapshots(tmp_path):
+    """
+    This is used to test snapshots are found again when the library is opened again, the nearest suitable snapshot is used, runs from a
+    snapshot start settled and are repeatable, and runs with no suitable snapshot start from a uniform grid as before.
+    
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+    """
+    library = SnapshotLibrary(str(tmp_path))
+    library.build([(0.001, 0.01), (0.001, 0.05)], burn_in = 300, GRID_HEIGHT = 40, GRID_WIDTH = 40, seed = 1)
+    
+    library = SnapshotLibrary(str(tmp_path))
+    assert len(library) == 2
+    assert library.nearest(40, 40, 0.002, 0.04)["tree_growth"] == 0.05
+    assert library.nearest(40, 40, 0.002, 0.02)["tree_growth"] == 0.01
+    assert library.nearest(40, 40, 0.002, 0.02, max_distance = 0.001) is None
+    assert library.nearest(30, 30, 0.001, 0.01) is None
+    assert library.nearest(40, 40, 0.001, 0.01, rain = True) is None
+    
+    #A run from a snapshot starts settled, not from a grid full of trees
+    config.rng = np.random.default_rng(2)
+    grid = warm_start(library, 40, 40, 0.001, 0.02, frame_num = 50, settle = 10)
+    assert grid.shape == (40, 40) and np.mean(grid == config.TREE) < 0.9
+    assert config.lightning == 0.001 and config.tree_growth == 0.02 and config.prop_of_trees.count == 0
+    
+    #Runs from a snapshot with the same random number generator are the same, with another they are different
+    results = []
+    for seed in (3, 3, 4):
+        config.rng = np.random.default_rng(seed)
+        results.append((run_replicate(40, 40, 0.001, 0.02, frame_num = 50, snapshots = library, settle = 10), config.prop_of_trees.values().copy()))
+    assert np.array_equal(results[0][1], results[1][1]) and not np.array_equal(results[0][1], results[2][1])
+    assert results[0][1].size == 50 and results[0][1][0] < 0.9
+    
+    #With no suitable snapshot the run is the same as without a library
+    for snapshots in (library, None):
+        config.rng = np.random.default_rng(5)
+        results.append(run_replicate(30, 30, 0.001, 0.02, frame_num = 50, snapshots = snapshots))
+    assert results[-1] == results[-2]
+
+def test_rain_snapshots(tmp_path):
+    """
+    This is used to test runs from a rain snapshot can run for more frames than the snapshot was burnt in for, with rain clouds made with their
+    own cloud threshold.
+    
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+    """
+    library = SnapshotLibrary(str(tmp_path))
+    library.build([(0.01, 0.05)], burn_in = 10, GRID_HEIGHT = 10, GRID_WIDTH = 10, rain = True, seed = 1)
+    
+    config.rng = np.random.default_rng(2)
+    remaining_trees, last_frame = run_replicate(10, 10, 0.01, 0.05, frame_num = 40, cloud_th = 0.9, rain = True, snapshots = library, settle = 5)
+    assert config.prop_of_trees.count == 40 and 0 <= remaining_trees <= 1
+    assert config.weather.cloud_th == 0.9 and config.weather.max_iterations == 40
+
+def test_snapshot_sweeps(tmp_path):
+    """
+    This is used to test sweeps can warm start their runs from a snapshot library, given as its folder in a sweep spec, and that warm started
+    runs are cached apart from the runs from a uniform grid.
+    
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+    """
+    from result_cache import ResultCache
+    from sims import simulation
+    from sweep import run_key, run_task, run_sweep_task, sweep_tasks
+    
+    folder = str(tmp_path / "snapshots")
+    library = SnapshotLibrary(folder)
+    library.build([(0.001, 0.02)], burn_in = 200, GRID_HEIGHT = 30, GRID_WIDTH = 30, seed = 1)
+    settings = sweep_tasks({"parameter": 1, "values": [0.001], "GRID_HEIGHT": 30, "GRID_WIDTH": 30, "tree_growth": 0.02})[0]["settings"]
+    
+    #The key changes with the snapshot and settle frames, but not when the library has no suitable snapshot
+    cold = run_key(settings, 1, 0)
+    assert run_key(settings, 1, 0, snapshots = folder) != cold
+    assert run_key(settings, 1, 0, snapshots = folder, settle = 10) != run_key(settings, 1, 0, snapshots = folder)
+    assert run_key(dict(settings, GRID_HEIGHT = 20), 1, 0, snapshots = folder) == run_key(dict(settings, GRID_HEIGHT = 20), 1, 0)
+    
+    #A warm started run is stored under its own key, and its result is the same from the cache
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    warm = run_task(settings, 1, 0, cache, snapshots = folder, settle = 10)
+    assert cache.get(run_key(settings, 1, 0, snapshots = folder, settle = 10)) == warm
+    assert cache.get(cold) is None
+    cache.close()
+    
+    #The options of a sweep spec reach every run, and the sims functions take a library too
+    tasks = sweep_tasks({"parameter": 1, "values": [0.001], "GRID_HEIGHT": 30, "GRID_WIDTH": 30, "tree_growth": 0.02, "seed": 1, "snapshots": folder, "settle": 10})
+    assert run_sweep_task(tasks[0]) == warm
+    assert simulation(1, np.array([0.001]), 1, 30, 30, tree_growth = 0.02, seed = 1, snapshots = library, settle = 10)[0] == [warm[0]]
+    
+    #Rebuilding the snapshot in the same file changes the key, so the cached run from the old snapshot is not used
+    warm_key = run_key(settings, 1, 0, snapshots = folder, settle = 10)
+    library.build([(0.001, 0.02)], burn_in = 200, GRID_HEIGHT = 30, GRID_WIDTH = 30, seed = 2)
+    assert len(library) == 1 and run_key(settings, 1, 0, snapshots = folder, settle = 10) != warm_key
+
+def test_build_keeps_rng(tmp_path):
+    """
+    This is used to test building a seeded library puts config.rng back, so the runs after it are not seeded by the library.
+    
+    Args:
+        tmp_path: the folder pytest gives the test for its files
+    """
+    config.rng = np.random.default_rng(7)
+    expected = np.random.default_rng(7).random()
+    SnapshotLibrary(str(tmp_path)).build([(0.01, 0.05)], burn_in = 10, GRID_HEIGHT = 10, GRID_WIDTH = 10, seed = 1)
+    assert config.rng.random() == expected
@@ -0,0 +1,47 @@
+"""
+This module is used to test the GaussianProcess class and the active_sweep function of the surrogate module, and sims.simulation_surrogate.
+"""
+#Importing modules
+import numpy as np
+from sims import simulation
+#These are the functions to test
+from sims import simulation_surrogate
+from surrogate import GaussianProcess, active_sweep
+
+def test_gaussian_process():
+    """
+    This is used to test the Gaussian process goes through points without noise, predicts a smooth curve between them and is less certain
+    away from them.
+    """
+    x = np.linspace(0, 1, 8)
+    process = GaussianProcess().fit(x, np.sin(3 * x))
+    mean, std = process.predict(x)
+    assert np.allclose(mean, np.sin(3 * x), atol = 1e-3)
+    
+    between = np.linspace(0, 1, 50)
+    mean, std = process.predict(between)
+    assert np.abs(mean - np.sin(3 * between)).max() < 0.01
+    assert process.predict([2.0])[1][0] > std.max()
+
+def test_active_sweep():
+    """
+    This is used to test an active sweep of a step needs far fewer points than the sweep has to predict it, and the points it picks are
+    around the step.
+    """
+    x = np.linspace(0, 1, 50)
+    means, stds, simulated = active_sweep(x, lambda index: np.tanh(8 * (x[index] - 0.5)), tol = 0.01)
+    assert simulated.sum() < 20
+    assert np.abs(means[:, 0] - np.tanh(8 * (x - 0.5))).max() < 0.1
+    assert np.all(stds[simulated] == 0)
+
+def test_simulation_surrogate():
+    """
+    This is used to test the values simulated by simulation_surrogate give the same results as simulation, and the budget is kept to.
+    """
+    values = np.linspace(0, 0.1, 9)
+    trees, frames, trees_sd, frames_sd, simulated = simulation_surrogate(0, values, 2, budget = 5, GRID_HEIGHT = 20, GRID_WIDTH = 20, frame_num = 50, seed = 2)
+    assert sum(simulated) == 5 and simulated[0] and simulated[-1]
+    
+    expected_trees, expected_frames = simulation(0, values, 2, GRID_HEIGHT = 20, GRID_WIDTH = 20, frame_num = 50, seed = 2)
+    assert np.allclose(np.array(trees)[simulated], np.array(expected_trees)[simulated])
+    assert np.allclose(np.array(frames)[simulated], np.array(expected_frames)[simulated])
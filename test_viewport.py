@@ -0,0 +1,46 @@
+"""
+This module is used to test the pyramid of the Viewport class in the module viewport is kept up to date and drawn correctly.
+"""
+#Importing modules
+import numpy as np
+import pytest
+#These are the functions and class to test
+from viewport import COLOURS, Viewport, _count_blocks
+
+#The variables to be tested.
+@pytest.mark.parametrize("height, width, base_level", [
+    #A grid that is a whole number of blocks
+    (64, 64, 3),
+    #A grid with smaller blocks at its edges
+    (100, 37, 2),
+])
+
+def test_viewport(height, width, base_level):
+    """
+    This is used to test the pyramid matches a pyramid counted from scratch after changing a few cells, and a region drawn at full resolution
+    has the colour of each cell.
+    
+    Args:
+        height: the height of the grid
+        
+        width: the width of the grid
+        
+        base_level: the lowest level stored
+    """
+    rng = np.random.default_rng(1)
+    grid = rng.integers(0, 3, size = (height, width))
+    view = Viewport(grid, base_level)
+    
+    #Change a few cells each frame and keep the pyramid up to date
+    for frame in range(5):
+        grid = grid.copy()
+        changed = rng.random(grid.shape) < 0.01
+        grid[changed] = rng.integers(0, 3, size = changed.sum())
+        view.update(grid)
+    
+    for k, level in enumerate(view.levels, start = base_level):
+        assert (level == _count_blocks(grid, 2 ** k)).all()
+    
+    #A region with no more cells than pixels is drawn cell by cell
+    image = view.render((5, 3, 25, 30), (100, 100))
+    assert np.allclose(image, COLOURS[grid[5:25, 3:30]])
@@ -0,0 +1,231 @@
+"""
+This module draws only the part of a grid that is on screen, at the resolution of the screen, so grids far larger than the screen can be watched.
+When zoomed out each pixel covers a block of cells, and is coloured by the fractions of trees, fires and burnt cells in the block.
+
+The fractions come from a pyramid of levels (a mip-map): level k counts the trees, fires and burnt cells in each block of 2^k by 2^k cells.
+Levels below base_level are not stored, the few cells of the visible region are counted when it is drawn instead.
+After each frame only the blocks that changed are counted again, and only their parents in the levels above, so keeping the pyramid up to date
+costs much less than redrawing the whole grid.
+
+Example:
+    >>> view = Viewport(grid)
+    >>> image = ax.imshow(view.render((0, 0, grid.shape[0], grid.shape[1]), (800, 800)), extent = view.extent((0, 0, grid.shape[0], grid.shape[1])))
+    >>> ...
+    >>> grid = update_grid(grid, i)
+    >>> view.update(grid)
+    >>> view.draw(image)
+"""
+
+#Importing modules
+import numpy as np
+import config
+
+#The states counted in the pyramid, and their colours (the same as the animation's tab:green, tab:red and tab:gray) as RGB fractions
+STATES = (config.TREE, config.FIRE, config.BURNT)
+COLOURS = np.array([[0.173, 0.627, 0.173], [0.839, 0.153, 0.157], [0.498, 0.498, 0.498]])
+
+
+def _count_blocks(grid, block):
+    """
+    This function counts the cells of each state in each block of a grid. Blocks at the edges may be smaller.
+
+    Args:
+        grid (numpy array): the cells to count
+        block (int): the width and height of the blocks
+
+    Returns:
+        (numpy array): the counts, with the state first, then the block row and block column
+    """
+    height, width = grid.shape
+    rows, cols = -(-height // block), -(-width // block)
+    # pad the grid to whole blocks with a value that is not a state
+    padded = np.full((rows * block, cols * block), -1, dtype = grid.dtype)
+    padded[:height, :width] = grid
+    padded = padded.reshape(rows, block, cols, block)
+    return np.stack([(padded == state).sum(axis = (1, 3)) for state in STATES])
+
+
+def _changed_blocks(old, new, block):
+    """
+    This function finds the blocks of a grid with at least one cell that changed.
+
+    Args:
+        old (numpy array): the grid of the last frame
+        new (numpy array): the grid of the new frame
+        block (int): the width and height of the blocks
+
+    Returns:
+        (numpy array): a grid of booleans, true for the blocks that changed
+    """
+    height, width = new.shape
+    rows, cols = -(-height // block), -(-width // block)
+    changed = np.zeros((rows * block, cols * block), dtype = bool)
+    np.not_equal(old, new, out = changed[:height, :width])
+    return changed.reshape(rows, block, cols, block).any(axis = (1, 3))
+
+
+class Viewport:
+    def __init__(self, grid, base_level = 3):
+        """
+        This builds the pyramid of a grid.
+
+        Args:
+            grid (numpy array): the grid of the first frame
+            base_level (int): the lowest stored level, its blocks are 2^base_level cells wide and are the blocks checked for changes
+        """
+        # the grid the pyramid was last counted from
+        self.grid = grid
+        self.base_level = base_level
+        self.block = 2 ** base_level
+
+        # the counts of each level from base_level up to a single block, level k is in levels[k - base_level]
+        self.levels = [_count_blocks(grid, self.block).astype(np.int32)]
+        while self.levels[-1].shape[1] > 1 or self.levels[-1].shape[2] > 1:
+            k = base_level + len(self.levels)
+            self.levels.append(self._merge(self.levels[-1], k))
+
+    @staticmethod
+    def _merge(child, k):
+        # add up each 2 by 2 square of blocks of the level below
+        states, rows, cols = child.shape
+        padded = np.zeros((states, rows + rows % 2, cols + cols % 2), dtype = np.int32 if 4 ** k < 2 ** 31 else np.int64)
+        padded[:, :rows, :cols] = child
+        return padded.reshape(states, padded.shape[1] // 2, 2, padded.shape[2] // 2, 2).sum(axis = (2, 4))
+
+    def update(self, grid, dirty = None):
+        """
+        This function brings the pyramid up to date with a new frame, counting only the blocks that changed.
+
+        Args:
+            grid (numpy array): the grid of the new frame
+            dirty (numpy array): the blocks (of the base level) known to have changed, as a grid of booleans. If not given, they are found by
+                comparing the grid with the last one
+        """
+        if dirty is None:
+            dirty = _changed_blocks(self.grid, grid, self.block)
+        self.grid = grid
+
+        rows, cols = np.nonzero(dirty)
+        if rows.size == 0:
+            return
+
+        # gather the cells of the changed blocks into a stack of blocks, cells past the edge of the grid are given a value that is not a state
+        offsets = np.arange(self.block)
+        y = rows[:, None, None] * self.block + offsets[None, :, None]
+        x = cols[:, None, None] * self.block + offsets[None, None, :]
+        inside = (y < grid.shape[0]) & (x < grid.shape[1])
+        cells = np.where(inside, grid[np.minimum(y, grid.shape[0] - 1), np.minimum(x, grid.shape[1] - 1)], -1)
+        for s, state in enumerate(STATES):
+            self.levels[0][s, rows, cols] = (cells == state).sum(axis = (1, 2))
+
+        # then count each changed block's parent again from its 4 children, one level at a time
+        for child, parent in zip(self.levels, self.levels[1:]):
+            blocks = np.unique(np.stack((rows // 2, cols // 2)), axis = 1)
+            rows, cols = blocks
+            total = np.zeros((len(STATES), rows.size), dtype = parent.dtype)
+            for dy in (0, 1):
+                for dx in (0, 1):
+                    y, x = 2 * rows + dy, 2 * cols + dx
+                    inside = (y < child.shape[1]) & (x < child.shape[2])
+                    total[:, inside] += child[:, y[inside], x[inside]]
+            parent[:, rows, cols] = total
+
+    def fractions(self, region, level):
+        """
+        This function finds the fractions of trees, fires and burnt cells in the blocks of a level covering a region.
+
+        Args:
+            region (tuple): the (top, left, bottom, right) cells of the region, the bottom and right are not included
+            level (int): the level, blocks are 2^level cells wide
+
+        Returns:
+            (numpy array): the fractions, with the block row and column first and the state last
+        """
+        top, left, bottom, right = region
+        block = 2 ** level
+        if level < self.base_level:
+            # the levels below the base are not stored, but the region is small enough to count straight from the grid
+            top, left = top - top % block, left - left % block
+            counts = _count_blocks(self.grid[top:bottom, left:right], block)
+        else:
+            counts = self.levels[level - self.base_level][:, top // block:-(-bottom // block), left // block:-(-right // block)]
+        # blocks at the edges of the grid have fewer cells, so divide by the cells each block really has
+        cells = np.maximum(counts.sum(axis = 0), 1)
+        return np.moveaxis(counts / cells, 0, -1)
+
+    def level_for(self, region, screen_shape):
+        """
+        This function picks the level with the largest blocks that still gives at least one block per pixel of the screen.
+
+        Args:
+            region (tuple): the (top, left, bottom, right) cells of the region
+            screen_shape (tuple): the (height, width) in pixels the region is drawn at
+
+        Returns:
+            (int): the level
+        """
+        top, left, bottom, right = region
+        cells_per_pixel = max((bottom - top) / max(screen_shape[0], 1), (right - left) / max(screen_shape[1], 1), 1)
+        return min(int(np.floor(np.log2(cells_per_pixel))), self.base_level + len(self.levels) - 1)
+
+    def render(self, region, screen_shape):
+        """
+        This function draws a region of the grid at about the resolution of the screen, each pixel coloured by the fractions of the states in it.
+
+        Args:
+            region (tuple): the (top, left, bottom, right) cells of the region, the bottom and right are not included
+            screen_shape (tuple): the (height, width) in pixels the region is drawn at
+
+        Returns:
+            (numpy array): an RGB image of the region
+        """
+        region = self.clip(region)
+        return self.fractions(region, self.level_for(region, screen_shape)) @ COLOURS
+
+    def clip(self, region):
+        """
+        This function limits a region to the cells of the grid.
+
+        Args:
+            region (tuple): the (top, left, bottom, right) cells of the region
+
+        Returns:
+            (tuple): the region inside the grid, at least one cell in size
+        """
+        height, width = self.grid.shape
+        top, left, bottom, right = (int(np.floor(region[0])), int(np.floor(region[1])), int(np.ceil(region[2])), int(np.ceil(region[3])))
+        top, left = min(max(top, 0), height - 1), min(max(left, 0), width - 1)
+        return top, left, min(max(bottom, top + 1), height), min(max(right, left + 1), width)
+
+    def extent(self, region, level = 0):
+        """
+        This function finds the extent (for imshow) of the blocks of a level that cover a region, in cells.
+
+        Args:
+            region (tuple): the (top, left, bottom, right) cells of the region
+            level (int): the level the region is drawn from
+
+        Returns:
+            (tuple): the (left, right, bottom, top) of the image
+        """
+        top, left, bottom, right = self.clip(region)
+        block = 2 ** level
+        top, left = top - top % block, left - left % block
+        # the blocks at the edges of the grid are drawn full size, so the image can end past the edge of the grid
+        return left, -(-right // block) * block, -(-bottom // block) * block, top
+
+    def draw(self, image):
+        """
+        This function redraws an image (from imshow) with the region its axes show, at the resolution of the axes on screen. Zooming or
+        panning the axes changes the region drawn at the next call.
+
+        Args:
+            image (matplotlib.image.AxesImage): the image to draw on
+        """
+        ax = image.axes
+        (left, right), (bottom, top) = ax.get_xlim(), ax.get_ylim()
+        region = self.clip((min(top, bottom), min(left, right), max(top, bottom), max(left, right)))
+        box = ax.get_window_extent()
+        level = self.level_for(region, (box.height, box.width))
+        image.set_data(self.fractions(region, level) @ COLOURS)
+        image.set_extent(self.extent(region, level))
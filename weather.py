@@ -4,16 +4,17 @@ the wind direction in which the rain clouds are traveling and then draws the rai
 To get around the problem of circular imports, the object 'weather' is created in config such that weather attributes are accessed via calling config.weather,  which circumvents the need to import weather into many modules. 
 """
 
-from resize import enlarge, shrink
-from perlin_noise import PerlinNoise
 import numpy as np
-import cv2
 
 
 class Weather: 
-    def __init__(self, cloud_th, max_iterations, grid_width, grid_height):
+    def __init__(self, cloud_th, max_iterations, grid_width, grid_height, rng = None):
+        # perlin_noise is only needed to make new rain clouds, so it is not imported when the weather is loaded from a checkpoint
+        from perlin_noise import PerlinNoise
+        # the random number generator for the wind, clouds and raindrops, passing a seeded generator makes the weather repeatable
+        self.rng = np.random.default_rng() if rng is None else rng
         # perlin noise is an algorithm for generating random numbers in clusters that change gradually, creating 'smooth' trasitions between high and low  points, so is ideal for generating clouds! 
-        self.noise = PerlinNoise(octaves=5)
+        self.noise = PerlinNoise(octaves=5, seed=int(self.rng.integers(2**31)))
         # Our rain cloud is just a 2d grid like our world grid.
         # It will be much bigger than the world grid but we will only show a small 'window' of it over the top of our world grid.
         # The rain window moves on each iteration, in the direction of the wind. Making it look like a rain cloud is moving across the word.
@@ -54,7 +55,7 @@ class Weather:
                             [1, 1], 
                             [1, -1]])
         #choose one randomly, this will stay the same for the whole animation
-        index = np.random.choice(wind_direction.shape[0], 1, replace=False)
+        index = self.rng.choice(wind_direction.shape[0], 1, replace=False)
         wind_random = wind_direction[index]
         return wind_random
 
@@ -86,20 +87,52 @@ class Weather:
             (numpy array): our grid plot but with rain (blue dots in the shape of clouds)
 
         """
+        # cv2 (through resize) is only needed to draw the rain
+        from resize import enlarge
         new_arr = big_arr.copy()  
         # need to enlarge the rain_intensity array so that it matches the size of the grid we're plotting
         # we need to multiply the rain intensity values by 100 otherwise the enlarge function will round them to 0
         big_rain = enlarge(rain_intensity * 100)  / 100 
         # create an array of random numbers the same size as the rain array
-        rand_arr = np.random.random(big_rain.shape)
+        rand_arr = self.rng.random(big_rain.shape)
         # where the array of random values is smaller than the rain array, we set that pixel to dark blue 
         # the rain array is divided by two as we want to randomly take some of the raindrops out of each cell - don't want the whole cell to be blue
         rain_mask = rand_arr < big_rain / 2
         new_arr[rain_mask] = 3 # 3 is dark blue 
         return new_arr
 
+    def get_state(self):
+        """
+        This function returns everything needed to rebuild the weather, it is used to checkpoint a simulation.
 
-        
+        Returns:
+            (dict): the rain cloud grid, wind, cloud threshold, grid size, max iterations and random number generator state
+
+        """
+        return {"rain_noise": self.rain_noise, "wind": self.wind, "cloud_th": self.cloud_th, "max_iterations": self.max_iterations,
+                "grid_width": self.grid_width, "grid_height": self.grid_height, "rng_state": self.rng.bit_generator.state}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        This function rebuilds the weather from the state returned by get_state, without generating the rain clouds again.
+
+        Args:
+            state (dict): the state returned by get_state
+
+        Returns:
+            (Weather): the same weather, the rain clouds will carry on moving from where they were
+
+        """
+        weather = cls.__new__(cls)
+        weather.rain_noise = np.asarray(state["rain_noise"])
+        weather.wind = np.asarray(state["wind"])
+        weather.cloud_th = state["cloud_th"]
+        weather.max_iterations = state["max_iterations"]
+        weather.grid_width = state["grid_width"]
+        weather.grid_height = state["grid_height"]
+        # the random number generator carries on from the same point, so the raindrops are the same as if the run was never stopped
+        weather.rng = np.random.Generator(getattr(np.random, state["rng_state"]["bit_generator"])())
+        weather.rng.bit_generator.state = state["rng_state"]
+        return weather
 
-        
-        